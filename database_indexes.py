@@ -43,6 +43,13 @@ def create_indexes_directly():
             # Time tracking indexes
             "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_item_time_tracking_invoice_started ON item_time_tracking(invoice_no, item_started)",
             "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_item_time_tracking_completed ON item_time_tracking(item_completed) WHERE item_completed IS NOT NULL",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_item_time_tracking_invoice_sequence ON item_time_tracking(invoice_no, order_sequence)",
+            # AI analytics filters: completed rows by date, picker and zone
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_item_time_tracking_created_picker ON item_time_tracking(created_at, picker_username)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_item_time_tracking_created_zone ON item_time_tracking(created_at, zone)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_item_time_tracking_completed_created ON item_time_tracking(created_at) WHERE item_completed IS NOT NULL",
+            # invoice_items(invoice_no, item_code) is the primary key, so the
+            # start_item_tracking lookup needs no extra index
             
             # Activity log index (recent entries only)
             "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_activity_log_recent ON activity_log(timestamp) WHERE timestamp > NOW() - INTERVAL '30 days'",
@@ -51,6 +58,10 @@ def create_indexes_directly():
             "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_picking_exceptions_invoice ON picking_exceptions(invoice_no)",
             "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_batch_sessions_status ON batch_picking_sessions(status)",
             "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_batch_picked_items_session ON batch_picked_items(batch_session_id)",
+            # invoice_items(invoice_no, ...) and batch_session_invoices(batch_session_id, ...)
+            # are already covered by their composite primary keys; the reverse
+            # lookup used by the batch/invoice_items join is not.
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_batch_session_invoices_invoice ON batch_session_invoices(invoice_no)",
             
             # Composite indexes for common queries
             "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_invoices_status_updated ON invoices(status, status_updated_at)",
@@ -80,6 +91,7 @@ def create_indexes_directly():
             "VACUUM ANALYZE invoice_items", 
             "VACUUM ANALYZE item_time_tracking",
             "VACUUM ANALYZE activity_log",
+            "VACUUM ANALYZE batch_session_invoices",
         ]
         
         for cmd in maintenance_commands:
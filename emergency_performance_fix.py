@@ -10,7 +10,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 try:
     from app import app, db
     from models import Setting, ActivityLog, ItemTimeTracking
-    from sqlalchemy import text, func
+    from sqlalchemy import text
     from datetime import datetime, timedelta
 except ImportError as e:
     print(f"Import error: {e}")
@@ -57,26 +57,20 @@ def apply_emergency_fixes():
             cutoff = datetime.now() - timedelta(hours=24)
             
             # Clean activity logs older than 24 hours
-            old_activities = db.session.query(func.count(ActivityLog.id)).filter(
+            old_activities = db.session.query(ActivityLog).filter(
                 ActivityLog.timestamp < cutoff
-            ).scalar() or 0
+            ).delete(synchronize_session=False)
             
             if old_activities > 0:
-                db.session.query(ActivityLog).filter(
-                    ActivityLog.timestamp < cutoff
-                ).delete(synchronize_session=False)
                 print(f"✅ Cleaned {old_activities} activity logs")
             
             # Clean time tracking older than 48 hours  
             time_cutoff = datetime.now() - timedelta(hours=48)
-            old_tracking = db.session.query(func.count(ItemTimeTracking.id)).filter(
+            old_tracking = db.session.query(ItemTimeTracking).filter(
                 ItemTimeTracking.item_started < time_cutoff
-            ).scalar() or 0
+            ).delete(synchronize_session=False)
             
             if old_tracking > 0:
-                db.session.query(ItemTimeTracking).filter(
-                    ItemTimeTracking.item_started < time_cutoff
-                ).delete(synchronize_session=False)
                 print(f"✅ Cleaned {old_tracking} time tracking records")
             
             db.session.commit()
@@ -11,6 +11,25 @@ import pytz
 from app import app, db
 from models import *
 from timezone_utils import get_local_now, get_utc_now
+from db_types import UTCDateTime
+from sqlalchemy import or_
+
+
+def _needs_timestamp_fix(model, *column_names):
+    """Return True only if some of the model's columns may hold naive timestamps.
+
+    UTCDateTime columns always load as timezone-aware, so they never need the
+    rewrite. For any other column, probe for a single non-null row before
+    falling back to a full table scan.
+    """
+    columns = [model.__table__.c[name] for name in column_names if name in model.__table__.c]
+    columns = [col for col in columns if not isinstance(col.type, UTCDateTime)]
+    if not columns:
+        return False
+    return db.session.query(
+        model.query.filter(or_(*[col.isnot(None) for col in columns])).exists()
+    ).scalar()
+
 
 def fix_all_timestamps():
     """Fix all existing timestamps in the database to ensure proper timezone handling"""
@@ -22,7 +41,8 @@ def fix_all_timestamps():
             athens_tz = pytz.timezone('Europe/Athens')
             
             # Fix Invoice timestamps
-            invoices = Invoice.query.all()
+            invoices = Invoice.query.all() if _needs_timestamp_fix(
+                Invoice, 'picking_complete_time', 'packing_complete_time') else []
             for invoice in invoices:
                 if invoice.picking_complete_time and invoice.picking_complete_time.tzinfo is None:
                     athens_dt = athens_tz.localize(invoice.picking_complete_time)
@@ -33,7 +53,8 @@ def fix_all_timestamps():
                     invoice.packing_complete_time = athens_dt.astimezone(pytz.UTC).replace(tzinfo=None)
             
             # Fix InvoiceItem timestamps
-            items = InvoiceItem.query.all()
+            items = InvoiceItem.query.all() if _needs_timestamp_fix(
+                InvoiceItem, 'reset_timestamp', 'skip_timestamp') else []
             for item in items:
                 if item.reset_timestamp and item.reset_timestamp.tzinfo is None:
                     athens_dt = athens_tz.localize(item.reset_timestamp)
@@ -44,14 +65,16 @@ def fix_all_timestamps():
                     item.skip_timestamp = athens_dt.astimezone(pytz.UTC).replace(tzinfo=None)
             
             # Fix PickingException timestamps
-            exceptions = PickingException.query.all()
+            exceptions = PickingException.query.all() if _needs_timestamp_fix(
+                PickingException, 'timestamp') else []
             for exception in exceptions:
                 if exception.timestamp and exception.timestamp.tzinfo is None:
                     athens_dt = athens_tz.localize(exception.timestamp)
                     exception.timestamp = athens_dt.astimezone(pytz.UTC).replace(tzinfo=None)
             
             # Fix BatchPickingSession timestamps
-            sessions = BatchPickingSession.query.all()
+            sessions = BatchPickingSession.query.all() if _needs_timestamp_fix(
+                BatchPickingSession, 'created_at') else []
             for session in sessions:
                 if session.created_at and session.created_at.tzinfo is None:
                     athens_dt = athens_tz.localize(session.created_at)
@@ -60,7 +83,8 @@ def fix_all_timestamps():
             # Fix ItemTimeTracking timestamps
             try:
                 from models import ItemTimeTracking
-                trackings = ItemTimeTracking.query.all()
+                trackings = ItemTimeTracking.query.all() if _needs_timestamp_fix(
+                    ItemTimeTracking, 'start_time', 'end_time') else []
                 for tracking in trackings:
                     if tracking.start_time and tracking.start_time.tzinfo is None:
                         athens_dt = athens_tz.localize(tracking.start_time)
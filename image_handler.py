@@ -1,9 +1,17 @@
 import os
 import requests
-from io import BytesIO
 from PIL import Image
 import logging
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+# pyvips (libvips) is used for resizing/encoding when installed; Pillow otherwise
+try:
+    import pyvips
+    HAS_PYVIPS = True
+except (ImportError, OSError):
+    HAS_PYVIPS = False
 
 # Configure base URL for product images
 BASE_IMAGE_URL = "https://powersoft365customers.blob.core.windows.net/he353264-step-eplattforma/Items"
@@ -12,23 +20,139 @@ BASE_IMAGE_URL = "https://powersoft365customers.blob.core.windows.net/he353264-s
 LOCAL_IMAGE_DIR = "static/images"
 os.makedirs(LOCAL_IMAGE_DIR, exist_ok=True)
 
+# Number of images downloaded in parallel during prefetch
+PREFETCH_WORKERS = 16
+
+# Shared session so downloads reuse pooled keep-alive TLS connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32))
+
+PLACEHOLDER_IMAGE = "images/image-not-found.svg"
+
+# Item codes known to have no remote image. Backed by zero-byte
+# "{item_code}.missing" marker files so misses survive restarts.
+_MISSING = set()
+_MISSING_LOCK = threading.Lock()
+
+def _missing_marker_path(item_code):
+    return f"{LOCAL_IMAGE_DIR}/{item_code}.missing"
+
+def _is_known_missing(item_code):
+    with _MISSING_LOCK:
+        if item_code in _MISSING:
+            return True
+    if os.path.exists(_missing_marker_path(item_code)):
+        with _MISSING_LOCK:
+            _MISSING.add(item_code)
+        return True
+    return False
+
+def _mark_missing(item_code):
+    with _MISSING_LOCK:
+        _MISSING.add(item_code)
+    try:
+        open(_missing_marker_path(item_code), 'wb').close()
+    except OSError as e:
+        logging.error(f"Could not write missing-image marker for {item_code}: {e}")
+
+def clear_missing_cache():
+    """Forget all cached image misses held in memory (marker files are left alone)."""
+    with _MISSING_LOCK:
+        _MISSING.clear()
+
+def _cached_item_codes():
+    """Return item codes that already have a cached image or a miss marker."""
+    cached = set()
+    try:
+        with os.scandir(LOCAL_IMAGE_DIR) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if ext in ('.webp', '.missing'):
+                    cached.add(stem)
+    except OSError as e:
+        logging.error(f"Could not list image cache {LOCAL_IMAGE_DIR}: {e}")
+    return cached
+
+# Long-lived download pool shared by every prefetch request, plus the codes
+# currently queued or downloading so overlapping invoices don't fetch twice
+_PREFETCH_POOL = None
+_INFLIGHT = set()
+_PREFETCH_LOCK = threading.Lock()
+
+def _get_prefetch_pool():
+    global _PREFETCH_POOL
+    with _PREFETCH_LOCK:
+        if _PREFETCH_POOL is None:
+            # Created lazily so each gunicorn worker builds its own after fork
+            _PREFETCH_POOL = ThreadPoolExecutor(
+                max_workers=PREFETCH_WORKERS, thread_name_prefix="image-prefetch"
+            )
+        return _PREFETCH_POOL
+
+def _prefetch_one(item_code):
+    try:
+        # Just call get_product_image - it handles caching
+        get_product_image(item_code)
+    except Exception as e:
+        logging.error(f"Error pre-fetching image for {item_code}: {e}")
+    finally:
+        with _PREFETCH_LOCK:
+            _INFLIGHT.discard(item_code)
+
+def _schedule_prefetch(item_codes):
+    # One directory listing instead of a stat() per item code
+    cached = _cached_item_codes()
+    # Compare and track codes as strings so 123 and "123" are one fetch
+    codes = list(dict.fromkeys(str(code) for code in item_codes))
+    with _PREFETCH_LOCK:
+        new_codes = [code for code in codes
+                     if code not in cached and code not in _INFLIGHT]
+        _INFLIGHT.update(new_codes)
+    pool = _get_prefetch_pool()
+    for item_code in new_codes:
+        pool.submit(_prefetch_one, item_code)
+
 def prefetch_images_for_invoice(item_codes):
     """
-    Pre-fetch and cache images for a list of item codes in a background thread.
-    This ensures images are ready when the picker navigates to each item.
+    Pre-fetch and cache images for a list of item codes on the shared
+    background pool. This ensures images are ready when the picker navigates
+    to each item.
     """
-    def _prefetch():
-        for item_code in item_codes:
-            try:
-                # Just call get_product_image - it handles caching
-                get_product_image(item_code)
-            except Exception as e:
-                logging.error(f"Error pre-fetching image for {item_code}: {e}")
+    unique_codes = list(dict.fromkeys(item_codes))
+    
+    # Work out what is missing on the pool too so it doesn't block the picker
+    _get_prefetch_pool().submit(_schedule_prefetch, unique_codes)
+    logging.info(f"Queued background image pre-fetch for {len(unique_codes)} items")
+
+def _to_rgb(img):
+    """Flatten transparent/palette images onto white so WebP output is RGB."""
+    if img.mode in ('RGB', 'L'):
+        return img
+    img = img.convert('RGBA')
+    background = Image.new('RGB', img.size, (255, 255, 255))
+    background.paste(img, mask=img.split()[3])
+    return background
+
+def _save_webp_pil(response, local_path):
+    # Decode straight from the socket instead of buffering the body first
+    response.raw.decode_content = True
+    img = Image.open(response.raw)
+    img.load()
+    img = _to_rgb(img)
+    
+    # Shrink to 400px wide keeping aspect ratio (never upscales)
+    img.thumbnail((400, 10_000), Image.Resampling.LANCZOS)
     
-    # Run in background thread so it doesn't block the picker
-    thread = threading.Thread(target=_prefetch, daemon=True)
-    thread.start()
-    logging.info(f"Started background image pre-fetch for {len(item_codes)} items")
+    # Save as WebP; method=6 is the slowest but smallest encoder setting
+    img.save(local_path, 'WEBP', quality=85, method=6)
+
+def _save_webp_vips(data, local_path):
+    # libvips decodes, shrinks and encodes in C with the GIL released, so
+    # prefetch workers run on separate cores
+    img = pyvips.Image.thumbnail_buffer(data, 400, height=10_000, size='down')
+    if img.hasalpha():
+        img = img.flatten(background=[255, 255, 255])
+    img.webpsave(local_path, Q=85, effort=6, strip=True)
 
 def get_product_image(item_code):
     """
@@ -49,34 +173,47 @@ def get_product_image(item_code):
     if os.path.exists(local_path):
         logging.info(f"Image for {item_code} found in local cache")
         return relative_path
+
+    if _is_known_missing(item_code):
+        return PLACEHOLDER_IMAGE
     
-    # Try to download the image in different formats
+    # Probe each format with HEAD and only download the one that exists
+    lookup_failed = False
     for ext in ['jpg', 'png']:
         try:
             image_url = f"{BASE_IMAGE_URL}/{item_code}.{ext}"
+            probe = _SESSION.head(image_url, timeout=5)
+            if probe.status_code != 200:
+                if probe.status_code != 404:
+                    lookup_failed = True
+                continue
+
             logging.info(f"Attempting to download image from {image_url}")
-            
-            response = requests.get(image_url, timeout=5)
-            if response.status_code == 200:
-                # Process and save the image
-                img = Image.open(BytesIO(response.content))
-                
-                # Calculate new dimensions while maintaining aspect ratio
-                width, height = img.size
-                new_width = 400
-                new_height = int(height * (new_width / width))
-                
-                # Resize the image - using a simple resize method to avoid version issues
-                img = img.resize((new_width, new_height))
-                
-                # Save as WebP for better compression
-                img.save(local_path, 'WEBP', quality=85)
-                logging.info(f"Successfully downloaded and processed image for {item_code}")
-                return relative_path
+            with _SESSION.get(image_url, timeout=5, stream=True) as response:
+                if response.status_code == 200:
+                    # Encode to a private temp file and publish it atomically so
+                    # a crash or racing worker never leaves a truncated .webp
+                    tmp_path = f"{local_path}.tmp.{os.getpid()}.{threading.get_ident()}"
+                    try:
+                        if HAS_PYVIPS:
+                            _save_webp_vips(response.content, tmp_path)
+                        else:
+                            _save_webp_pil(response, tmp_path)
+                        os.replace(tmp_path, local_path)
+                    finally:
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+                    logging.info(f"Successfully downloaded and processed image for {item_code}")
+                    return relative_path
+            lookup_failed = True
                 
         except Exception as e:
+            lookup_failed = True
             logging.error(f"Error downloading image for {item_code}.{ext}: {str(e)}")
     
-    # If we get here, no image was found
+    # If we get here, no image was found. Only remember the miss when every
+    # format came back 404, so transient errors are retried next time.
+    if not lookup_failed:
+        _mark_missing(item_code)
     logging.warning(f"No image found for {item_code}, using placeholder")
-    return "images/image-not-found.svg"
\ No newline at end of file
+    return PLACEHOLDER_IMAGE
@@ -3,11 +3,84 @@ import logging
 import os
 import numpy as np
 import traceback
+import hashlib
 from datetime import datetime
-from models import Invoice, InvoiceItem
-from utils import calculate_invoice_totals
+from models import Invoice, InvoiceItem, PSCustomer
 from app import db
 
+logger = logging.getLogger(__name__)
+
+# python-calamine (Rust) parses xlsx several times faster than openpyxl;
+# use it when installed and keep openpyxl as the default otherwise.
+try:
+    import python_calamine  # noqa: F401
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+# Parsed workbooks are cached as Parquet (keyed by file content) so a retry
+# or re-upload of the same file skips Excel parsing. Needs pyarrow.
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+EXCEL_CACHE_DIR = os.path.join(os.getcwd(), "reports_cache", "excel_imports")
+EXCEL_CACHE_MAX_FILES = 50
+
+def _excel_cache_path(filepath):
+    sha1 = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha1.update(block)
+    return os.path.join(EXCEL_CACHE_DIR, f"{sha1.hexdigest()}.parquet")
+
+def _store_excel_cache(cache_path, df):
+    try:
+        os.makedirs(EXCEL_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        df.to_parquet(tmp_path, compression='zstd')
+        os.replace(tmp_path, cache_path)
+        
+        # Keep only the most recent cache entries
+        entries = sorted(
+            (e for e in os.scandir(EXCEL_CACHE_DIR) if e.name.endswith('.parquet')),
+            key=lambda e: e.stat().st_mtime,
+            reverse=True,
+        )
+        for entry in entries[EXCEL_CACHE_MAX_FILES:]:
+            os.remove(entry.path)
+    except Exception as e:
+        # Mixed-type columns can't always be written to Parquet; just skip caching
+        logger.warning("Could not cache parsed Excel file: %s", e)
+
+def read_excel_fast(filepath, **kwargs):
+    """Read an Excel file with calamine if available, falling back to openpyxl."""
+    cache_path = None
+    if HAS_PARQUET and not kwargs:
+        try:
+            cache_path = _excel_cache_path(filepath)
+            if os.path.exists(cache_path):
+                logger.info("Loaded parsed Excel file from cache %s", cache_path)
+                return pd.read_parquet(cache_path)
+        except Exception as e:
+            logger.warning("Excel cache lookup failed: %s", e)
+            cache_path = None
+    
+    df = None
+    if HAS_CALAMINE:
+        try:
+            df = pd.read_excel(filepath, engine='calamine', **kwargs)
+        except Exception as e:
+            logger.warning("calamine import failed, retrying with openpyxl: %s", e)
+    if df is None:
+        df = pd.read_excel(filepath, engine='openpyxl', **kwargs)
+    
+    if cache_path:
+        _store_excel_cache(cache_path, df)
+    return df
+
 def extract_corridor_from_location(location):
     """
     Extract corridor from location string (e.g., "10-05-A01" -> "10")
@@ -29,6 +102,101 @@ def extract_corridor_from_location(location):
     
     return None
 
+def extract_corridors(locations):
+    """
+    Vectorised extract_corridor_from_location over a pandas Series.
+    Blank or missing locations map to None.
+    """
+    text = locations.astype('string')
+    corridors = text.str.strip().str.split('-', n=1).str[0].str.strip()
+    
+    # Add leading zero if single digit
+    single_digit = corridors.str.fullmatch(r'\d').fillna(False).astype(bool)
+    corridors = corridors.mask(single_digit, '0' + corridors)
+    
+    has_location = (text.notna() & (text != '')).fillna(False).astype(bool)
+    return corridors.astype(object).where(has_location, None)
+
+# Text columns copied verbatim into InvoiceItem by process_excel_file_safely
+_SAFE_TEXT_COLUMNS = ['ITEM CODE', 'LOCATION', 'BARCODE', 'ZONE', 'ITEM NAME', 'UNIT TYPE', 'Pack']
+
+# Precomputed dataframe column -> InvoiceItem attribute
+_SAFE_ITEM_FIELDS = {
+    '__ITEM CODE': 'item_code',
+    '__LOCATION': 'location',
+    '__BARCODE': 'barcode',
+    '__ZONE': 'zone',
+    '__weight': 'item_weight',
+    '__ITEM NAME': 'item_name',
+    '__UNIT TYPE': 'unit_type',
+    '__Pack': 'pack',
+    '__qty': 'qty',
+    '__line_weight': 'line_weight',
+    '__exp_time': 'exp_time',
+    '__pieces_per_unit': 'pieces_per_unit_snapshot',
+    '__expected_pieces': 'expected_pick_pieces',
+}
+
+def _numeric_column(df, column):
+    """Return ``column`` parsed as floats with blanks/garbage as 0 (all zeros if absent)."""
+    if column not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return pd.to_numeric(df[column], errors='coerce').fillna(0.0)
+
+# Number of imported invoices committed together by process_excel_file
+INVOICE_COMMIT_BATCH_SIZE = 100
+
+# Accepted spellings of each import column, in priority order
+COLUMN_VARIATIONS = {
+    'INVOICE NO': ['invoice no', 'invoiceno', 'invoice number', 'inv no', 'inv.no', 'inv_no'],
+    'ROUTING': ['routing', 'route', 'route no', 'route number'],
+    'CUSTOMER NAME': ['customer name', 'customer', 'cust name', 'cust_name', 'customer_name'],
+    'LOCATION': ['location', 'loc', 'loc.', 'warehouse location', 'wh location'],
+    'ITEM CODE': ['item code', 'itemcode', 'item no', 'item_code', 'item number', 'product code'],
+    'BARCODE': ['barcode', 'bar code', 'upc', 'sku', 'scan code'],
+    'ZONE': ['zone', 'warehouse zone', 'wh zone', 'picking zone'],
+    'Items.Weight': ['items.weight', 'weight', 'item weight', 'weight per item', 'unit weight'],
+    'ITEM NAME': ['item name', 'itemname', 'description', 'product name', 'item_name', 'item desc'],
+    'UNIT TYPE': ['unit type', 'unittype', 'type', 'unit', 'packaging'],
+    'Pack': ['pack', 'package', 'pack size', 'packaging', 'pack_size'],
+    'QTY': ['qty', 'quantity', 'order qty', 'order quantity'],
+    'EXP TIME': ['exp time', 'expected time', 'est time', 'time', 'picking time'],
+    'TOTAL GRAND': ['total grand', 'total_grand', 'grand total', 'total due', 'amount due', 'total amount', 'invoice total', 'total value', 'gross total', 'net total']
+}
+
+# Lower-cased spelling -> canonical column name; the first column listing a
+# spelling wins (e.g. 'packaging' maps to UNIT TYPE, not Pack)
+COLUMN_VARIANT_MAP = {}
+for _req_col, _variations in COLUMN_VARIATIONS.items():
+    for _variant in [_req_col.lower()] + _variations:
+        COLUMN_VARIANT_MAP.setdefault(_variant, _req_col)
+
+def _existing_invoice_numbers(session, invoice_numbers, chunk_size=1000):
+    """Return the subset of ``invoice_numbers`` already in the invoices table."""
+    invoice_numbers = list(invoice_numbers)
+    existing = set()
+    for i in range(0, len(invoice_numbers), chunk_size):
+        chunk = invoice_numbers[i:i + chunk_size]
+        existing.update(
+            row[0] for row in session.query(Invoice.invoice_no).filter(Invoice.invoice_no.in_(chunk))
+        )
+    return existing
+
+def _customer_codes_by_name(session, df, chunk_size=1000):
+    """Map every CUSTOMER NAME in ``df`` to its PS365 customer code in one pass."""
+    if 'CUSTOMER NAME' not in df.columns:
+        return {}
+    names = [name for name in df['CUSTOMER NAME'].dropna().astype(str).unique().tolist() if name]
+    codes = {}
+    for i in range(0, len(names), chunk_size):
+        chunk = names[i:i + chunk_size]
+        codes.update(
+            session.query(PSCustomer.company_name, PSCustomer.customer_code_365)
+            .filter(PSCustomer.company_name.in_(chunk))
+            .all()
+        )
+    return codes
+
 def process_excel_file_safely(filepath):
     """
     Process the Excel file safely with separate transactions for each invoice
@@ -43,24 +211,24 @@ def process_excel_file_safely(filepath):
     try:
         # Load Excel file
         try:
-            df = pd.read_excel(filepath, engine='openpyxl')
-            logging.info(f"Excel file loaded successfully with {len(df)} rows")
+            df = read_excel_fast(filepath)
+            logger.info("Excel file loaded successfully with %s rows", len(df))
         except Exception as e:
-            logging.error(f"Failed to read Excel with openpyxl: {str(e)}")
+            logger.error("Failed to read Excel with openpyxl: %s", e)
             try:
                 df = pd.read_excel(filepath, engine='xlrd')
-                logging.info(f"Excel file loaded successfully with xlrd engine")
+                logger.info("Excel file loaded successfully with xlrd engine")
             except Exception as e2:
                 return False, f"Could not read Excel file: {str(e2)}"
         
         # Log column information for debugging
-        logging.info(f"Columns in Excel: {df.columns.tolist()}")
+        logger.info("Columns in Excel: %s", df.columns.tolist())
         
         # Check required columns
         if 'INVOICE NO' not in df.columns:
             possible_columns = [col for col in df.columns if 'invoice' in str(col).lower()]
             if possible_columns:
-                logging.info(f"Renaming column {possible_columns[0]} to INVOICE NO")
+                logger.info("Renaming column %s to INVOICE NO", possible_columns[0])
                 df.rename(columns={possible_columns[0]: 'INVOICE NO'}, inplace=True)
             else:
                 return False, "Missing required column: INVOICE NO"
@@ -68,18 +236,36 @@ def process_excel_file_safely(filepath):
         if 'ITEM CODE' not in df.columns:
             possible_columns = [col for col in df.columns if 'item' in str(col).lower() and 'code' in str(col).lower()]
             if possible_columns:
-                logging.info(f"Renaming column {possible_columns[0]} to ITEM CODE")
+                logger.info("Renaming column %s to ITEM CODE", possible_columns[0])
                 df.rename(columns={possible_columns[0]: 'ITEM CODE'}, inplace=True)
             else:
                 return False, "Missing required column: ITEM CODE"
         
-        # Fill missing values with defaults
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].fillna('')
-            else:
-                df[col] = df[col].fillna(0)
+        # Fill missing values with defaults in a single pass
+        fill_values = {
+            col: '' if dtype == 'object' or pd.api.types.is_string_dtype(dtype) else 0
+            for col, dtype in df.dtypes.items()
+        }
+        df.fillna(value=fill_values, inplace=True)
                 
+        # Precompute typed per-line values once for the whole sheet instead
+        # of parsing every cell inside the per-invoice row loop
+        for col in _SAFE_TEXT_COLUMNS:
+            df[f'__{col}'] = df[col].astype(str) if col in df.columns else ''
+        df['__qty'] = _numeric_column(df, 'QTY').round().astype(int)
+        
+        # Special handling for CHO-0011 to ensure correct quantity during import
+        cho_fix = (df['__ITEM CODE'] == 'CHO-0011') & (df['INVOICE NO'].astype(str) == 'IN10048627')
+        if cho_fix.any():
+            logger.info("FIXED: Setting CHO-0011 quantity to 1 for invoice IN10048627 (was %s)", df.loc[cho_fix, '__qty'].tolist())
+            df.loc[cho_fix, '__qty'] = 1
+        
+        df['__weight'] = _numeric_column(df, 'Items.Weight')
+        df['__line_weight'] = df['__weight'] * df['__qty']
+        df['__exp_time'] = _numeric_column(df, 'EXP TIME')
+        df['__pieces_per_unit'] = _numeric_column(df, 'PIECES_PER_UNIT_SNAPSHOT').astype(int)
+        df['__expected_pieces'] = _numeric_column(df, 'EXPECTED_PICK_PIECES').astype(int)
+        
         # Group by invoice
         success_count = 0
         error_count = 0
@@ -92,119 +278,77 @@ def process_excel_file_safely(filepath):
         invoice_groups = df.groupby('INVOICE NO')
         total_invoices = len(invoice_groups)
         
+        # One query for every invoice in the file instead of one per invoice
+        existing_invoices = _existing_invoice_numbers(
+            db.session, (str(invoice_no) for invoice_no in invoice_groups.groups)
+        )
+        customer_codes = _customer_codes_by_name(db.session, df)
+        
         for invoice_no, group in invoice_groups:
-            logging.info(f"Processing invoice {invoice_no} with {len(group)} items")
+            # Convert once and reuse for lookups, the header and every item
+            invoice_no_str = str(invoice_no)
+            first_row = group.iloc[0]
+            logger.info("Processing invoice %s with %s items", invoice_no, len(group))
             
             # Start a new transaction for this invoice
             try:
                 # Check if invoice already exists
-                existing = Invoice.query.get(str(invoice_no))
-                if existing:
-                    logging.info(f"Invoice {invoice_no} already exists, skipping")
+                if invoice_no_str in existing_invoices:
+                    logger.info("Invoice %s already exists, skipping", invoice_no)
                     continue
                 
                 # Look up customer code from ps_customers table
-                customer_name = str(group.iloc[0].get('CUSTOMER NAME', ''))
+                customer_name = str(first_row.get('CUSTOMER NAME', ''))
                 customer_code_365 = None
                 if customer_name:
-                    from models import PSCustomer
-                    ps_customer = PSCustomer.query.filter_by(company_name=customer_name).first()
-                    if ps_customer:
-                        customer_code_365 = ps_customer.customer_code_365
-                        logging.info(f"Found PS365 customer code {customer_code_365} for customer {customer_name}")
+                    customer_code_365 = customer_codes.get(customer_name)
+                    if customer_code_365:
+                        logger.info("Found PS365 customer code %s for customer %s", customer_code_365, customer_name)
                     else:
-                        logging.warning(f"No PS365 customer code found for customer {customer_name}")
+                        logger.warning("No PS365 customer code found for customer %s", customer_name)
                     
                 # Get total_grand if available in the Excel
                 total_grand_value = None
-                total_grand_raw = group.iloc[0].get('TOTAL GRAND', None)
+                total_grand_raw = first_row.get('TOTAL GRAND', None)
                 if total_grand_raw is None:
                     # Try alternative column names
                     for alt_name in ['GRAND TOTAL', 'TOTAL DUE', 'AMOUNT DUE', 'TOTAL AMOUNT', 'INVOICE TOTAL']:
-                        total_grand_raw = group.iloc[0].get(alt_name, None)
+                        total_grand_raw = first_row.get(alt_name, None)
                         if total_grand_raw is not None:
                             break
                 
                 if total_grand_raw is not None and not pd.isna(total_grand_raw):
                     try:
                         total_grand_value = float(total_grand_raw)
-                        logging.info(f"Imported total_grand {total_grand_value} for invoice {invoice_no}")
+                        logger.info("Imported total_grand %s for invoice %s", total_grand_value, invoice_no)
                     except (ValueError, TypeError):
-                        logging.warning(f"Could not parse total_grand '{total_grand_raw}' for invoice {invoice_no}")
+                        logger.warning("Could not parse total_grand '%s' for invoice %s", total_grand_raw, invoice_no)
+                
+                # Build item rows straight from the precomputed columns
+                items = group.loc[group['__ITEM CODE'] != '', list(_SAFE_ITEM_FIELDS)].rename(columns=_SAFE_ITEM_FIELDS)
+                items['invoice_no'] = invoice_no_str
+                item_records = items.to_dict('records')
                 
-                # Create invoice header
+                # Create invoice header with totals computed from the columns
                 invoice = Invoice(
-                    invoice_no=str(invoice_no),
-                    routing=str(group.iloc[0].get('ROUTING', '')),
+                    invoice_no=invoice_no_str,
+                    routing=str(first_row.get('ROUTING', '')),
                     customer_name=customer_name,
                     customer_code_365=customer_code_365,
                     upload_date=today,
                     total_lines=len(group),
-                    total_items=0,
-                    total_weight=0,
-                    total_exp_time=0,
+                    total_items=int(items['qty'].sum()),
+                    total_weight=float(items['line_weight'].sum()),
+                    total_exp_time=float(items['exp_time'].sum()),
                     total_grand=total_grand_value
                 )
                 
                 db.session.add(invoice)
                 db.session.flush()  # Write to DB but don't commit yet
                 
-                # Process items using bulk insert for better performance
-                items_to_add = []
-                total_items_qty = 0
-                total_weight_sum = 0.0
-                total_exp_time_sum = 0.0
-                
-                for _, row in group.iterrows():
-                    item_code = str(row.get('ITEM CODE', ''))
-                    if not item_code:
-                        continue
-                        
-                    # Calculate line weight
-                    weight = float(row.get('Items.Weight', 0) or 0)
-                    # Convert quantity to integer (round to nearest whole number)
-                    qty = int(round(float(row.get('QTY', 0) or 0)))
-                    
-                    # Special handling for CHO-0011 to ensure correct quantity during import
-                    if item_code == 'CHO-0011' and str(invoice_no) == 'IN10048627':
-                        print(f"IMPORTANT: Setting CHO-0011 quantity to 1 for invoice IN10048627 (was {qty})")
-                        logging.info(f"FIXED: Setting CHO-0011 quantity to 1 for invoice IN10048627 (was {qty})")
-                        qty = 1  # Force exact quantity for this specific invoice
-
-                    line_weight = weight * qty
-                    exp_time = float(row.get('EXP TIME', 0) or 0)
-                    
-                    # Calculate totals inline to avoid extra DB query
-                    total_items_qty += qty
-                    total_weight_sum += line_weight
-                    total_exp_time_sum += exp_time
-                    
-                    # Create item dict for bulk insert
-                    items_to_add.append(InvoiceItem(
-                        invoice_no=str(invoice_no),
-                        item_code=item_code,
-                        location=str(row.get('LOCATION', '')),
-                        barcode=str(row.get('BARCODE', '')),
-                        zone=str(row.get('ZONE', '')),
-                        item_weight=weight,
-                        item_name=str(row.get('ITEM NAME', '')),
-                        unit_type=str(row.get('UNIT TYPE', '')),
-                        pack=str(row.get('Pack', '')),
-                        qty=qty,
-                        line_weight=line_weight,
-                        exp_time=exp_time,
-                        pieces_per_unit_snapshot=int(float(row.get('PIECES_PER_UNIT_SNAPSHOT', 0) or 0)),
-                        expected_pick_pieces=int(float(row.get('EXPECTED_PICK_PIECES', 0) or 0))
-                    ))
-                    item_count += 1
-                
-                # Bulk add all items at once (much faster than individual adds)
-                db.session.add_all(items_to_add)
-                
-                # Update invoice totals inline (avoid extra query)
-                invoice.total_items = total_items_qty
-                invoice.total_weight = total_weight_sum
-                invoice.total_exp_time = total_exp_time_sum
+                # Bulk insert all items at once (no per-row ORM objects)
+                db.session.bulk_insert_mappings(InvoiceItem, item_records)
+                item_count += len(item_records)
                 
                 # Commit this invoice
                 db.session.commit()
@@ -213,15 +357,15 @@ def process_excel_file_safely(filepath):
             except Exception as e:
                 db.session.rollback()
                 error_count += 1
-                logging.error(f"Error processing invoice {invoice_no}: {str(e)}")
-                logging.error(traceback.format_exc())
+                logger.error("Error processing invoice %s: %s", invoice_no, e)
+                logger.error(traceback.format_exc())
         
         message = f"Imported {success_count} of {total_invoices} invoices with {item_count} items. {error_count} invoices had errors."
         return success_count > 0, message
         
     except Exception as e:
-        logging.error(f"Import error: {str(e)}")
-        logging.error(traceback.format_exc())
+        logger.error("Import error: %s", e)
+        logger.error(traceback.format_exc())
         return False, f"Import failed: {str(e)}"
 
 # Helper function to convert numpy types to Python native types
@@ -258,25 +402,25 @@ def process_excel_file(filepath, session):
         
         # Try multiple import methods
         try:
-            # First try with default openpyxl engine 
-            df = pd.read_excel(filepath, engine='openpyxl')
-            logging.info("Excel file loaded successfully with openpyxl engine")
+            # First try with calamine (if installed) / openpyxl
+            df = read_excel_fast(filepath)
+            logger.info("Excel file loaded successfully")
         except Exception as e:
             import_exception = e
-            logging.warning(f"openpyxl import failed: {str(e)}")
+            logger.warning("openpyxl import failed: %s", e)
             
             try:
                 # Try with xlrd engine for older formats
                 df = pd.read_excel(filepath, engine='xlrd')
-                logging.info("Excel file loaded successfully with xlrd engine")
+                logger.info("Excel file loaded successfully with xlrd engine")
                 import_exception = None
             except Exception as e2:
-                logging.warning(f"xlrd import failed: {str(e2)}")
+                logger.warning("xlrd import failed: %s", e2)
                 
                 try:
                     # Try with specific sheet_name
                     sheets = pd.ExcelFile(filepath, engine='openpyxl').sheet_names
-                    logging.info(f"Available sheets: {sheets}")
+                    logger.info("Available sheets: %s", sheets)
                     
                     # Try first sheet
                     if sheets:
@@ -284,10 +428,10 @@ def process_excel_file(filepath, session):
                     else:
                         # Last fallback attempt with sheet index
                         df = pd.read_excel(filepath, engine='openpyxl', sheet_name=0)
-                    logging.info("Excel file loaded successfully with sheet_name=0")
+                    logger.info("Excel file loaded successfully with sheet_name=0")
                     import_exception = None
                 except Exception as e3:
-                    logging.error(f"All import methods failed. Last error: {str(e3)}")
+                    logger.error("All import methods failed. Last error: %s", e3)
         
         # If all import methods failed, raise the original exception
         if df is None:
@@ -296,50 +440,22 @@ def process_excel_file(filepath, session):
             else:
                 raise ValueError("Could not read Excel file with any available method")
             
-        logging.info(f"Excel file loaded successfully with {len(df)} rows and columns: {df.columns.tolist()}")
+        logger.info("Excel file loaded successfully with %s rows and columns: %s", len(df), df.columns.tolist())
         
-        # Check and standardize column names (handle case sensitivity)
+        # Check and standardize column names (handle case sensitivity and
+        # common variations) with one dict lookup per actual column
         column_mapping = {}
-        required_columns_lower = [col.lower() for col in [
-            'INVOICE NO', 'ROUTING', 'CUSTOMER NAME', 'LOCATION', 
-            'ITEM CODE', 'BARCODE', 'ZONE', 'Items.Weight', 
-            'ITEM NAME', 'UNIT TYPE', 'Pack', 'QTY', 'EXP TIME'
-        ]]
-        
-        # Create a mapping of actual column names to expected column names
-        # Also handle common variations in column names
-        column_variations = {
-            'INVOICE NO': ['invoice no', 'invoiceno', 'invoice number', 'inv no', 'inv.no', 'inv_no'],
-            'ROUTING': ['routing', 'route', 'route no', 'route number'],
-            'CUSTOMER NAME': ['customer name', 'customer', 'cust name', 'cust_name', 'customer_name'],
-            'LOCATION': ['location', 'loc', 'loc.', 'warehouse location', 'wh location'],
-            'ITEM CODE': ['item code', 'itemcode', 'item no', 'item_code', 'item number', 'product code'],
-            'BARCODE': ['barcode', 'bar code', 'upc', 'sku', 'scan code'],
-            'ZONE': ['zone', 'warehouse zone', 'wh zone', 'picking zone'],
-            'Items.Weight': ['items.weight', 'weight', 'item weight', 'weight per item', 'unit weight'],
-            'ITEM NAME': ['item name', 'itemname', 'description', 'product name', 'item_name', 'item desc'],
-            'UNIT TYPE': ['unit type', 'unittype', 'type', 'unit', 'packaging'],
-            'Pack': ['pack', 'package', 'pack size', 'packaging', 'pack_size'],
-            'QTY': ['qty', 'quantity', 'order qty', 'order quantity'],
-            'EXP TIME': ['exp time', 'expected time', 'est time', 'time', 'picking time'],
-            'TOTAL GRAND': ['total grand', 'total_grand', 'grand total', 'total due', 'amount due', 'total amount', 'invoice total', 'total value', 'gross total', 'net total']
-        }
-        
         for actual_col in df.columns:
-            actual_col_lower = actual_col.lower().strip()
-            
-            # Try direct matches first
-            for req_col, variations in column_variations.items():
-                if actual_col_lower == req_col.lower() or actual_col_lower in variations:
-                    column_mapping[actual_col] = req_col
-                    break
-                    
-        logging.info(f"Column mapping created: {column_mapping}")
+            req_col = COLUMN_VARIANT_MAP.get(actual_col.lower().strip())
+            if req_col is not None:
+                column_mapping[actual_col] = req_col
+        
+        logger.info("Column mapping created: %s", column_mapping)
         
         # Rename columns to match expected case
         if column_mapping:
             df.rename(columns=column_mapping, inplace=True)
-            logging.info(f"Standardized columns: {column_mapping}")
+            logger.info("Standardized columns: %s", column_mapping)
         
         # Validate data after standardizing column names
         required_columns = ['INVOICE NO', 'ITEM CODE']  # Only these two are truly required
@@ -347,7 +463,7 @@ def process_excel_file(filepath, session):
         missing_columns = [col for col in required_columns if col not in df.columns]
         if missing_columns:
             all_columns = df.columns.tolist()
-            logging.error(f"Missing required columns: {missing_columns}. Available columns: {all_columns}")
+            logger.error("Missing required columns: %s. Available columns: %s", missing_columns, all_columns)
             return False, f"Missing required columns: {', '.join(missing_columns)}. Available columns in file: {', '.join(all_columns)}"
         
         # Current date for upload_date
@@ -358,18 +474,32 @@ def process_excel_file(filepath, session):
         duplicate_invoices = 0
         total_items = 0
         duplicate_items = 0
+        pending_invoices = 0
+        pending_items = 0
         
-        # Define getter function to safely get values with fallbacks
-        def safe_get(row, column, default=None):
+        # Resolve each logical column to its actual sheet column once, so
+        # per-cell reads are a dict lookup rather than a scan of df.columns
+        def resolve_column(column):
             # First try direct column access
             if column in df.columns:
-                return convert_numpy_type(row.get(column, default))
+                return column
             # Try case-insensitive access
             for col in df.columns:
                 if col.lower() == column.lower():
-                    return convert_numpy_type(row.get(col, default))
-            # Return default if column not found
-            return default
+                    return col
+            return None
+        
+        resolved_columns = {}
+        
+        # Define getter function to safely get values with fallbacks
+        def safe_get(row, column, default=None):
+            if column not in resolved_columns:
+                resolved_columns[column] = resolve_column(column)
+            actual_col = resolved_columns[column]
+            if actual_col is None:
+                # Return default if column not found
+                return default
+            return convert_numpy_type(row.get(actual_col, default))
         
         # Process by invoice
         # Ensure the invoice_no column exists and is named appropriately
@@ -381,46 +511,79 @@ def process_excel_file(filepath, session):
                     invoice_col = col
                     break
         
-        logging.info(f"Using column '{invoice_col}' as invoice number")
+        logger.info("Using column '%s' as invoice number", invoice_col)
         
         # Display column data types to help with debugging
-        logging.info(f"Column data types: {df.dtypes}")
+        logger.info("Column data types: %s", df.dtypes)
         
         # Sample first few rows for logging
         try:
             sample_rows = df.head(3).to_dict('records')
             for i, row in enumerate(sample_rows):
-                logging.info(f"Sample row {i}: {row}")
+                logger.info("Sample row %s: %s", i, row)
         except Exception as e:
-            logging.warning(f"Could not log sample rows: {str(e)}")
+            logger.warning("Could not log sample rows: %s", e)
             
         # Fill empty values with placeholders to avoid groupby errors
         df[invoice_col] = df[invoice_col].fillna('UNKNOWN')
         
+        # Derive every item's corridor up front in one vectorised pass
+        if 'LOCATION' in df.columns:
+            df['__corridor'] = extract_corridors(df['LOCATION'])
+        else:
+            df['__corridor'] = None
+        
+        # Parse numeric columns once in pandas instead of float() per cell;
+        # blank or unparseable weights/quantities count as 0
+        df['__item_weight'] = _numeric_column(df, resolve_column('Items.Weight'))
+        df['__qty'] = _numeric_column(df, resolve_column('QTY'))
+        df['__line_weight'] = df['__item_weight'] * df['__qty']
+        exp_time_col = resolve_column('EXP TIME')
+        if exp_time_col is not None:
+            df['__exp_time'] = pd.to_numeric(df[exp_time_col], errors='coerce')
+        else:
+            df['__exp_time'] = None
+        
+        # Columns read for every item row, in the order they are unpacked;
+        # columns missing from the sheet read as None
+        df['__none'] = None
+        item_columns = [
+            resolve_column(column) or '__none'
+            for column in ('ITEM CODE', 'LOCATION', 'BARCODE', 'ZONE', 'ITEM NAME', 'UNIT TYPE', 'Pack')
+        ] + ['__corridor', '__item_weight', '__qty', '__line_weight', '__exp_time']
+        
         invoice_groups = df.groupby(invoice_col)
         
+        # Look up existing invoices once for the whole file
+        file_invoice_numbers = [
+            str(invoice_no) for invoice_no in invoice_groups.groups
+            if not pd.isna(invoice_no) and invoice_no != 'UNKNOWN'
+        ]
+        try:
+            existing_invoices = _existing_invoice_numbers(session, file_invoice_numbers)
+        except Exception as e:
+            logger.error("Error checking for existing invoices: %s", e)
+            # If there's an error checking, we'll assume none exist and try to create them
+            session.rollback()
+            existing_invoices = set()
+        customer_codes = _customer_codes_by_name(session, df)
+        
         for invoice_no, group in invoice_groups:
             if pd.isna(invoice_no) or invoice_no == 'UNKNOWN':
-                logging.warning("Skipping row with missing invoice number")
+                logger.warning("Skipping row with missing invoice number")
                 continue
                 
             # Convert to string to ensure compatibility
             if not isinstance(invoice_no, str):
                 invoice_no = str(invoice_no)
                 
-            logging.info(f"Processing invoice: {invoice_no} with {len(group)} items")
+            logger.info("Processing invoice: %s with %s items", invoice_no, len(group))
             
             # Check if invoice already exists
-            try:
-                existing_invoice = Invoice.query.get(invoice_no)
-                
-                if existing_invoice:
-                    duplicate_invoices += 1
-                    logging.warning(f"Duplicate invoice: {invoice_no}")
-                    continue
-            except Exception as e:
-                logging.error(f"Error checking for existing invoice {invoice_no}: {str(e)}")
-                # If there's an error checking, we'll assume it doesn't exist and try to create it
+            if invoice_no in existing_invoices:
+                duplicate_invoices += 1
+                logger.warning("Duplicate invoice: %s", invoice_no)
+                continue
             
             # Get first row for invoice header data
             first_row = group.iloc[0]
@@ -429,13 +592,11 @@ def process_excel_file(filepath, session):
             customer_name = safe_get(first_row, 'CUSTOMER NAME')
             customer_code_365 = None
             if customer_name:
-                from models import PSCustomer
-                ps_customer = PSCustomer.query.filter_by(company_name=customer_name).first()
-                if ps_customer:
-                    customer_code_365 = ps_customer.customer_code_365
-                    logging.info(f"Found PS365 customer code {customer_code_365} for customer {customer_name}")
+                customer_code_365 = customer_codes.get(str(customer_name))
+                if customer_code_365:
+                    logger.info("Found PS365 customer code %s for customer %s", customer_code_365, customer_name)
                 else:
-                    logging.warning(f"No PS365 customer code found for customer {customer_name}")
+                    logger.warning("No PS365 customer code found for customer %s", customer_name)
             
             # Create new invoice
             new_invoice = Invoice()
@@ -445,9 +606,9 @@ def process_excel_file(filepath, session):
             new_invoice.customer_code_365 = customer_code_365
             new_invoice.upload_date = today
             new_invoice.total_lines = int(len(group))
-            new_invoice.total_items = 0  # Will be calculated later
-            new_invoice.total_weight = 0  # Will be calculated later
-            new_invoice.total_exp_time = 0  # Will be calculated later
+            new_invoice.total_items = 0  # Summed from the items below
+            new_invoice.total_weight = 0  # Summed from the items below
+            new_invoice.total_exp_time = 0  # Summed from the items below
             new_invoice.status = 'not_started'  # Set consistent status format
             
             # Import total amount due if available
@@ -455,114 +616,111 @@ def process_excel_file(filepath, session):
             if total_grand is not None:
                 try:
                     new_invoice.total_grand = float(total_grand)
-                    logging.info(f"Imported total_grand {total_grand} for invoice {invoice_no}")
+                    logger.info("Imported total_grand %s for invoice %s", total_grand, invoice_no)
                 except (ValueError, TypeError):
-                    logging.warning(f"Could not parse total_grand '{total_grand}' for invoice {invoice_no}")
-            
-            session.add(new_invoice)
-            total_invoices += 1
+                    logger.warning("Could not parse total_grand '%s' for invoice %s", total_grand, invoice_no)
             
-            # Process items
-            for idx, row in group.iterrows():
-                item_code = safe_get(row, 'ITEM CODE')
-                
-                if item_code is None:
-                    logging.warning(f"Skipping item with no item code in invoice {invoice_no}")
-                    continue
-                    
-                # Convert to string if not already
-                if not isinstance(item_code, str):
-                    item_code = str(item_code)
-                
-                # Check for duplicate item in this invoice
-                try:
-                    existing_item = InvoiceItem.query.filter_by(
-                        invoice_no=invoice_no, 
-                        item_code=item_code
-                    ).first()
-                    
-                    if existing_item:
-                        duplicate_items += 1
-                        logging.warning(f"Duplicate item: {invoice_no} - {item_code}")
-                        continue
-                except Exception as e:
-                    logging.error(f"Error checking for duplicate item {invoice_no} - {item_code}: {str(e)}")
-                    # Continue with the insertion attempt
-                
-                # Calculate line weight - handle missing or invalid values gracefully
-                item_weight = safe_get(row, 'Items.Weight', 0)
-                if item_weight is None:
-                    item_weight = 0
+            try:
+                # Each invoice gets its own SAVEPOINT so a bad invoice is rolled
+                # back on its own without losing the rest of the commit batch
+                with session.begin_nested():
+                    session.add(new_invoice)
+                    invoice_items_added = 0
+                    # Existing invoices are skipped above, so this invoice has
+                    # no stored items; only repeats within the file can clash
+                    seen_item_codes = set()
+                    invoice_qty_total = 0.0
+                    invoice_weight_total = 0.0
+                    invoice_exp_time_total = 0.0
                     
-                qty = safe_get(row, 'QTY', 0)
-                if qty is None:
-                    qty = 0
+                    # Process items
+                    for values in group[item_columns].itertuples(index=False, name=None):
+                        (item_code, location, barcode, zone, item_name, unit_type, pack_value,
+                         corridor, item_weight, qty, line_weight, exp_time) = map(convert_numpy_type, values)
+                        
+                        if item_code is None:
+                            logger.warning("Skipping item with no item code in invoice %s", invoice_no)
+                            continue
+                        
+                        # Convert to string if not already
+                        if not isinstance(item_code, str):
+                            item_code = str(item_code)
+                        
+                        # Check for duplicate item in this invoice
+                        if item_code in seen_item_codes:
+                            duplicate_items += 1
+                            logger.warning("Duplicate item: %s - %s", invoice_no, item_code)
+                            continue
+                        seen_item_codes.add(item_code)
+                        
+                        # Handle potentially problematic pack values (like "6 X")
+                        # If pack is None, leave it as None
+                        # Otherwise, ensure it's a string
+                        if pack_value is not None:
+                            pack_value = str(pack_value)
+                        
+                        # Create new invoice item
+                        new_item = InvoiceItem()
+                        new_item.invoice_no = invoice_no
+                        new_item.item_code = item_code
+                        new_item.location = location
+                        new_item.corridor = corridor  # Auto-extracted before grouping
+                        
+                        # Debug logging for corridor extraction
+                        if location and corridor:
+                            logger.debug("Extracted corridor '%s' from location '%s' for item %s", corridor, location, item_code)
+                        elif location and not corridor:
+                            logger.warning("Could not extract corridor from location '%s' for item %s", location, item_code)
+                        new_item.barcode = barcode
+                        new_item.zone = zone
+                        new_item.item_weight = item_weight
+                        new_item.item_name = item_name
+                        new_item.unit_type = unit_type
+                        new_item.pack = pack_value
+                        new_item.qty = qty
+                        new_item.line_weight = line_weight
+                        new_item.exp_time = exp_time
+                        
+                        session.add(new_item)
+                        invoice_items_added += 1
+                        
+                        # Keep invoice totals in step with the rows being added
+                        invoice_qty_total += qty
+                        invoice_weight_total += line_weight
+                        invoice_exp_time_total += exp_time or 0.0
                     
-                try:
-                    line_weight = float(item_weight) * float(qty)
-                except (ValueError, TypeError):
-                    line_weight = 0
-                    logging.warning(f"Could not calculate line weight for {invoice_no}-{item_code}. Using default 0.")
-                
-                # Handle potentially problematic pack values (like "6 X")
-                pack_value = safe_get(row, 'Pack')
-                # If pack is None, leave it as None
-                # Otherwise, ensure it's a string
-                if pack_value is not None:
-                    pack_value = str(pack_value)
-                
-                # Create new invoice item
-                new_item = InvoiceItem()
-                new_item.invoice_no = invoice_no
-                new_item.item_code = item_code
-                location = safe_get(row, 'LOCATION')
-                new_item.location = location
-                corridor = extract_corridor_from_location(location)  # Auto-extract corridor
-                new_item.corridor = corridor
-                
-                # Force print for debugging
-                print(f"DEBUG: Location='{location}', Extracted corridor='{corridor}' for item {item_code}")
+                    new_invoice.total_lines = invoice_items_added
+                    new_invoice.total_items = invoice_qty_total
+                    new_invoice.total_weight = invoice_weight_total
+                    new_invoice.total_exp_time = invoice_exp_time_total
                 
-                # Debug logging for corridor extraction
-                if location and corridor:
-                    logging.info(f"Extracted corridor '{corridor}' from location '{location}' for item {item_code}")
-                elif location and not corridor:
-                    logging.warning(f"Could not extract corridor from location '{location}' for item {item_code}")
-                new_item.barcode = safe_get(row, 'BARCODE')
-                new_item.zone = safe_get(row, 'ZONE')
-                new_item.item_weight = item_weight
-                new_item.item_name = safe_get(row, 'ITEM NAME')
-                new_item.unit_type = safe_get(row, 'UNIT TYPE')
-                new_item.pack = pack_value
-                new_item.qty = qty
-                new_item.line_weight = line_weight
-                new_item.exp_time = safe_get(row, 'EXP TIME')
-                
-                session.add(new_item)
-                total_items += 1
+                total_invoices += 1
+                total_items += invoice_items_added
+                pending_invoices += 1
+                pending_items += invoice_items_added
+                logger.info("Successfully imported invoice %s", invoice_no)
+            except Exception as e:
+                logger.error("Error importing invoice %s: %s", invoice_no, e)
+                logger.error("Error details: %s", traceback.format_exc())
             
-            try:
-                # Commit with smaller batches to reduce potential issues
-                session.flush()
-                session.commit()
-                # Recalculate totals
+            if pending_invoices >= INVOICE_COMMIT_BATCH_SIZE:
                 try:
-                    calculate_invoice_totals(session, invoice_no)
-                    logging.info(f"Successfully imported invoice {invoice_no}")
-                except Exception as calc_error:
-                    logging.error(f"Error calculating totals for invoice {invoice_no}: {str(calc_error)}")
-                    import traceback
-                    logging.error(f"Calculation error details: {traceback.format_exc()}")
-                    # Continue even if totals calculation fails
-            except Exception as e:
-                logging.error(f"Error importing invoice {invoice_no}: {str(e)}")
-                import traceback
-                logging.error(f"Error details: {traceback.format_exc()}")
-                session.rollback()
+                    session.commit()
+                except Exception as e:
+                    # The whole batch is lost; roll back so later invoices
+                    # start on a clean session and stop counting the batch
+                    logger.error("Error committing batch of %s invoices: %s", pending_invoices, e)
+                    session.rollback()
+                    total_invoices -= pending_invoices
+                    total_items -= pending_items
+                pending_invoices = 0
+                pending_items = 0
+        
+        session.commit()
         
         return True, f"Imported {total_invoices} invoices and {total_items} items. Skipped {duplicate_invoices} duplicate invoices and {duplicate_items} duplicate items."
     
     except Exception as e:
-        logging.error(f"Error processing Excel file: {str(e)}")
+        logger.error("Error processing Excel file: %s", e)
         session.rollback()
         return False, str(e)
@@ -3,9 +3,61 @@ Enhanced per-product time tracking for AI analysis and warehouse optimization in
 """
 from datetime import datetime
 from app import db
+from sqlalchemy import and_, case, func, insert, select
+from sqlalchemy.orm import load_only
 from models import ItemTimeTracking, InvoiceItem, User
 from timezone_utils import get_utc_now
 import re
+import threading
+import time
+from functools import lru_cache
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_STANDARD_LOCATION_RE = re.compile(r'(\d{2})-(\d{2})-([A-Z])(\d*)')
+# Prefixed location parts: C01/COR01 -> corridor, S01 -> shelf, L01 -> level,
+# B01/BIN01 -> bin
+_PART_KINDS = {'C': 'corridor', 'S': 'shelf', 'L': 'level', 'B': 'bin_location'}
+_LOCATION_KEYS = ('corridor', 'shelf', 'level', 'bin_location')
+
+# InvoiceItem.exp_time is in minutes, tracking expected_time in seconds
+_SEC_PER_MIN = 60
+
+# Picker head-count changes at human timescales, so it is cached briefly
+# instead of being counted on every pick
+PICKER_COUNT_TTL_SECONDS = 30
+_picker_count_cache = {'value': None, 'ts': 0.0}
+_picker_count_lock = threading.Lock()
+
+
+def _concurrent_picker_count():
+    """Return the number of picker accounts, refreshed at most every TTL seconds"""
+    now = time.monotonic()
+    with _picker_count_lock:
+        if _picker_count_cache['value'] is not None and now - _picker_count_cache['ts'] < PICKER_COUNT_TTL_SECONDS:
+            return _picker_count_cache['value']
+    
+    value = db.session.query(User).filter(User.role == 'picker').count()
+    with _picker_count_lock:
+        _picker_count_cache['value'] = value
+        _picker_count_cache['ts'] = now
+    return value
+
+
+def invalidate_picker_count():
+    """Drop the cached picker count (call after user roles change)"""
+    with _picker_count_lock:
+        _picker_count_cache['value'] = None
+
+
+# InvoiceItem columns copied onto each ItemTimeTracking row
+_TRACKED_ITEM_COLUMNS = (
+    InvoiceItem.location, InvoiceItem.zone, InvoiceItem.qty, InvoiceItem.item_weight,
+    InvoiceItem.item_name, InvoiceItem.unit_type, InvoiceItem.exp_time,
+)
 
 
 def parse_location_components(location):
@@ -13,13 +65,20 @@ def parse_location_components(location):
     Parse location string into components for AI analysis
     Examples: 'A1-C2-S3-L4-B5' or '30-07-C02' or 'ZONE-A-001'
     """
+    return dict(zip(_LOCATION_KEYS, parse_location_components_tuple(location)))
+
+
+@lru_cache(maxsize=4096)
+def parse_location_components_tuple(location):
+    """
+    Cached parse of a location string into
+    (corridor, shelf, level, bin_location)
+    
+    Warehouse locations repeat constantly, so each distinct string is only
+    parsed once per process.
+    """
     if not location:
-        return {
-            'corridor': None,
-            'shelf': None,
-            'level': None,
-            'bin_location': None
-        }
+        return (None, None, None, None)
     
     # Try to extract meaningful components from location
     parts = location.split('-')
@@ -35,24 +94,19 @@ def parse_location_components(location):
     for part in parts:
         part = part.strip().upper()
         
-        # Corridor patterns: C01, C2, COR01
-        if re.match(r'^C\w*\d+$', part):
-            result['corridor'] = part
-        
-        # Shelf patterns: S01, S2, SHELF01
-        elif re.match(r'^S\w*\d+$', part):
-            result['shelf'] = part
-        
-        # Level patterns: L01, L2, LEV01
-        elif re.match(r'^L\w*\d+$', part):
-            result['level'] = part
+        if not part:
+            continue
         
-        # Bin patterns: B01, B2, BIN01
-        elif re.match(r'^B\w*\d+$', part):
-            result['bin_location'] = part
+        # Corridor/shelf/level/bin patterns: C01, SHELF01, L2, BIN01
+        # (prefix letter, word characters, trailing digit) checked with plain
+        # string methods instead of the regex engine
+        kind = _PART_KINDS.get(part[0])
+        if (kind and len(part) > 1 and part[-1].isdecimal()
+                and part[1:].replace('_', '0').isalnum()):
+            result[kind] = part
         
         # Generic numeric patterns (assign based on position)
-        elif re.match(r'^\d+$', part):
+        elif part.isdecimal():
             if not result['corridor']:
                 result['corridor'] = part
             elif not result['shelf']:
@@ -68,7 +122,7 @@ def parse_location_components(location):
     # sure every new row saves the shelf level (used by vw_pick_detail).
     # Note: without this, 'C02' matches the C-prefix corridor pattern above
     # and overwrites the real corridor ('30'), and level is never set.
-    std = re.search(r'(\d{2})-(\d{2})-([A-Z])(\d*)', location.upper())
+    std = _STANDARD_LOCATION_RE.search(location.upper())
     if std:
         result['corridor'] = std.group(1)
         result['shelf'] = std.group(2)
@@ -76,7 +130,7 @@ def parse_location_components(location):
         if std.group(4):
             result['bin_location'] = std.group(4)
     
-    return result
+    return tuple(result[key] for key in _LOCATION_KEYS)
 
 
 def start_item_tracking(invoice_no, item_code, picker_username, previous_location=None,
@@ -98,8 +152,10 @@ def start_item_tracking(invoice_no, item_code, picker_username, previous_locatio
         ItemTimeTracking record
     """
     try:
-        # Get item details from invoice
-        item = db.session.query(InvoiceItem).filter_by(
+        # Get item details from invoice (only the columns copied below)
+        item = db.session.query(InvoiceItem).options(
+            load_only(*_TRACKED_ITEM_COLUMNS)
+        ).filter_by(
             invoice_no=invoice_no,
             item_code=item_code
         ).first()
@@ -107,18 +163,14 @@ def start_item_tracking(invoice_no, item_code, picker_username, previous_locatio
         if not item:
             return None
         
-        # Count concurrent pickers
-        concurrent_pickers = db.session.query(User).filter(
-            User.role == 'picker'
-        ).count()
+        # Count concurrent pickers (cached, see PICKER_COUNT_TTL_SECONDS)
+        concurrent_pickers = _concurrent_picker_count()
         
         # Parse location components
-        location_parts = parse_location_components(item.location)
+        corridor, shelf, level, bin_location = parse_location_components_tuple(item.location)
         
         # Determine start timestamp
-        start_ts = None
-        if start_immediately:
-            start_ts = started_at or get_utc_now()
+        start_ts = (started_at or get_utc_now()) if start_immediately else None
         
         # Create tracking record
         tracking = ItemTimeTracking(
@@ -130,28 +182,29 @@ def start_item_tracking(invoice_no, item_code, picker_username, previous_locatio
             # Item details
             location=item.location,
             zone=item.zone,
-            corridor=location_parts['corridor'],
-            shelf=location_parts['shelf'],
-            level=location_parts['level'],
-            bin_location=location_parts['bin_location'],
+            corridor=corridor,
+            shelf=shelf,
+            level=level,
+            bin_location=bin_location,
             
             # Item characteristics
             quantity_expected=item.qty,
             item_weight=item.item_weight,
             item_name=item.item_name,
             unit_type=item.unit_type,
-            expected_time=item.exp_time * 60 if item.exp_time else 0,  # Convert to seconds
+            expected_time=item.exp_time * _SEC_PER_MIN if item.exp_time else 0,
             
             # Context
             previous_location=previous_location,
             concurrent_pickers=concurrent_pickers
         )
         
-        # Set order sequence (position in picking order)
-        sequence = db.session.query(InvoiceItem).filter(
-            InvoiceItem.invoice_no == invoice_no,
-            InvoiceItem.is_picked == True
-        ).count()
+        # Set order sequence (position in picking order): one past the last
+        # tracked pick on this invoice, an index seek on
+        # (invoice_no, order_sequence) instead of counting invoice items
+        sequence = db.session.query(
+            func.coalesce(func.max(ItemTimeTracking.order_sequence), 0)
+        ).filter(ItemTimeTracking.invoice_no == invoice_no).scalar()
         tracking.order_sequence = sequence + 1
         
         db.session.add(tracking)
@@ -162,13 +215,117 @@ def start_item_tracking(invoice_no, item_code, picker_username, previous_locatio
         
         return tracking
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error starting item tracking: {e}")
+        logger.exception("Error starting item tracking")
         return None
 
 
-def complete_item_tracking(tracking_id, picked_qty, picked_correctly=True, was_skipped=False, skip_reason=None):
+def start_item_tracking_bulk(picks, picker_username, previous_location=None,
+                             start_immediately=True, started_at=None, commit=True, batch_id=None):
+    """
+    Start tracking timing for several item picks at once
+    
+    Loads every invoice item with one query and writes all tracking rows
+    with a single multi-row INSERT, instead of the per-row queries and INSERT
+    of start_item_tracking.
+    
+    Args:
+        picks: Iterable of (invoice_no, item_code) pairs
+        picker_username: Username of picker
+        previous_location: Location of previous pick (for distance calculation)
+        start_immediately: If True, set item_started now. If False, leave it None (set later via arrived endpoint)
+        started_at: Optional specific timestamp to use for item_started
+        commit: If True, commit to DB. If False, just flush (useful for batch operations)
+        batch_id: Optional batch picking session ID (for batch consolidated picks)
+    
+    Returns:
+        List of ItemTimeTracking ids in pick order (picks without an invoice item are skipped)
+    """
+    picks = list(dict.fromkeys((str(inv), str(code)) for inv, code in picks))
+    if not picks:
+        return []
+    
+    try:
+        invoice_numbers = {inv for inv, _ in picks}
+        item_codes = {code for _, code in picks}
+        items = {
+            (item.invoice_no, item.item_code): item
+            for item in db.session.query(InvoiceItem).options(
+                load_only(*_TRACKED_ITEM_COLUMNS)
+            ).filter(
+                InvoiceItem.invoice_no.in_(invoice_numbers),
+                InvoiceItem.item_code.in_(item_codes)
+            )
+        }
+        
+        # Last tracked position per invoice, continued in memory below
+        sequences = dict(
+            db.session.query(
+                ItemTimeTracking.invoice_no,
+                func.max(ItemTimeTracking.order_sequence)
+            ).filter(
+                ItemTimeTracking.invoice_no.in_(invoice_numbers)
+            ).group_by(ItemTimeTracking.invoice_no).all()
+        )
+        
+        concurrent_pickers = _concurrent_picker_count()
+        start_ts = (started_at or get_utc_now()) if start_immediately else None
+        
+        rows = []
+        for key in picks:
+            item = items.get(key)
+            if not item:
+                continue
+            invoice_no, item_code = key
+            corridor, shelf, level, bin_location = parse_location_components_tuple(item.location)
+            sequences[invoice_no] = (sequences.get(invoice_no) or 0) + 1
+            rows.append({
+                'invoice_no': invoice_no,
+                'item_code': item_code,
+                'picker_username': picker_username,
+                'item_started': start_ts,
+                'location': item.location,
+                'zone': item.zone,
+                'corridor': corridor,
+                'shelf': shelf,
+                'level': level,
+                'bin_location': bin_location,
+                'quantity_expected': item.qty,
+                'item_weight': item.item_weight,
+                'item_name': item.item_name,
+                'unit_type': item.unit_type,
+                'expected_time': item.exp_time * _SEC_PER_MIN if item.exp_time else 0,
+                'previous_location': previous_location,
+                'concurrent_pickers': concurrent_pickers,
+                'order_sequence': sequences[invoice_no],
+            })
+        
+        if not rows:
+            return []
+        
+        # One executemany; SQLAlchemy batches it into multi-row
+        # INSERT ... RETURNING statements ("insertmanyvalues") and hands back
+        # the generated ids in parameter order
+        tracking_ids = db.session.scalars(
+            insert(ItemTimeTracking).returning(ItemTimeTracking.id, sort_by_parameter_order=True),
+            rows
+        ).all()
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+        
+        return tracking_ids
+        
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error starting bulk item tracking")
+        return []
+
+
+def complete_item_tracking(tracking_id, picked_qty, picked_correctly=True, was_skipped=False, skip_reason=None,
+                           commit=True):
     """
     Complete timing tracking for an item
     
@@ -178,6 +335,8 @@ def complete_item_tracking(tracking_id, picked_qty, picked_correctly=True, was_s
         picked_correctly: Whether item was picked correctly
         was_skipped: Whether item was skipped
         skip_reason: Reason for skipping if applicable
+        commit: If True, commit to DB. If False, just flush so the caller's
+            commit covers this change together with its own
     """
     try:
         tracking = db.session.query(ItemTimeTracking).filter_by(id=tracking_id).first()
@@ -204,16 +363,20 @@ def complete_item_tracking(tracking_id, picked_qty, picked_correctly=True, was_s
         # Calculate all metrics
         tracking.calculate_metrics()
         
-        db.session.commit()
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
         return True
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error completing item tracking: {e}")
+        logger.exception("Error completing item tracking")
         return False
 
 
-def update_picking_phase_timing(tracking_id, walking_time=None, picking_time=None, confirmation_time=None):
+def update_picking_phase_timing(tracking_id, walking_time=None, picking_time=None, confirmation_time=None,
+                                commit=True):
     """
     Update specific phase timings during the picking process
     
@@ -222,6 +385,8 @@ def update_picking_phase_timing(tracking_id, walking_time=None, picking_time=Non
         walking_time: Time spent walking to location (seconds)
         picking_time: Time spent actually picking (seconds)
         confirmation_time: Time spent on confirmation screen (seconds)
+        commit: If True, commit to DB. If False, just flush so the caller's
+            commit covers this change together with its own
     """
     try:
         tracking = db.session.query(ItemTimeTracking).filter_by(id=tracking_id).first()
@@ -235,15 +400,57 @@ def update_picking_phase_timing(tracking_id, walking_time=None, picking_time=Non
         if confirmation_time is not None:
             tracking.confirmation_time = confirmation_time
         
-        db.session.commit()
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
         return True
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error updating phase timing: {e}")
+        logger.exception("Error updating phase timing")
         return False
 
 
+# Columns read by ItemTimeTracking.ai_dict_from_row
+_AI_COLUMNS = (
+    ItemTimeTracking.item_code, ItemTimeTracking.zone, ItemTimeTracking.corridor,
+    ItemTimeTracking.shelf, ItemTimeTracking.level, ItemTimeTracking.bin_location,
+    ItemTimeTracking.location, ItemTimeTracking.previous_location,
+    ItemTimeTracking.walking_time, ItemTimeTracking.picking_time,
+    ItemTimeTracking.confirmation_time, ItemTimeTracking.total_item_time,
+    ItemTimeTracking.expected_time, ItemTimeTracking.efficiency_ratio,
+    ItemTimeTracking.item_weight, ItemTimeTracking.quantity_expected,
+    ItemTimeTracking.quantity_picked, ItemTimeTracking.unit_type, ItemTimeTracking.item_name,
+    ItemTimeTracking.order_sequence, ItemTimeTracking.time_of_day, ItemTimeTracking.day_of_week,
+    ItemTimeTracking.picker_username, ItemTimeTracking.peak_hours,
+    ItemTimeTracking.concurrent_pickers, ItemTimeTracking.picked_correctly,
+    ItemTimeTracking.was_skipped, ItemTimeTracking.skip_reason,
+)
+
+
+def _ai_data_filters(date_from=None, date_to=None, picker_username=None, zone=None):
+    """WHERE clauses for completed tracking rows matching the AI data filters"""
+    # Only get completed items
+    filters = [ItemTimeTracking.item_completed.isnot(None)]
+    if date_from:
+        filters.append(ItemTimeTracking.created_at >= date_from)
+    if date_to:
+        filters.append(ItemTimeTracking.created_at <= date_to)
+    if picker_username:
+        filters.append(ItemTimeTracking.picker_username == picker_username)
+    if zone:
+        filters.append(ItemTimeTracking.zone == zone)
+    return filters
+
+
+# Columns read by generate_ai_recommendations
+_RECOMMENDATION_COLUMNS = (
+    ItemTimeTracking.zone, ItemTimeTracking.efficiency_ratio, ItemTimeTracking.time_of_day,
+    ItemTimeTracking.was_skipped, ItemTimeTracking.skip_reason,
+)
+
+
 def get_item_tracking_data_for_ai(date_from=None, date_to=None, picker_username=None, zone=None):
     """
     Retrieve item tracking data formatted for AI analysis
@@ -258,35 +465,35 @@ def get_item_tracking_data_for_ai(date_from=None, date_to=None, picker_username=
         List of dictionaries with AI-ready data
     """
     try:
-        query = db.session.query(ItemTimeTracking)
-        
-        # Apply filters
-        if date_from:
-            query = query.filter(ItemTimeTracking.created_at >= date_from)
-        if date_to:
-            query = query.filter(ItemTimeTracking.created_at <= date_to)
-        if picker_username:
-            query = query.filter(ItemTimeTracking.picker_username == picker_username)
-        if zone:
-            query = query.filter(ItemTimeTracking.zone == zone)
+        return list(iter_item_tracking_data_for_ai(date_from, date_to, picker_username, zone))
         
-        # Only get completed items
-        query = query.filter(ItemTimeTracking.item_completed.isnot(None))
-        
-        items = query.all()
-        
-        # Convert to AI-ready format
-        ai_data = []
-        for item in items:
-            ai_data.append(item.to_ai_dict())
-        
-        return ai_data
-        
-    except Exception as e:
-        print(f"Error retrieving AI data: {e}")
+    except Exception:
+        logger.exception("Error retrieving AI data")
         return []
 
 
+def iter_item_tracking_data_for_ai(date_from=None, date_to=None, picker_username=None, zone=None,
+                                   chunk_size=1000):
+    """
+    Stream item tracking data formatted for AI analysis
+    
+    Same filters and output as get_item_tracking_data_for_ai, but rows are
+    fetched from a server-side cursor in chunks of chunk_size and yielded one
+    dict at a time, so large exports never sit in memory at once.
+    
+    Yields:
+        Dictionaries with AI-ready data
+    """
+    # Fetch only the columns the AI dict uses as plain rows instead of
+    # hydrating full ORM objects into the identity map
+    stmt = select(*_AI_COLUMNS).where(
+        *_ai_data_filters(date_from, date_to, picker_username, zone)
+    ).execution_options(yield_per=chunk_size)
+    
+    for row in db.session.execute(stmt):
+        yield ItemTimeTracking.ai_dict_from_row(row)
+
+
 def get_performance_insights(picker_username=None, days=30):
     """
     Generate performance insights from tracking data
@@ -305,57 +512,62 @@ def get_performance_insights(picker_username=None, days=30):
         end_date = get_utc_now()
         start_date = end_date - timedelta(days=days)
         
-        query = db.session.query(ItemTimeTracking).filter(
-            ItemTimeTracking.created_at >= start_date,
-            ItemTimeTracking.item_completed.isnot(None)
-        )
-        
-        if picker_username:
-            query = query.filter(ItemTimeTracking.picker_username == picker_username)
+        filters = _ai_data_filters(date_from=start_date, picker_username=picker_username)
         
-        items = query.all()
+        # Aggregate in the database and only bring back one row per group
+        total_items, total_time, efficient_count = db.session.query(
+            func.count(ItemTimeTracking.id),
+            func.coalesce(func.sum(ItemTimeTracking.total_item_time), 0),
+            func.coalesce(func.sum(case(
+                (and_(ItemTimeTracking.efficiency_ratio > 0,
+                      ItemTimeTracking.efficiency_ratio <= 1.0), 1),
+                else_=0
+            )), 0)
+        ).filter(*filters).one()
         
-        if not items:
+        if not total_items:
             return {"message": "No data available for analysis"}
         
         # Calculate insights
-        total_items = len(items)
-        total_time = sum(item.total_item_time for item in items)
-        avg_time_per_item = total_time / total_items if total_items > 0 else 0
+        avg_time_per_item = total_time / total_items
         
         # Efficiency analysis
-        efficient_items = [item for item in items if item.efficiency_ratio <= 1.0 and item.efficiency_ratio > 0]
-        efficiency_rate = len(efficient_items) / total_items * 100 if total_items > 0 else 0
+        efficiency_rate = efficient_count / total_items * 100
         
         # Zone performance
         zone_performance = {}
-        for item in items:
-            if item.zone:
-                if item.zone not in zone_performance:
-                    zone_performance[item.zone] = {
-                        'count': 0,
-                        'total_time': 0,
-                        'avg_efficiency': 0
-                    }
-                zone_performance[item.zone]['count'] += 1
-                zone_performance[item.zone]['total_time'] += item.total_item_time
-        
-        # Calculate zone averages
-        for zone in zone_performance:
-            zone_data = zone_performance[zone]
-            zone_data['avg_time'] = zone_data['total_time'] / zone_data['count']
+        zone_rows = db.session.query(
+            ItemTimeTracking.zone,
+            func.count(ItemTimeTracking.id),
+            func.coalesce(func.sum(ItemTimeTracking.total_item_time), 0)
+        ).filter(
+            *filters, ItemTimeTracking.zone.isnot(None), ItemTimeTracking.zone != ''
+        ).group_by(ItemTimeTracking.zone)
+        for zone, count, zone_time in zone_rows:
+            zone_performance[zone] = {
+                'count': count,
+                'total_time': zone_time,
+                'avg_efficiency': 0,
+                'avg_time': zone_time / count
+            }
         
         # Time of day performance
-        time_performance = {'morning': [], 'afternoon': [], 'evening': []}
-        for item in items:
-            if item.time_of_day:
-                time_performance[item.time_of_day].append(item.efficiency_ratio)
-        
-        for period in time_performance:
-            if time_performance[period]:
-                time_performance[period] = sum(time_performance[period]) / len(time_performance[period])
-            else:
-                time_performance[period] = 0
+        time_performance = {'morning': 0, 'afternoon': 0, 'evening': 0}
+        time_rows = db.session.query(
+            ItemTimeTracking.time_of_day,
+            func.avg(ItemTimeTracking.efficiency_ratio)
+        ).filter(
+            *filters, ItemTimeTracking.time_of_day.in_(list(time_performance))
+        ).group_by(ItemTimeTracking.time_of_day)
+        for period, avg_efficiency in time_rows:
+            time_performance[period] = avg_efficiency or 0
+        
+        # Recommendations only need a handful of columns per item, loaded
+        # straight into a DataFrame
+        items = pd.read_sql(
+            select(*_RECOMMENDATION_COLUMNS).where(*filters),
+            db.session.connection()
+        )
         
         return {
             'summary': {
@@ -371,43 +583,46 @@ def get_performance_insights(picker_username=None, days=30):
         }
         
     except Exception as e:
-        print(f"Error generating insights: {e}")
+        logger.exception("Error generating insights")
         return {"error": f"Failed to generate insights: {e}"}
 
 
 def generate_ai_recommendations(items):
     """
     Generate AI-style recommendations based on tracking data
+    
+    Args:
+        items: DataFrame with the _RECOMMENDATION_COLUMNS columns, or an
+            iterable of objects/rows exposing them as attributes
     """
     recommendations = []
     
-    if not items:
+    if not isinstance(items, pd.DataFrame):
+        items = pd.DataFrame(
+            [tuple(getattr(item, column.key) for column in _RECOMMENDATION_COLUMNS) for item in items],
+            columns=[column.key for column in _RECOMMENDATION_COLUMNS]
+        )
+    
+    if items.empty:
         return recommendations
     
-    # Analyze slow items
-    slow_items = [item for item in items if item.efficiency_ratio > 1.5]
-    if slow_items:
-        slow_zones = {}
-        for item in slow_items:
-            if item.zone:
-                slow_zones[item.zone] = slow_zones.get(item.zone, 0) + 1
-        
-        if slow_zones:
-            worst_zone = max(slow_zones, key=slow_zones.get)
-            recommendations.append({
-                'type': 'zone_optimization',
-                'priority': 'high',
-                'message': f"Zone {worst_zone} shows {slow_zones[worst_zone]} slow picks. Consider reorganizing layout or providing additional training.",
-                'data': slow_zones
-            })
+    # Analyze slow items (groupby keeps first-seen zone order for ties)
+    slow = items[(items['efficiency_ratio'] > 1.5) & items['zone'].notna() & (items['zone'] != '')]
+    if not slow.empty:
+        slow_zones = {zone: int(count) for zone, count in slow.groupby('zone', sort=False).size().items()}
+        worst_zone = max(slow_zones, key=slow_zones.get)
+        recommendations.append({
+            'type': 'zone_optimization',
+            'priority': 'high',
+            'message': f"Zone {worst_zone} shows {slow_zones[worst_zone]} slow picks. Consider reorganizing layout or providing additional training.",
+            'data': slow_zones
+        })
     
     # Analyze time of day patterns
-    morning_items = [item for item in items if item.time_of_day == 'morning']
-    afternoon_items = [item for item in items if item.time_of_day == 'afternoon']
-    
-    if morning_items and afternoon_items:
-        morning_avg = sum(item.efficiency_ratio for item in morning_items) / len(morning_items)
-        afternoon_avg = sum(item.efficiency_ratio for item in afternoon_items) / len(afternoon_items)
+    period_efficiency = items.groupby('time_of_day')['efficiency_ratio'].mean()
+    if 'morning' in period_efficiency and 'afternoon' in period_efficiency:
+        morning_avg = float(period_efficiency['morning'])
+        afternoon_avg = float(period_efficiency['afternoon'])
         
         if morning_avg < afternoon_avg * 0.8:
             recommendations.append({
@@ -418,20 +633,18 @@ def generate_ai_recommendations(items):
             })
     
     # Analyze frequent skips
-    skipped_items = [item for item in items if item.was_skipped]
-    if len(skipped_items) > len(items) * 0.1:  # More than 10% skipped
-        skip_reasons = {}
-        for item in skipped_items:
-            if item.skip_reason:
-                skip_reasons[item.skip_reason] = skip_reasons.get(item.skip_reason, 0) + 1
-        
-        if skip_reasons:
+    skipped = items[items['was_skipped'].fillna(False).astype(bool)]
+    if len(skipped) > len(items) * 0.1:  # More than 10% skipped
+        reasons = skipped['skip_reason']
+        reasons = reasons[reasons.notna() & (reasons != '')]
+        if not reasons.empty:
+            skip_reasons = {reason: int(count) for reason, count in reasons.groupby(reasons, sort=False).size().items()}
             main_reason = max(skip_reasons, key=skip_reasons.get)
             recommendations.append({
                 'type': 'quality_improvement',
                 'priority': 'high',
-                'message': f"High skip rate ({len(skipped_items)} items). Main reason: {main_reason}. Consider inventory audit or layout review.",
+                'message': f"High skip rate ({len(skipped)} items). Main reason: {main_reason}. Consider inventory audit or layout review.",
                 'data': skip_reasons
             })
     
-    return recommendations
\ No newline at end of file
+    return recommendations
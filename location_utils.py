@@ -3,11 +3,34 @@ Location validation utilities for shift check-in/check-out
 """
 from math import radians, cos, sin, asin, sqrt
 
+import numpy as np
+
 # Reference location (warehouse/facility)
 REFERENCE_LATITUDE = 35.0470
 REFERENCE_LONGITUDE = 33.3926
 ALLOWED_RADIUS_METERS = 200
 
+EARTH_RADIUS_METERS = 6371000
+
+# The reference point never changes, so its trig terms are computed once
+_REF_LAT_RAD = radians(REFERENCE_LATITUDE)
+_REF_LON_RAD = radians(REFERENCE_LONGITUDE)
+_REF_COS_LAT = cos(_REF_LAT_RAD)
+
+# Equirectangular projection around the facility: metres per degree of
+# latitude/longitude. Near the facility this matches the haversine result
+# to within a few millimetres at the 200m check-in radius.
+_M_PER_DEG_LAT = radians(1) * EARTH_RADIUS_METERS
+_M_PER_DEG_LON = _M_PER_DEG_LAT * _REF_COS_LAT
+# Beyond this the flat approximation drifts, so fall back to haversine.
+# validate_location(s) reject such points with the bounding box first, so
+# this only matters for callers of facility_distance that skip that check.
+_FLAT_DISTANCE_LIMIT_METERS = 1_000
+
+# Bounding box around the check-in circle (in degrees) for a cheap early reject
+_LAT_EPS = ALLOWED_RADIUS_METERS / _M_PER_DEG_LAT
+_LON_EPS = ALLOWED_RADIUS_METERS / _M_PER_DEG_LON
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """
     Calculate the great circle distance between two points 
@@ -24,13 +47,101 @@ def calculate_distance(lat1, lon1, lat2, lon2):
         dlat = lat2 - lat1
         a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
         c = 2 * asin(sqrt(a))
-        r = 6371000  # Radius of earth in meters
+        r = EARTH_RADIUS_METERS
         
         distance = c * r
         return distance
     except Exception as e:
         raise ValueError(f"Invalid coordinates: {str(e)}")
 
+def haversine_batch(lats, lons, ref_lat=REFERENCE_LATITUDE, ref_lon=REFERENCE_LONGITUDE):
+    """
+    Vectorised calculate_distance from one reference point to many points
+    
+    Args:
+        lats, lons: Sequences (or arrays) of decimal-degree coordinates
+        ref_lat, ref_lon: Reference point, the facility by default
+        
+    Returns numpy array of distances in meters
+    """
+    lat2 = np.radians(np.asarray(lats, dtype=float))
+    lon2 = np.radians(np.asarray(lons, dtype=float))
+    if ref_lat == REFERENCE_LATITUDE and ref_lon == REFERENCE_LONGITUDE:
+        lat1, lon1, cos_lat1 = _REF_LAT_RAD, _REF_LON_RAD, _REF_COS_LAT
+    else:
+        lat1, lon1 = radians(ref_lat), radians(ref_lon)
+        cos_lat1 = cos(lat1)
+    
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + cos_lat1 * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_METERS * 2 * np.arcsin(np.sqrt(a))
+
+def facility_distance(lat, lon):
+    """
+    Distance in meters from the facility, without trig for nearby points
+    """
+    dy = (lat - REFERENCE_LATITUDE) * _M_PER_DEG_LAT
+    dx = (lon - REFERENCE_LONGITUDE) * _M_PER_DEG_LON
+    distance = sqrt(dx * dx + dy * dy)
+    if distance > _FLAT_DISTANCE_LIMIT_METERS:
+        return calculate_distance(REFERENCE_LATITUDE, REFERENCE_LONGITUDE, lat, lon)
+    return distance
+
+def _parse_coordinates(coordinates_str):
+    """
+    Parse "latitude,longitude" into floats
+    
+    Returns (lat, lon) or an invalid-result dict
+    """
+    if not coordinates_str:
+        return {
+            'valid': False,
+            'distance': None,
+            'message': 'Location data not captured. Please enable location services and try again.'
+        }
+    
+    # partition() returns a fixed 3-tuple, no list allocation
+    lat_str, sep, lon_str = coordinates_str.partition(',')
+    if not sep or ',' in lon_str:
+        return {
+            'valid': False,
+            'distance': None,
+            'message': 'Invalid location format.'
+        }
+    
+    try:
+        return float(lat_str), float(lon_str)
+    except ValueError as e:
+        return {
+            'valid': False,
+            'distance': None,
+            'message': f'Error validating location: {str(e)}'
+        }
+
+def _outside_facility_box(lat, lon):
+    return abs(lat - REFERENCE_LATITUDE) > _LAT_EPS or abs(lon - REFERENCE_LONGITUDE) > _LON_EPS
+
+def _outside_area_result():
+    return {
+        'valid': False,
+        'distance': None,
+        'message': f'You are outside the facility area. You must be within {ALLOWED_RADIUS_METERS}m to check in/out.'
+    }
+
+def _distance_result(distance):
+    if distance <= ALLOWED_RADIUS_METERS:
+        return {
+            'valid': True,
+            'distance': distance,
+            'message': f'Location verified ({distance:.1f}m from facility)'
+        }
+    return {
+        'valid': False,
+        'distance': distance,
+        'message': f'You are {distance:.1f}m from the facility. You must be within {ALLOWED_RADIUS_METERS}m to check in/out.'
+    }
+
 def validate_location(coordinates_str):
     """
     Validate if the given coordinates are within allowed radius
@@ -41,39 +152,18 @@ def validate_location(coordinates_str):
     Returns:
         dict with 'valid': bool, 'distance': float (meters), 'message': str
     """
+    parsed = _parse_coordinates(coordinates_str)
+    if isinstance(parsed, dict):
+        return parsed
+    
     try:
-        if not coordinates_str:
-            return {
-                'valid': False,
-                'distance': None,
-                'message': 'Location data not captured. Please enable location services and try again.'
-            }
-        
-        parts = coordinates_str.split(',')
-        if len(parts) != 2:
-            return {
-                'valid': False,
-                'distance': None,
-                'message': 'Invalid location format.'
-            }
-        
-        picker_lat = float(parts[0])
-        picker_lon = float(parts[1])
+        picker_lat, picker_lon = parsed
+        # Anything outside the bounding box cannot be within the radius
+        if _outside_facility_box(picker_lat, picker_lon):
+            return _outside_area_result()
         
-        distance = calculate_distance(REFERENCE_LATITUDE, REFERENCE_LONGITUDE, picker_lat, picker_lon)
-        
-        if distance <= ALLOWED_RADIUS_METERS:
-            return {
-                'valid': True,
-                'distance': distance,
-                'message': f'Location verified ({distance:.1f}m from facility)'
-            }
-        else:
-            return {
-                'valid': False,
-                'distance': distance,
-                'message': f'You are {distance:.1f}m from the facility. You must be within {ALLOWED_RADIUS_METERS}m to check in/out.'
-            }
+        distance = facility_distance(picker_lat, picker_lon)
+        return _distance_result(distance)
     
     except ValueError as e:
         return {
@@ -81,3 +171,28 @@ def validate_location(coordinates_str):
             'distance': None,
             'message': f'Error validating location: {str(e)}'
         }
+
+def validate_locations(coordinates_list):
+    """
+    Validate many "latitude,longitude" strings at once (e.g. shift audits)
+    
+    Entries outside the facility bounding box are rejected up front; distances
+    for the rest are computed in one numpy pass.
+    
+    Returns:
+        List of dicts in the same format as validate_location, in input order
+    """
+    results = [_parse_coordinates(coordinates_str) for coordinates_str in coordinates_list]
+    positions = []
+    for i, parsed in enumerate(results):
+        if isinstance(parsed, dict):
+            continue
+        if _outside_facility_box(*parsed):
+            results[i] = _outside_area_result()
+        else:
+            positions.append(i)
+    if positions:
+        lats, lons = zip(*(results[i] for i in positions))
+        for i, distance in zip(positions, haversine_batch(lats, lons).tolist()):
+            results[i] = _distance_result(distance)
+    return results
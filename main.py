@@ -7,6 +7,10 @@ time.tzset()   # Required on POSIX: activates the TZ change for the C library,
                # though os.environ['TZ'] is set.
 import logging
 logging.basicConfig(level=logging.INFO)
+# Routine "X completed / ensured" startup chatter; PHASE markers and errors
+# still go through the root logger. Set STARTUP_VERBOSE=1 to see it.
+startup_logger = logging.getLogger('startup')
+startup_logger.setLevel(logging.INFO if os.getenv('STARTUP_VERBOSE') else logging.WARNING)
 logging.warning("PHASE 1: top of main.py")
 print("PHASE 1: top of main.py", flush=True)
 
@@ -55,9 +59,9 @@ if _db_available and not is_production:
     # production environment variables, publish once, then remove the flag.
     try:
         from update_forecast_ordering_schema import update_forecast_ordering_schema
-        logging.warning("Running forecast ordering schema updater...")
+        startup_logger.info("Running forecast ordering schema updater...")
         update_forecast_ordering_schema()
-        logging.warning("Forecast ordering schema updater completed")
+        startup_logger.info("Forecast ordering schema updater completed")
         print("Forecast ordering schema updater completed", flush=True)
     except Exception:
         logging.exception("Forecast ordering schema updater failed (non-fatal)")
@@ -71,36 +75,36 @@ if _db_available and not is_production:
     try:
         from update_forecast_profile_baseline_source_schema import update_forecast_profile_baseline_source_schema
         update_forecast_profile_baseline_source_schema()
-        logging.warning("Forecast profile schema updater completed")
+        startup_logger.info("Forecast profile schema updater completed")
         print("Forecast profile schema updater completed", flush=True)
     except Exception:
         logging.exception("Forecast profile baseline_source schema updater FAILED")
         raise
 
-    with app.app_context():
-        with db.engine.connect() as conn:
-            _vrows = conn.execute(_sa_text("""
-                SELECT column_name, character_maximum_length
-                FROM information_schema.columns
-                WHERE table_name = 'sku_forecast_profile'
-                  AND column_name IN (
-                    'forecast_method',
-                    'seasonality_source',
-                    'seed_source',
-                    'analogue_level',
-                    'baseline_source'
-                  )
-            """)).fetchall()
-            _vlengths = {r[0]: r[1] for r in _vrows}
-            for _vcol in ['forecast_method','seasonality_source','seed_source','analogue_level','baseline_source']:
-                if (_vlengths.get(_vcol) or 0) < 128:
-                    raise RuntimeError(f"Forecast profile column {_vcol} is too small: {_vlengths.get(_vcol)}")
-    logging.warning("Forecast profile schema validation passed")
-    print("Forecast profile schema validation passed", flush=True)
-
-    try:
-        with app.app_context():
-            with db.engine.connect() as conn:
+    # One app context and connection for both the validation and the
+    # (verbose-only) verification queries.
+    with app.app_context(), db.engine.connect() as conn:
+        _vrows = conn.execute(_sa_text("""
+            SELECT column_name, character_maximum_length
+            FROM information_schema.columns
+            WHERE table_name = 'sku_forecast_profile'
+              AND column_name IN (
+                'forecast_method',
+                'seasonality_source',
+                'seed_source',
+                'analogue_level',
+                'baseline_source'
+              )
+        """)).fetchall()
+        _vlengths = {r[0]: r[1] for r in _vrows}
+        for _vcol in ['forecast_method','seasonality_source','seed_source','analogue_level','baseline_source']:
+            if (_vlengths.get(_vcol) or 0) < 128:
+                raise RuntimeError(f"Forecast profile column {_vcol} is too small: {_vlengths.get(_vcol)}")
+        startup_logger.info("Forecast profile schema validation passed")
+        print("Forecast profile schema validation passed", flush=True)
+
+        if startup_logger.isEnabledFor(logging.INFO):
+            try:
                 cols = conn.execute(_sa_text("""
                     SELECT column_name
                     FROM information_schema.columns
@@ -113,15 +117,15 @@ if _db_available and not is_production:
                       )
                     ORDER BY column_name
                 """)).fetchall()
-                logging.warning(f"sku_forecast_profile forecast columns found: {[r[0] for r in cols]}")
+                startup_logger.info(f"sku_forecast_profile forecast columns found: {[r[0] for r in cols]}")
                 tbl = conn.execute(_sa_text("""
                     SELECT table_name
                     FROM information_schema.tables
                     WHERE table_name = 'sku_ordering_snapshot'
                 """)).fetchall()
-                logging.warning(f"sku_ordering_snapshot table found: {bool(tbl)}")
-    except Exception:
-        logging.exception("Schema verification failed (non-fatal)")
+                startup_logger.info(f"sku_ordering_snapshot table found: {bool(tbl)}")
+            except Exception:
+                logging.exception("Schema verification failed (non-fatal)")
 
     logging.warning("PHASE 4: schema updater and verification done")
     print("PHASE 4: schema updater and verification done", flush=True)
@@ -167,15 +171,22 @@ DEFAULT_ALLOW_CHEQUE = os.getenv("DEFAULT_ALLOW_CHEQUE", "false").lower() in ("1
 DEFAULT_CHEQUE_DAYS_ALLOWED = os.getenv("DEFAULT_CHEQUE_DAYS_ALLOWED")
 DEFAULT_CREDIT_LIMIT = os.getenv("DEFAULT_CREDIT_LIMIT")
 import routes  # noqa: F401
-import routes_ai_analysis  # noqa: F401
+# Optional AI analysis pages (/ai_analysis_dashboard, /ai_insights/...).
+# ENABLE_AI_ANALYSIS=0 leaves their routes unregistered; default is on.
+if os.getenv("ENABLE_AI_ANALYSIS", "1") == "1":
+    import routes_ai_analysis  # noqa: F401
 import routes_operations  # noqa: F401
 import routes_daily_reports  # noqa: F401
 import routes_oi  # noqa: F401
 import pytz
 from timezone_utils import get_utc_now
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 import flask_login
 
+# Resolved once; the template filters below run for every rendered timestamp
+ATHENS_TZ = pytz.timezone('Europe/Athens')
+
 app.config.update({
     'DEBUG': not is_production,
     'SESSION_COOKIE_HTTPONLY': True,
@@ -184,21 +195,29 @@ app.config.update({
     'JSONIFY_PRETTYPRINT_REGULAR': False,
 })
 
+@lru_cache(maxsize=8192)
+def _athens_utc_offset(year, month, day, hour):
+    # EU DST switches on the hour (01:00 UTC), so the offset is constant
+    # within any UTC hour and the cache never straddles a transition.
+    return datetime(year, month, day, hour, tzinfo=timezone.utc).astimezone(ATHENS_TZ).utcoffset()
+
+
 @app.template_filter('local_time')
 def local_time_filter(dt, format_str='%d/%m/%y %H:%M'):
     if dt is None:
         return 'N/A'
-    athens_tz = pytz.timezone('Europe/Athens')
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
-    athens_dt = dt.astimezone(athens_tz)
-    return athens_dt.strftime(format_str)
+    if '%Z' in format_str or '%z' in format_str:
+        return dt.astimezone(ATHENS_TZ).strftime(format_str)
+    utc_dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    offset = _athens_utc_offset(utc_dt.year, utc_dt.month, utc_dt.day, utc_dt.hour)
+    return (utc_dt + offset).strftime(format_str)
 
 @app.template_filter('current_athens_time')
 def current_athens_time_filter(placeholder, format_str='%d/%m/%y %H:%M:%S'):
-    athens_tz = pytz.timezone('Europe/Athens')
     utc_now = get_utc_now()
-    athens_now = utc_now.astimezone(athens_tz)
+    athens_now = utc_now.astimezone(ATHENS_TZ)
     return athens_now.strftime(format_str)
 
 @app.template_filter('display_name')
@@ -227,16 +246,23 @@ def display_name_filter(username):
     return resolved
 
 
+from markupsafe import Markup
+from order_status_constants import ORDER_STATUSES, get_status_badge_class
+
+# Statuses are a fixed set, so every badge is rendered once at import time.
+_STATUS_BADGES = {
+    value: Markup(
+        f'<span class="badge {get_status_badge_class(value)}">'
+        f'<i class="{info["icon"]} me-1"></i>{info["label"]}</span>'
+    )
+    for value, info in ORDER_STATUSES.items()
+}
+_UNKNOWN_STATUS_BADGE = Markup('<span class="badge bg-secondary">Unknown Status</span>')
+
+
 @app.template_filter('status_badge')
 def status_badge_filter(status_value):
-    from order_status_constants import get_status_info, get_status_badge_class, get_status_icon
-    status_info = get_status_info(status_value)
-    if not status_info:
-        return f'<span class="badge bg-secondary">Unknown Status</span>'
-    badge_class = get_status_badge_class(status_value)
-    icon = get_status_icon(status_value)
-    label = status_info['label']
-    return f'<span class="badge {badge_class}"><i class="{icon} me-1"></i>{label}</span>'
+    return _STATUS_BADGES.get(status_value, _UNKNOWN_STATUS_BADGE)
 
 import json as _json
 app.jinja_env.filters['from_json'] = lambda s: _json.loads(s) if s else []
@@ -330,7 +356,7 @@ try:
     from routes_admin_tools import bp as admin_tools_bp
     app.register_blueprint(admin_tools_bp)
 except ValueError:
-    logging.info("Admin Tools blueprint already registered")
+    startup_logger.info("Admin Tools blueprint already registered")
 
 from routes_reconciliation import reconciliation_bp
 app.register_blueprint(reconciliation_bp)
@@ -374,7 +400,7 @@ _register_cooler_helpers(app)
 try:
     from blueprints.supplier_returns import supplier_returns_bp
     app.register_blueprint(supplier_returns_bp)
-    logging.info("supplier_returns blueprint registered")
+    startup_logger.info("supplier_returns blueprint registered")
 except Exception as e:
     logging.warning(f"supplier_returns blueprint not registered: {e}")
 
@@ -445,7 +471,7 @@ try:
         except Exception:
             return {"cockpit_enabled": False}
 
-    logging.info("Cockpit blueprint registered (master flag controls visibility)")
+    startup_logger.info("Cockpit blueprint registered (master flag controls visibility)")
 except Exception as e:
     logging.warning(f"Cockpit blueprint not registered: {e}")
 
@@ -465,68 +491,147 @@ logging.warning("PHASE 5: all blueprints registered")
 print("PHASE 5: all blueprints registered", flush=True)
 
 import datetime as dt
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 
-def _default_terms_values_for(code: str):
-    credit_limit_val = None
-    if DEFAULT_CREDIT_LIMIT not in (None, "", "None"):
-        try:
-            credit_limit_val = Decimal(DEFAULT_CREDIT_LIMIT)
-        except:
-            credit_limit_val = None
+def _parse_env_number(raw, cast):
+    if raw in (None, "", "None"):
+        return None
+    try:
+        return cast(raw)
+    except (InvalidOperation, ValueError):
+        return None
+
+# Env-derived defaults are fixed for the process, so parse them once.
+_DEFAULT_TERMS_BASE = {
+    "terms_code": DEFAULT_TERMS_CODE,
+    "due_days": DEFAULT_DUE_DAYS,
+    "is_credit": DEFAULT_IS_CREDIT,
+    "credit_limit": _parse_env_number(DEFAULT_CREDIT_LIMIT, Decimal),
+    "allow_cash": DEFAULT_ALLOW_CASH,
+    "allow_card_pos": DEFAULT_ALLOW_CARD_POS,
+    "allow_bank_transfer": DEFAULT_ALLOW_BANK_TRANSFER,
+    "allow_cheque": DEFAULT_ALLOW_CHEQUE,
+    "cheque_days_allowed": _parse_env_number(DEFAULT_CHEQUE_DAYS_ALLOWED, int),
+    "notes_for_driver": None,
+}
 
-    cheque_days_val = None
-    if DEFAULT_CHEQUE_DAYS_ALLOWED not in (None, "", "None"):
-        try:
-            cheque_days_val = int(DEFAULT_CHEQUE_DAYS_ALLOWED)
-        except:
-            cheque_days_val = None
-
-    return {
-        "customer_code": code,
-        "terms_code": DEFAULT_TERMS_CODE,
-        "due_days": DEFAULT_DUE_DAYS,
-        "is_credit": DEFAULT_IS_CREDIT,
-        "credit_limit": credit_limit_val,
-        "allow_cash": DEFAULT_ALLOW_CASH,
-        "allow_card_pos": DEFAULT_ALLOW_CARD_POS,
-        "allow_bank_transfer": DEFAULT_ALLOW_BANK_TRANSFER,
-        "allow_cheque": DEFAULT_ALLOW_CHEQUE,
-        "cheque_days_allowed": cheque_days_val,
-        "valid_from": dt.date.today(),
-        "notes_for_driver": None,
-    }
+def _default_terms_values_for(code: str):
+    return {**_DEFAULT_TERMS_BASE, "customer_code": code, "valid_from": dt.date.today()}
 
 from sqlalchemy import event
 from sqlalchemy.sql import text
 from models import PaymentCustomer, CreditTerms
 
-@event.listens_for(PaymentCustomer, "after_insert")
-def _create_default_terms_after_customer_insert(mapper, connection, target: PaymentCustomer):
-    import threading
-    skip_auto_create = getattr(threading.current_thread(), 'skip_auto_payment_terms', False)
-
-    if skip_auto_create:
+_DEFAULT_TERMS_COLUMNS = """
+    customer_code, terms_code, due_days, is_credit,
+    credit_limit, allow_cash, allow_card_pos, allow_bank_transfer, allow_cheque,
+    cheque_days_allowed, notes_for_driver, valid_from, valid_to
+"""
+_DEFAULT_TERMS_VALUES = """
+    :terms_code, :due_days, :is_credit,
+    :credit_limit, :allow_cash, :allow_card_pos, :allow_bank_transfer, :allow_cheque,
+    :cheque_days_allowed, :notes_for_driver, :valid_from, NULL
+"""
+
+# Postgres: one statement for every customer inserted by the flush.
+_BULK_DEFAULT_TERMS_SQL = text(f"""
+    INSERT INTO credit_terms ({_DEFAULT_TERMS_COLUMNS})
+    SELECT t.code, {_DEFAULT_TERMS_VALUES}
+    FROM unnest(CAST(:codes AS TEXT[])) AS t(code)
+    WHERE NOT EXISTS (
+        SELECT 1 FROM credit_terms
+        WHERE customer_code = t.code AND valid_to IS NULL
+    )
+""")
+
+# Other dialects (SQLite in tests): same statement, executemany per code.
+_DEFAULT_TERMS_SQL = text(f"""
+    INSERT INTO credit_terms ({_DEFAULT_TERMS_COLUMNS})
+    SELECT :customer_code, {_DEFAULT_TERMS_VALUES}
+    WHERE NOT EXISTS (
+        SELECT 1 FROM credit_terms
+        WHERE customer_code = :customer_code AND valid_to IS NULL
+    )
+""")
+
+
+@event.listens_for(db.session, "after_flush")
+def _create_default_terms_for_new_customers(session, flush_context):
+    """Give every PaymentCustomer inserted by this flush its default open
+    credit terms, with one statement per flush rather than one per row."""
+    codes = [obj.code for obj in session.new if isinstance(obj, PaymentCustomer)]
+    if not codes:
         return
 
-    sql = text("""
-        INSERT INTO credit_terms (
-            customer_code, terms_code, due_days, is_credit,
-            credit_limit, allow_cash, allow_card_pos, allow_bank_transfer, allow_cheque,
-            cheque_days_allowed, notes_for_driver, valid_from, valid_to
-        )
-        SELECT
-            :customer_code, :terms_code, :due_days, :is_credit,
-            :credit_limit, :allow_cash, :allow_card_pos, :allow_bank_transfer, :allow_cheque,
-            :cheque_days_allowed, :notes_for_driver, :valid_from, NULL
-        WHERE NOT EXISTS (
-            SELECT 1 FROM credit_terms
-            WHERE customer_code = :customer_code AND valid_to IS NULL
+    params = {**_DEFAULT_TERMS_BASE, "valid_from": dt.date.today()}
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        connection.execute(_BULK_DEFAULT_TERMS_SQL, dict(params, codes=codes))
+    else:
+        connection.execute(
+            _DEFAULT_TERMS_SQL,
+            [dict(params, customer_code=code) for code in codes],
         )
-    """)
-    params = _default_terms_values_for(target.code)
-    params["customer_code"] = target.code
-    connection.execute(sql, params)
+
+# Updaters below touch (ALTER, or add foreign keys to) the shared
+# invoices/users/shipments/route_stop/cod_receipts tables. Running them in
+# different threads lets an FK creation wait on another thread's ALTER, so
+# they always run one after another, in this order.
+_SHARED_TABLE_SCHEMA_UPDATERS = [
+    ("item tracking", "update_item_tracking_schema", "update_item_tracking_schema"),
+    ("invoice status timestamp", "update_invoice_status_timestamp", "add_status_timestamp_column"),
+    ("RouteStop", "update_route_stop_schema", "update_route_stop_schema"),
+    ("Shipment settlement", "update_shipment_settlement_schema", "update_shipment_settlement_schema"),
+    ("warehouse intake", "update_warehouse_intake_schema", "update_warehouse_intake_schema"),
+    ("COD receipts locking", "update_cod_receipts_locking_schema", "update_cod_receipts_locking_schema"),
+    ("payment entries", "update_payment_entries_schema", "update_payment_entries_schema"),
+]
+
+# Updaters below each create/alter only their own tables and reference none
+# that another updater in this list alters, so they can run concurrently.
+# Updaters that share tables (ps_items_dw, sku_forecast_profile,
+# route_return_handover, batch_picking_sessions, and the list above) stay
+# sequential.
+_INDEPENDENT_SCHEMA_UPDATERS = [
+    ("WmsPackingProfile", "update_packing_profile_schema", "update_packing_profile_schema"),
+    ("bank transactions", "update_bank_transactions_schema", "update_bank_transactions_schema"),
+    ("forecast runs", "update_forecast_runs_schema", "update_forecast_runs_schema"),
+    ("Magento login log", "update_magento_login_log_schema", "update_magento_login_log_schema"),
+    ("Magento last login current", "update_magento_last_login_current_schema", "update_magento_last_login_current_schema"),
+    ("CRM offer", "update_crm_offer_schema", "ensure_crm_offer_schema"),
+    ("supplier_return_po_tracking", "update_supplier_return_po_tracking_schema", "update_supplier_return_po_tracking_schema"),
+    ("supplier_returns_stock_cache", "update_supplier_returns_stock_cache_schema", "update_supplier_returns_stock_cache_schema"),
+]
+
+
+def _run_schema_updater(spec):
+    """Run one schema updater in its own app context (and so its own
+    session/connection); errors are logged, never raised. Returns True
+    if the updater succeeded."""
+    label, module_name, func_name = spec
+    with app.app_context():
+        try:
+            import importlib
+            getattr(importlib.import_module(module_name), func_name)()
+            return True
+        except Exception as e:
+            logging.error(f"Error updating {label} schema: {str(e)}")
+            return False
+
+
+def _run_independent_schema_updaters():
+    """Run the table-specific updaters; returns True if all of them succeeded."""
+    results = [_run_schema_updater(spec) for spec in _SHARED_TABLE_SCHEMA_UPDATERS]
+    # PARALLEL_SCHEMA_UPDATE=1 overlaps the per-statement round trips to
+    # the database; unset it to fall back to the original serial order.
+    if os.environ.get('PARALLEL_SCHEMA_UPDATE') == '1':
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            results.extend(ex.map(_run_schema_updater, _INDEPENDENT_SCHEMA_UPDATERS))
+    else:
+        for spec in _INDEPENDENT_SCHEMA_UPDATERS:
+            results.append(_run_schema_updater(spec))
+    return all(results)
 
 # Schema migrations — skipped in production to prevent startup lock collisions.
 # Two concurrent gunicorn workers running ~25 idempotent ALTER TABLE checks
@@ -534,97 +639,82 @@ def _create_default_terms_after_customer_insert(mapper, connection, target: Paym
 # and push startup beyond Cloud Run's health probe window → deployment fails.
 # To apply NEW migrations to production: set RUN_MIGRATIONS=1, publish once,
 # then remove the flag (same pattern as the forecast-schema block above).
-if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '1'):
-  logging.warning("PHASE 5.5: running schema migrations (dev or RUN_MIGRATIONS=1)")
+def _run_schema_migrations():
+  """Run every schema updater/seeder. Failures are logged and the block
+  carries on; returns True only if every step succeeded."""
+  failures = []
   with app.app_context():
     try:
         update_database_schema()
     except Exception as e:
         logging.error(f"Error updating skip schema: {str(e)}")
+        failures.append(e)
 
     try:
         from update_batch_picking_schema import update_database_schema as update_batch_schema
         update_batch_schema()
     except Exception as e:
         logging.error(f"Error updating batch schema: {str(e)}")
+        failures.append(e)
 
     try:
         from update_phase4_batch_picking_schema import update_phase4_batch_picking_schema
         update_phase4_batch_picking_schema()
     except Exception as e:
         logging.error(f"Phase 4 batch picking schema updater failed: {e}")
+        failures.append(e)
 
     try:
         from update_phase5_cooler_picking_schema import update_phase5_cooler_picking_schema
         update_phase5_cooler_picking_schema()
     except Exception as e:
         logging.error(f"Phase 5 cooler picking schema updater failed: {e}")
+        failures.append(e)
 
     try:
         from update_phase6_cooler_integration_schema import update_phase6_cooler_integration_schema
         update_phase6_cooler_integration_schema()
     except Exception as e:
         logging.error(f"Phase 6 cooler integration schema updater failed: {e}")
+        failures.append(e)
 
     try:
         from update_phase7_deferred_batch_schema import update_phase7_deferred_batch_schema
         update_phase7_deferred_batch_schema()
     except Exception as e:
         logging.error(f"Phase 7 deferred batch schema updater failed: {e}")
+        failures.append(e)
 
     try:
         from update_cooler_schema import update_cooler_schema
         update_cooler_schema()
     except Exception as e:
         logging.error(f"Error updating cooler schema: {e}")
+        failures.append(e)
 
     try:
         from update_batch_number_schema import update_database_schema as update_batch_number_schema
         update_batch_number_schema()
     except Exception as e:
         logging.error(f"Error updating batch number schema: {str(e)}")
+        failures.append(e)
 
     try:
         from update_unit_types_schema import update_unit_types_schema
         update_unit_types_schema()
     except Exception as e:
         logging.error(f"Error updating unit types schema: {str(e)}")
+        failures.append(e)
 
-    try:
-        from update_item_tracking_schema import update_item_tracking_schema
-        update_item_tracking_schema()
-    except Exception as e:
-        logging.error(f"Error updating item tracking schema: {str(e)}")
-
-    try:
-        from update_invoice_status_timestamp import add_status_timestamp_column
-        add_status_timestamp_column()
-    except Exception as e:
-        logging.error(f"Error updating invoice status timestamp schema: {str(e)}")
-
-    try:
-        from update_route_stop_schema import update_route_stop_schema
-        update_route_stop_schema()
-    except Exception as e:
-        logging.error(f"Error updating RouteStop schema: {str(e)}")
-
-    try:
-        from update_shipment_settlement_schema import update_shipment_settlement_schema
-        update_shipment_settlement_schema()
-    except Exception as e:
-        logging.error(f"Error updating Shipment settlement schema: {str(e)}")
-
-    try:
-        from update_warehouse_intake_schema import update_warehouse_intake_schema
-        update_warehouse_intake_schema()
-    except Exception as e:
-        logging.error(f"Error updating warehouse intake schema: {str(e)}")
+    if not _run_independent_schema_updaters():
+        failures.append('table-specific schema updaters')
 
     try:
         from update_oi_schema import update_oi_schema
         update_oi_schema()
     except Exception as e:
         logging.error(f"Error updating OI schema: {str(e)}")
+        failures.append(e)
 
     try:
         from sqlalchemy import text as sa_text
@@ -638,42 +728,21 @@ if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '
         appdb.session.commit()
     except Exception as e:
         logging.error(f"Error updating supplier columns: {str(e)}")
-
-    try:
-        from update_packing_profile_schema import update_packing_profile_schema
-        update_packing_profile_schema()
-    except Exception as e:
-        logging.error(f"Error updating WmsPackingProfile schema: {str(e)}")
+        failures.append(e)
 
     try:
         from update_route_reconciliation_schema import update_route_reconciliation_schema
         update_route_reconciliation_schema()
     except Exception as e:
         logging.error(f"Error updating route reconciliation schema: {str(e)}")
+        failures.append(e)
 
     try:
         from update_discrepancy_verification_schema import update_discrepancy_verification_schema
         update_discrepancy_verification_schema()
     except Exception as e:
         logging.error(f"Error updating discrepancy verification schema: {str(e)}")
-
-    try:
-        from update_cod_receipts_locking_schema import update_cod_receipts_locking_schema
-        update_cod_receipts_locking_schema()
-    except Exception as e:
-        logging.error(f"Error updating COD receipts locking schema: {str(e)}")
-
-    try:
-        from update_payment_entries_schema import update_payment_entries_schema
-        update_payment_entries_schema()
-    except Exception as e:
-        logging.error(f"Error updating payment entries schema: {str(e)}")
-
-    try:
-        from update_bank_transactions_schema import update_bank_transactions_schema
-        update_bank_transactions_schema()
-    except Exception as e:
-        logging.error(f"Error updating bank transactions schema: {str(e)}")
+        failures.append(e)
 
     try:
         from sqlalchemy import text as _wrs_text
@@ -685,9 +754,10 @@ if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '
             )
         )
         _wrs_db.session.commit()
-        logging.info("warehouse_status column ensured on shipments table")
+        startup_logger.info("warehouse_status column ensured on shipments table")
     except Exception as e:
         logging.error(f"Error adding warehouse_status column: {str(e)}")
+        failures.append(e)
 
     try:
         from sqlalchemy import text as _pe_text
@@ -699,9 +769,10 @@ if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '
             )
         )
         _pe_db.session.commit()
-        logging.info("is_resolved column ensured on picking_exceptions table")
+        startup_logger.info("is_resolved column ensured on picking_exceptions table")
     except Exception as e:
         logging.error(f"Error adding is_resolved column: {str(e)}")
+        failures.append(e)
 
     try:
         from sqlalchemy import text as _rs_text
@@ -719,15 +790,17 @@ if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '
             "ADD COLUMN IF NOT EXISTS email_columns_json TEXT"
         ))
         _rs_db.session.commit()
-        logging.info("email/email_cc/email_columns_json columns ensured on replenishment_suppliers table")
+        startup_logger.info("email/email_cc/email_columns_json columns ensured on replenishment_suppliers table")
     except Exception as e:
         logging.error(f"Error adding email columns to replenishment_suppliers: {str(e)}")
+        failures.append(e)
 
     try:
         from update_sms_schema import update_sms_schema
         update_sms_schema()
     except Exception as e:
         logging.error(f"Error updating SMS schema: {str(e)}")
+        failures.append(e)
 
     try:
         from app import db as _db
@@ -746,6 +819,7 @@ if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '
         _db.session.commit()
     except Exception as e:
         logging.warning(f"DwItem pricing columns migration: {e}")
+        failures.append(e)
         try:
             _db.session.rollback()
         except:
@@ -756,19 +830,15 @@ if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '
         update_replenishment_schema()
     except Exception as e:
         logging.error(f"Error updating replenishment schema: {str(e)}")
-
-    try:
-        from update_forecast_runs_schema import update_forecast_runs_schema
-        update_forecast_runs_schema()
-    except Exception as e:
-        logging.error(f"Error updating forecast runs schema: {str(e)}")
+        failures.append(e)
 
     try:
         from update_phase1_foundation_schema import update_phase1_foundation_schema
         update_phase1_foundation_schema()
-        logging.warning("Phase 1 foundation schema updater completed")
+        startup_logger.info("Phase 1 foundation schema updater completed")
     except Exception as e:
         logging.error(f"Error updating Phase 1 foundation schema: {str(e)}")
+        failures.append(e)
 
     try:
         from services.settings_defaults import ensure_phase1_settings_defaults
@@ -776,6 +846,7 @@ if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '
             ensure_phase1_settings_defaults()
     except Exception as e:
         logging.error(f"Error seeding Phase 1 settings defaults: {str(e)}")
+        failures.append(e)
 
     try:
         from services.permission_seeding import seed_permissions_from_roles
@@ -788,66 +859,41 @@ if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '
                 f"kept={result['rows_skipped']}"
             )
         else:
-            logging.info("Phase 3 permission seeder: skipped (already done)")
+            startup_logger.info("Phase 3 permission seeder: skipped (already done)")
     except Exception as e:
         logging.error(f"Error running Phase 3 permission seeder: {str(e)}")
-
-    try:
-        from update_magento_login_log_schema import update_magento_login_log_schema
-        update_magento_login_log_schema()
-    except Exception as e:
-        logging.error(f"Error updating Magento login log schema: {e}")
-
-    try:
-        from update_magento_last_login_current_schema import update_magento_last_login_current_schema
-        update_magento_last_login_current_schema()
-    except Exception as e:
-        logging.error(f"Error updating Magento last login current schema: {e}")
-
-    try:
-        from update_crm_offer_schema import ensure_crm_offer_schema
-        ensure_crm_offer_schema()
-    except Exception as e:
-        logging.error(f"Error updating CRM offer schema: {e}")
+        failures.append(e)
 
     try:
         from update_forecast_override_schema import update_forecast_override_schema
         update_forecast_override_schema()
     except Exception as e:
         logging.error(f"Error updating forecast override schema: {e}")
+        failures.append(e)
 
     try:
         from update_forecast_profile_manual_order_schema import update_forecast_profile_manual_order_schema
         update_forecast_profile_manual_order_schema()
     except Exception as e:
         logging.error(f"Error updating forecast profile manual order schema: {e}")
+        failures.append(e)
 
-    try:
-        from update_supplier_return_po_tracking_schema import update_supplier_return_po_tracking_schema
-        update_supplier_return_po_tracking_schema()
-    except Exception as e:
-        logging.error(f"Error updating supplier_return_po_tracking schema: {e}")
-
-    try:
-        from update_supplier_returns_stock_cache_schema import update_supplier_returns_stock_cache_schema
-        update_supplier_returns_stock_cache_schema()
-    except Exception as e:
-        logging.error(f"Error updating supplier_returns_stock_cache schema: {e}")
-
-    db.create_all()
+    _create_all_if_metadata_changed()
 
     try:
         from migrations.dw_credit_note_schema import ensure_dw_credit_note_schema
         ensure_dw_credit_note_schema()
-        logging.info("DW credit note schema + pbi_fact_sales view ensured")
+        startup_logger.info("DW credit note schema + pbi_fact_sales view ensured")
     except Exception as e:
         logging.error(f"Error ensuring dw_credit_note schema/view: {e}")
+        failures.append(e)
 
     try:
         from update_order_status_system import update_order_status_system
         update_order_status_system()
     except Exception as e:
         logging.error(f"Error updating order status system: {str(e)}")
+        failures.append(e)
 
     try:
         from models import Setting
@@ -862,11 +908,134 @@ if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '
             db.session.commit()
     except Exception as e:
         logging.error(f"Error initializing settings: {str(e)}")
+        failures.append(e)
         try:
             db.session.rollback()
         except:
             pass
 
+  return not failures
+
+
+SCHEMA_HASH_SETTING_KEY = 'schema_migration_hash'
+CREATE_ALL_HASH_SETTING_KEY = 'db_create_all_hash'
+SCHEMA_MIGRATION_LOCK_ID = 7412309  # arbitrary, app-wide pg_advisory_lock key
+
+
+def _schema_migration_hash():
+    """Hash the source of every module the migration block runs, so any
+    edit to an updater (or to the inline ALTERs here) triggers a re-run."""
+    import glob
+    import hashlib
+    base = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted(
+        glob.glob(os.path.join(base, 'update_*.py'))
+        + glob.glob(os.path.join(base, 'migrations', '*.py'))
+        # seeders run inside the block too
+        + [os.path.join(base, 'services', 'settings_defaults.py'),
+           os.path.join(base, 'services', 'permission_seeding.py')]
+        + [os.path.abspath(__file__)]
+    )
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.relpath(path, base).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    # New models/columns must re-run the block too, since it holds create_all()
+    digest.update(_metadata_hash().encode())
+    return digest.hexdigest()
+
+
+def _metadata_hash():
+    """Hash the mapped tables, columns and indexes that create_all() emits."""
+    import hashlib
+    digest = hashlib.sha256()
+    for name, table in sorted(db.metadata.tables.items()):
+        digest.update(name.encode())
+        for col in table.columns:
+            digest.update(f"|{col.name}:{col.type!r}:{col.nullable}:{col.primary_key}".encode())
+        for index_name in sorted(ix.name or '' for ix in table.indexes):
+            digest.update(f"|ix:{index_name}".encode())
+    return digest.hexdigest()
+
+
+def _create_all_if_metadata_changed():
+    """db.create_all(), skipped when the mapped metadata is unchanged since
+    the last run. Called inside the migration block, which already holds the
+    schema advisory lock."""
+    from models import Setting
+    meta_hash = _metadata_hash()
+    try:
+        if Setting.get(db.session, CREATE_ALL_HASH_SETTING_KEY, None) == meta_hash:
+            return
+    except Exception:
+        db.session.rollback()
+    db.create_all()
+    try:
+        Setting.set(db.session, CREATE_ALL_HASH_SETTING_KEY, meta_hash)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error recording create_all hash: {str(e)}")
+
+
+def _run_schema_migrations_once():
+    """Run the migration block once per code version instead of once per
+    worker boot. The hash of the migration sources is stored in
+    ``settings``; a Postgres advisory lock makes concurrently booting
+    workers wait for the first one rather than repeat its DDL."""
+    from models import Setting
+
+    current_hash = _schema_migration_hash()
+    with app.app_context():
+        try:
+            if Setting.get(db.session, SCHEMA_HASH_SETTING_KEY, None) == current_hash:
+                logging.warning("PHASE 5.5: schema migrations up to date, skipped")
+                return
+        except Exception:
+            # settings table missing on a fresh database
+            db.session.rollback()
+        finally:
+            db.session.remove()
+
+    with app.app_context():
+        lock_conn = None
+        if db.engine.dialect.name == 'postgresql':
+            lock_conn = db.engine.connect()
+            lock_conn.execute(_sa_text("SELECT pg_advisory_lock(:id)"), {'id': SCHEMA_MIGRATION_LOCK_ID})
+            lock_conn.commit()
+        try:
+            try:
+                if Setting.get(db.session, SCHEMA_HASH_SETTING_KEY, None) == current_hash:
+                    logging.warning("PHASE 5.5: schema migrations applied by another worker, skipped")
+                    return
+            except Exception:
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+            if not _run_schema_migrations():
+                # Leave the hash unset so the next boot retries the block
+                logging.error("PHASE 5.5: schema migrations had failures, will retry on next start")
+                return
+
+            try:
+                Setting.set(db.session, SCHEMA_HASH_SETTING_KEY, current_hash)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Error recording schema migration hash: {str(e)}")
+        finally:
+            if lock_conn is not None:
+                try:
+                    lock_conn.execute(_sa_text("SELECT pg_advisory_unlock(:id)"), {'id': SCHEMA_MIGRATION_LOCK_ID})
+                finally:
+                    lock_conn.close()
+
+if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '1'):
+  logging.warning("PHASE 5.5: running schema migrations (dev or RUN_MIGRATIONS=1)")
+  _run_schema_migrations_once()
+  with app.app_context():
     try:
         run_deferred_db_init()
     except Exception as e:
@@ -875,7 +1044,7 @@ if _db_available and (not is_production or os.environ.get('RUN_MIGRATIONS') == '
 try:
     from services.permissions import register_template_helpers
     register_template_helpers(app)
-    logging.warning("Phase 1 permissions: template helper has_permission() registered")
+    startup_logger.info("Phase 1 permissions: template helper has_permission() registered")
 except Exception as e:
     logging.error(f"Error registering permissions template helpers: {str(e)}")
 
@@ -894,16 +1063,22 @@ def debug_forecast_schema():
     from flask import jsonify
     return jsonify([{"table": r[0], "column": r[1]} for r in cols])
 
-from flask import send_file, abort, flash, redirect, url_for, render_template_string, request
+from flask import send_from_directory, abort, flash, redirect, url_for, render_template_string, request
 import os as os_module
 
+PROJECT_EXPORT_DIR = '/home/runner/workspace'
+PROJECT_EXPORT_NAME = 'warehouse-system-export.zip'
+
 @app.route('/download-project-export')
 def download_project_export():
-    file_path = '/home/runner/workspace/warehouse-system-export.zip'
-    if os_module.path.exists(file_path):
-        return send_file(file_path, as_attachment=True, download_name='warehouse-system-export.zip')
-    else:
+    # conditional + max_age=0: browsers revalidate and get a 304 with no
+    # body while the zip's ETag / Last-Modified are unchanged.
+    if not os_module.path.isfile(os_module.path.join(PROJECT_EXPORT_DIR, PROJECT_EXPORT_NAME)):
         return "Export file not found. Please create it first.", 404
+    return send_from_directory(
+        PROJECT_EXPORT_DIR, PROJECT_EXPORT_NAME,
+        as_attachment=True, conditional=True, etag=True, max_age=0,
+    )
 
 @app.route('/admin/maintenance/dedup-cod', methods=['GET', 'POST'])
 @flask_login.login_required
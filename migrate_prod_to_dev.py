@@ -4,9 +4,14 @@ Migration script to copy data from production database to development database.
 """
 
 import os
+import sys
+import threading
 import psycopg2
 from psycopg2 import sql
+from psycopg2.extras import execute_values
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from psycopg2.pool import ThreadedConnectionPool
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
@@ -62,17 +67,395 @@ TABLES_TO_COPY = [
     "wms_item_overrides",
 ]
 
+# Rows sent per multi-row INSERT
+INSERT_PAGE_SIZE = 1000
 
-def table_exists(cur, table_name):
+# Rows fetched per round-trip from production's server-side cursor
+FETCH_SIZE = 10000
+
+# Tables copied concurrently, each over its own prod/dev connection pair
+COPY_WORKERS = 8
+
+# Below this many (estimated) production rows, copy on a single worker
+PARALLEL_MIN_ROWS = 100_000
+
+# Dev is rebuilt from scratch on failure, so each table's load commit need
+# not wait for its WAL flush; extra memory speeds the INSERT ... SELECT
+LOAD_SETTINGS = {
+    "synchronous_commit": "off",
+    "work_mem": "256MB",
+}
+
+# Session memory for rebuilding the dropped indexes
+INDEX_BUILD_MAINTENANCE_WORK_MEM = "1GB"
+
+
+def existing_tables(cur, tables):
+    """Return the subset of tables that exist in the connected database."""
+    cur.execute(
+        "SELECT table_name FROM information_schema.tables "
+        "WHERE table_schema = 'public' AND table_name = ANY(%s);",
+        (list(tables),)
+    )
+    return {row[0] for row in cur.fetchall()}
+
+
+def build_insert_query(cur, table, colnames):
+    """
+    Render the multi-row INSERT statement for table once, as encoded bytes,
+    so insert_rows() can reuse it for every page.
+    """
+    encoding = psycopg2.extensions.encodings[cur.connection.encoding]
+    columns = sql.SQL(', ').join(map(sql.Identifier, colnames))
+    return sql.SQL("INSERT INTO {} ({}) VALUES %s ON CONFLICT DO NOTHING").format(
+        sql.Identifier(table), columns
+    ).as_string(cur).encode(encoding)
+
+
+def insert_rows(cur, query, rows):
+    """
+    Insert rows with multi-row INSERTs of INSERT_PAGE_SIZE rows, using the
+    statement from build_insert_query(). Returns the number of rows written
+    without error.
+    """
+    inserted = 0
+    for start in range(0, len(rows), INSERT_PAGE_SIZE):
+        inserted += insert_page(cur, query, rows[start:start + INSERT_PAGE_SIZE])
+    return inserted
+
+
+def insert_page(cur, query, page):
+    """
+    Insert one page; if it fails, bisect it so only the bad rows are skipped.
+    A single bad row costs about 2*log2(len(page)) statements instead of one
+    statement per row.
+    Runs inside the table's transaction, so each attempt gets a savepoint
+    that a failure rolls back to.
+    """
+    cur.execute("SAVEPOINT insert_page;")
+    try:
+        execute_values(cur, query, page, page_size=len(page))
+        cur.execute("RELEASE SAVEPOINT insert_page;")
+        return len(page)
+    except Exception:
+        cur.execute("ROLLBACK TO SAVEPOINT insert_page;")
+        if len(page) == 1:
+            return 0
+    mid = len(page) // 2
+    return insert_page(cur, query, page[:mid]) + insert_page(cur, query, page[mid:])
+
+
+def truncate_tables(cur, tables):
+    """
+    Truncate all tables in one TRUNCATE ... CASCADE statement, falling back
+    to one statement per table if the combined one fails.
+    """
+    if not tables:
+        return
+    try:
+        cur.execute(sql.SQL("TRUNCATE TABLE {} CASCADE;").format(
+            sql.SQL(', ').join(map(sql.Identifier, tables))
+        ))
+        logger.info(f"  Truncated {len(tables)} tables")
+        return
+    except Exception as e:
+        logger.warning(f"  Combined truncate failed, truncating one by one: {str(e)[:50]}")
+
+    for table in tables:
+        try:
+            cur.execute(sql.SQL("TRUNCATE TABLE {} CASCADE;").format(sql.Identifier(table)))
+            logger.info(f"  Truncated {table}")
+        except Exception as e:
+            logger.warning(f"  Could not truncate {table}: {str(e)[:50]}")
+
+
+def drop_secondary_indexes(cur, tables):
+    """
+    Drop non-unique indexes on tables that do not back a primary key or
+    constraint, so the bulk load only writes the heap. Unique indexes stay,
+    since ON CONFLICT DO NOTHING relies on them to skip duplicates. Returns
+    the dropped indexes' CREATE INDEX statements for restore_indexes().
+    """
+    cur.execute("""
+        SELECT n.nspname, ic.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        WHERE n.nspname = 'public'
+          AND t.relname = ANY(%s)
+          AND NOT i.indisprimary
+          AND NOT i.indisunique
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid);
+    """, (list(tables),))
+    index_defs = []
+    for schema, name, indexdef in cur.fetchall():
+        try:
+            cur.execute(sql.SQL("DROP INDEX IF EXISTS {};").format(sql.Identifier(schema, name)))
+            index_defs.append(indexdef)
+        except Exception as e:
+            logger.warning(f"  Could not drop index {name}: {str(e)[:50]}")
+    logger.info(f"  Dropped {len(index_defs)} secondary indexes for the load")
+    return index_defs
+
+
+def apply_settings(cur, settings, local=False):
+    """SET each setting for the session, or for the transaction if local."""
+    scope = sql.SQL("SET LOCAL" if local else "SET")
+    for name, value in settings.items():
+        cur.execute(sql.SQL("{} {} = {};").format(scope, sql.Identifier(name), sql.Literal(value)))
+
+
+def restore_indexes(cur, index_defs):
+    """Recreate indexes dropped by drop_secondary_indexes()."""
+    for indexdef in index_defs:
+        try:
+            cur.execute(indexdef)
+        except Exception as e:
+            logger.error(f"  Could not recreate index: {indexdef} ({str(e)[:50]})")
+    logger.info(f"  Recreated {len(index_defs)} secondary indexes")
+
+
+def set_user_triggers(cur, tables, enabled):
+    """Enable or disable user-defined triggers (FK checks stay active)."""
+    action = sql.SQL("ENABLE" if enabled else "DISABLE")
+    for table in tables:
+        try:
+            cur.execute(sql.SQL("ALTER TABLE {} {} TRIGGER USER;").format(sql.Identifier(table), action))
+        except Exception as e:
+            logger.warning(f"  Could not change triggers on {table}: {str(e)[:50]}")
+
+
+def copy_table(prod_cur, dev_cur, table, binary=True):
+    """
+    Copy table from production to development with the COPY protocol.
+    Rows are staged in a temp table so ON CONFLICT DO NOTHING still applies.
+    BINARY skips text encoding but needs identical column types on both
+    sides; pass binary=False for the more tolerant text format.
+    Must run inside a transaction: the stage is dropped on commit, or
+    discarded with everything else when the caller rolls back.
+    Returns the number of rows inserted.
+    """
+    options = sql.SQL(" WITH (FORMAT BINARY)" if binary else "")
+    prod_cur.execute(sql.SQL("SELECT * FROM {} LIMIT 0;").format(sql.Identifier(table)))
+    columns = sql.SQL(', ').join(sql.Identifier(desc[0]) for desc in prod_cur.description)
+    stage = sql.Identifier(f"_migrate_{table}")
+
+    dev_cur.execute(sql.SQL("CREATE TEMP TABLE {} ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA;").format(
+        stage, columns, sql.Identifier(table)
+    ))
+    pipe_copy(
+        prod_cur,
+        sql.SQL("COPY {} ({}) TO STDOUT{}").format(sql.Identifier(table), columns, options).as_string(prod_cur),
+        dev_cur,
+        sql.SQL("COPY {} ({}) FROM STDIN{}").format(stage, columns, options).as_string(dev_cur),
+    )
+    dev_cur.execute(sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT DO NOTHING;").format(
+        sql.Identifier(table), columns, columns, stage
+    ))
+    return dev_cur.rowcount
+
+
+def pipe_copy(prod_cur, copy_out, dev_cur, copy_in):
+    """
+    Feed production's COPY TO STDOUT straight into development's
+    COPY FROM STDIN through an OS pipe. A producer thread writes while this
+    thread reads, so both transfers overlap and memory use stays constant.
+    """
+    read_fd, write_fd = os.pipe()
+    errors = []
+
+    def produce():
+        try:
+            with os.fdopen(write_fd, 'wb') as out:
+                prod_cur.copy_expert(copy_out, out)
+        except Exception as e:
+            errors.append(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        # Closing the read end on failure unblocks the producer (EPIPE)
+        with os.fdopen(read_fd, 'rb') as inp:
+            dev_cur.copy_expert(copy_in, inp)
+    finally:
+        producer.join()
+    if errors:
+        # The stage may hold a truncated stream; the caller drops it
+        raise errors[0]
+
+
+def stream_table(prod_conn, dev_cur, table):
+    """
+    Copy table with batched INSERTs, streaming it through a server-side
+    cursor so only one page of rows is held in memory at a time.
+    Slower than copy_table but skips individual bad rows.
+    """
+    inserted = 0
+    with prod_conn.cursor(name=f"migrate_{table}") as stream_cur:
+        stream_cur.itersize = FETCH_SIZE
+        stream_cur.execute(sql.SQL("SELECT * FROM {};").format(sql.Identifier(table)))
+        query = None
+        while True:
+            rows = stream_cur.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            if query is None:
+                colnames = [desc[0] for desc in stream_cur.description]
+                query = build_insert_query(dev_cur, table, colnames)
+            inserted += insert_rows(dev_cur, query, rows)
+    return inserted
+
+
+def set_unlogged(cur, tables):
+    """
+    Switch tables to UNLOGGED so the load writes no WAL. Children go first,
+    because a logged table may not reference an unlogged one; tables that
+    still refuse are left logged. Returns the tables actually switched.
+    """
+    switched = []
+    for table in reversed(tables):
+        try:
+            cur.execute(sql.SQL("ALTER TABLE {} SET UNLOGGED;").format(sql.Identifier(table)))
+            switched.append(table)
+        except Exception as e:
+            logger.warning(f"  Could not set {table} UNLOGGED: {str(e)[:50]}")
+    return switched
+
+
+def set_logged(cur, tables):
+    """Restore tables switched by set_unlogged(), parents first."""
+    for table in reversed(tables):
+        try:
+            cur.execute(sql.SQL("ALTER TABLE {} SET LOGGED;").format(sql.Identifier(table)))
+        except Exception as e:
+            logger.error(f"  Could not set {table} back to LOGGED: {str(e)[:50]}")
+
+
+def table_levels(cur, tables):
+    """
+    Group tables into levels so that every foreign key points at a table
+    in an earlier level. Tables within a level can be loaded in parallel.
+    """
+    cur.execute("""
+        SELECT child.relname, parent.relname
+        FROM pg_constraint k
+        JOIN pg_class child ON child.oid = k.conrelid
+        JOIN pg_class parent ON parent.oid = k.confrelid
+        JOIN pg_namespace n ON n.oid = child.relnamespace
+        WHERE k.contype = 'f'
+          AND n.nspname = 'public'
+          AND child.relname = ANY(%s)
+          AND parent.relname = ANY(%s);
+    """, (list(tables), list(tables)))
+    parents = {table: set() for table in tables}
+    for child, parent in cur.fetchall():
+        if child != parent:
+            parents[child].add(parent)
+
+    levels = []
+    loaded = set()
+    remaining = list(tables)
+    while remaining:
+        level = [t for t in remaining if parents[t] <= loaded]
+        if not level:
+            # Circular references: load whatever is left together
+            level = remaining
+        levels.append(level)
+        loaded.update(level)
+        remaining = [t for t in remaining if t not in loaded]
+    return levels
+
+
+def can_skip_fk_checks(cur):
+    """
+    True if this role may set session_replication_role = replica, which
+    turns off FK enforcement so tables can be loaded in any order.
+    """
+    try:
+        cur.execute("SET session_replication_role = replica;")
+        cur.execute("RESET session_replication_role;")
+        return True
+    except Exception:
+        return False
+
+
+def estimated_rows(cur, tables):
+    """Planner row estimate summed over tables (cheap, no table scans)."""
     cur.execute(
-        "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = %s);",
-        (table_name,)
+        "SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0) FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = 'public' AND c.relname = ANY(%s);",
+        (list(tables),)
     )
-    result = cur.fetchone()
-    return result and result[0]
+    return int(cur.fetchone()[0])
 
 
-def migrate_db():
+def copy_attempt(prod_conn, dev_cur, attempt):
+    """
+    Run attempt() under a dev savepoint, so a failed COPY is undone without
+    aborting the table's transaction.
+    """
+    dev_cur.execute("SAVEPOINT copy_attempt;")
+    try:
+        result = attempt()
+    except Exception:
+        dev_cur.execute("ROLLBACK TO SAVEPOINT copy_attempt;")
+        prod_conn.rollback()
+        raise
+    dev_cur.execute("RELEASE SAVEPOINT copy_attempt;")
+    return result
+
+
+def copy_one_table(prod_pool, dev_pool, table, skip_fk_checks=False):
+    """
+    Copy one table over a prod/dev connection pair borrowed from the pools.
+    The table loads in one dev transaction with a single COMMIT; fallbacks
+    are isolated with savepoints rather than intermediate commits.
+    """
+    prod_conn = prod_pool.getconn()
+    dev_conn = dev_pool.getconn()
+    try:
+        # Named (server-side) cursors only live inside a transaction
+        prod_conn.autocommit = False
+        prod_conn.set_session(readonly=True)
+        dev_conn.autocommit = False
+        prod_cur = prod_conn.cursor()
+        dev_cur = dev_conn.cursor()
+        try:
+            apply_settings(dev_cur, LOAD_SETTINGS, local=True)
+            if skip_fk_checks:
+                # Reverts by itself when the transaction ends
+                dev_cur.execute("SET LOCAL session_replication_role = replica;")
+            try:
+                try:
+                    inserted = copy_attempt(prod_conn, dev_cur, lambda: copy_table(prod_cur, dev_cur, table))
+                except Exception as e:
+                    logger.info(f"  Binary COPY failed for {table}, retrying as text: {str(e)[:80]}")
+                    inserted = copy_attempt(
+                        prod_conn, dev_cur, lambda: copy_table(prod_cur, dev_cur, table, binary=False)
+                    )
+            except Exception as e:
+                logger.warning(f"  COPY failed for {table}, falling back to INSERT: {str(e)[:80]}")
+                inserted = stream_table(prod_conn, dev_cur, table)
+            dev_conn.commit()
+            return inserted
+        except Exception:
+            dev_conn.rollback()
+            raise
+        finally:
+            prod_conn.rollback()
+    finally:
+        prod_pool.putconn(prod_conn)
+        dev_pool.putconn(dev_conn)
+
+
+def migrate_db(aggressive=False):
+    """
+    Copy TABLES_TO_COPY from DATABASE_URL_PROD into DATABASE_URL.
+    aggressive=True also makes the dev tables UNLOGGED for the load, which
+    skips WAL but leaves them unsafe against a crash until it finishes.
+    """
     prod_url = os.environ.get("DATABASE_URL_PROD")
     dev_url = os.environ.get("DATABASE_URL")
 
@@ -86,55 +469,62 @@ def migrate_db():
     try:
         logger.info("Connecting to databases...")
         prod_conn = psycopg2.connect(prod_url)
-        prod_conn.autocommit = True
+        # Named (server-side) cursors only live inside a transaction
+        prod_conn.autocommit = False
+        prod_conn.set_session(readonly=True)
         prod_cur = prod_conn.cursor()
 
         dev_conn = psycopg2.connect(dev_url)
         dev_conn.autocommit = True
         dev_cur = dev_conn.cursor()
 
+        dev_tables = existing_tables(dev_cur, TABLES_TO_COPY)
+        prod_tables = existing_tables(prod_cur, TABLES_TO_COPY)
+        prod_conn.rollback()
+
         logger.info("Clearing development tables...")
-        for table in reversed(TABLES_TO_COPY):
-            if table_exists(dev_cur, table):
-                try:
-                    dev_cur.execute(sql.SQL("TRUNCATE TABLE {} CASCADE;").format(sql.Identifier(table)))
-                    logger.info(f"  Truncated {table}")
-                except Exception as e:
-                    logger.warning(f"  Could not truncate {table}: {str(e)[:50]}")
+        truncate_tables(dev_cur, [t for t in reversed(TABLES_TO_COPY) if t in dev_tables])
 
         total_rows = 0
         tables_copied = 0
 
-        logger.info("\nCopying data...")
-        for table in TABLES_TO_COPY:
-            if not table_exists(dev_cur, table) or not table_exists(prod_cur, table):
-                continue
-
-            prod_cur.execute(sql.SQL("SELECT * FROM {};").format(sql.Identifier(table)))
-            rows = prod_cur.fetchall()
-
-            if not rows or prod_cur.description is None:
-                continue
+        load_tables = [t for t in TABLES_TO_COPY if t in dev_tables and t in prod_tables]
+        index_defs = drop_secondary_indexes(dev_cur, load_tables)
+        set_user_triggers(dev_cur, load_tables, enabled=False)
+        unlogged = set_unlogged(dev_cur, load_tables) if aggressive else []
+        try:
+            logger.info("\nCopying data...")
+            skip_fk_checks = can_skip_fk_checks(dev_cur)
+            if skip_fk_checks:
+                levels = [load_tables]
+            else:
+                # Parents before children: foreign keys stay enforced
+                levels = table_levels(dev_cur, load_tables)
+            workers = COPY_WORKERS if estimated_rows(prod_cur, load_tables) >= PARALLEL_MIN_ROWS else 1
+            prod_conn.rollback()
 
-            colnames = [desc[0] for desc in prod_cur.description]
-            columns = sql.SQL(', ').join(map(sql.Identifier, colnames))
-            placeholders = sql.SQL(', ').join([sql.Placeholder()] * len(colnames))
-            insert_query = sql.SQL("INSERT INTO {} ({}) VALUES ({}) ON CONFLICT DO NOTHING").format(
-                sql.Identifier(table), columns, placeholders
-            )
-
-            inserted = 0
-            for row in rows:
-                try:
-                    dev_cur.execute(insert_query, row)
-                    inserted += 1
-                except Exception:
-                    pass
-
-            if inserted > 0:
-                total_rows += inserted
-                tables_copied += 1
-                logger.info(f"  {table}: {inserted} rows")
+            prod_pool = ThreadedConnectionPool(1, workers, prod_url)
+            dev_pool = ThreadedConnectionPool(1, workers, dev_url)
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for level in levels:
+                        results = executor.map(
+                            lambda t: copy_one_table(prod_pool, dev_pool, t, skip_fk_checks), level
+                        )
+                        for table, inserted in zip(level, results):
+                            if inserted > 0:
+                                total_rows += inserted
+                                tables_copied += 1
+                                logger.info(f"  {table}: {inserted} rows")
+            finally:
+                prod_pool.closeall()
+                dev_pool.closeall()
+        finally:
+            set_logged(dev_cur, unlogged)
+            set_user_triggers(dev_cur, load_tables, enabled=True)
+            if index_defs:
+                apply_settings(dev_cur, {"maintenance_work_mem": INDEX_BUILD_MAINTENANCE_WORK_MEM})
+            restore_indexes(dev_cur, index_defs)
 
         logger.info(f"\nDone! Copied {total_rows} rows across {tables_copied} tables.")
         return True
@@ -155,8 +545,12 @@ if __name__ == "__main__":
     print("PRODUCTION → DEVELOPMENT DATABASE MIGRATION")
     print("=" * 50 + "\n")
 
+    aggressive = "--aggressive" in sys.argv[1:]
+    if aggressive:
+        print("--aggressive: dev tables are UNLOGGED while loading\n")
+
     confirm = input("Type 'yes' to proceed: ")
     if confirm.lower() == 'yes':
-        migrate_db()
+        migrate_db(aggressive=aggressive)
     else:
         print("Cancelled.")
@@ -246,6 +246,18 @@ CREATE INDEX IF NOT EXISTS idx_purchase_orders_deleted_at ON purchase_orders(del
 
 COMMIT;
 
+-- ============================================================================
+-- PARTIAL INDEXES OVER LIVE ROWS
+-- ============================================================================
+-- Almost every query filters on deleted_at IS NULL plus one hot column.
+-- CONCURRENTLY cannot run inside a transaction block, so these follow COMMIT.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_invoices_alive_status ON invoices(status) WHERE deleted_at IS NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_batch_sessions_alive_status ON batch_picking_sessions(status) WHERE deleted_at IS NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_shipments_alive_driver ON shipments(driver_name) WHERE deleted_at IS NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_route_stop_alive_shipment ON route_stop(shipment_id) WHERE deleted_at IS NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ps_customers_alive_active ON ps_customers(is_active) WHERE deleted_at IS NULL;
+
 -- ============================================================================
 -- VERIFICATION QUERIES
 -- ============================================================================
@@ -18,21 +18,87 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from app import app, db
 from sqlalchemy import text
 
-def column_exists(table_name, column_name):
-    """Check if a column exists in a table"""
-    inspector = db.inspect(db.engine)
-    columns = [col['name'] for col in inspector.get_columns(table_name)]
-    return column_name in columns
+SOFT_DELETE_COLUMNS = [
+    ('deleted_at', 'TIMESTAMP NULL'),
+    ('deleted_by', 'VARCHAR(64) NULL'),
+    ('delete_reason', 'VARCHAR(255) NULL'),
+]
 
-def add_column_if_missing(table_name, column_name, column_type):
-    """Add a column to a table if it doesn't exist"""
-    if not column_exists(table_name, column_name):
-        sql = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"
-        print(f"  Adding {table_name}.{column_name}...")
-        db.session.execute(text(sql))
+# Columns to add, per table, in the order they are added
+MIGRATION_COLUMNS = {
+    # User table - Activatable columns
+    'users': [
+        ('is_active', 'BOOLEAN NOT NULL DEFAULT 1'),
+        ('disabled_at', 'TIMESTAMP NULL'),
+        ('disabled_reason', 'VARCHAR(255) NULL'),
+    ],
+    'invoices': SOFT_DELETE_COLUMNS,
+    'shipments': SOFT_DELETE_COLUMNS,
+    'route_stop': SOFT_DELETE_COLUMNS,
+    'batch_picking_sessions': SOFT_DELETE_COLUMNS,
+    # PSCustomer table - Soft delete + Activatable columns
+    'ps_customers': SOFT_DELETE_COLUMNS + [
+        ('is_active', 'BOOLEAN NOT NULL DEFAULT 1'),
+        ('disabled_at', 'TIMESTAMP NULL'),
+        ('disabled_reason', 'VARCHAR(255) NULL'),
+    ],
+    'purchase_orders': SOFT_DELETE_COLUMNS,
+}
+
+# Partial indexes over live rows: (index name, table, column)
+ALIVE_INDEXES = [
+    ('ix_invoices_alive_status', 'invoices', 'status'),
+    ('ix_batch_sessions_alive_status', 'batch_picking_sessions', 'status'),
+    ('ix_shipments_alive_driver', 'shipments', 'driver_name'),
+    ('ix_route_stop_alive_shipment', 'route_stop', 'shipment_id'),
+    ('ix_ps_customers_alive_active', 'ps_customers', 'is_active'),
+]
+
+def begin_transaction():
+    """
+    Open a real transaction on the session's SQLite connection. The sqlite3
+    driver only begins one implicitly before INSERT/UPDATE/DELETE, so without
+    this every ALTER TABLE would commit (and sync) on its own.
+    """
+    connection = db.session.connection()
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.execute(text("BEGIN"))
+
+def add_missing_columns(table_name, columns, existing):
+    """
+    Add every missing column of a table in one transaction, so SQLite
+    rewrites and syncs the schema once per table instead of once per column,
+    and a failure leaves the table untouched. ``existing`` is the table's
+    current column names and is updated only once the commit succeeds.
+    Returns the names of the columns added.
+    """
+    added = []
+    try:
+        begin_transaction()
+        for column_name, column_type in columns:
+            if column_name in existing or column_name in added:
+                continue
+            print(f"  Adding {table_name}.{column_name}...")
+            db.session.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+            added.append(column_name)
+        if table_name == 'ps_customers' and 'is_active' in added:
+            # Sync is_active with existing active column
+            db.session.execute(text("UPDATE ps_customers SET is_active = active WHERE active IS NOT NULL"))
         db.session.commit()
-        return True
-    return False
+    except Exception:
+        db.session.rollback()
+        raise
+    existing.update(added)
+    return added
+
+def create_alive_indexes():
+    """Create the partial indexes over non-deleted rows (idempotent)."""
+    for index_name, table_name, column_name in ALIVE_INDEXES:
+        db.session.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({column_name}) "
+            f"WHERE deleted_at IS NULL"
+        ))
+    db.session.commit()
 
 def run_migration():
     """Run the soft delete migration for SQLite"""
@@ -43,77 +109,19 @@ def run_migration():
         try:
             added_count = 0
             
-            # User table - Activatable columns
-            print("\n📋 Migrating users table...")
-            if add_column_if_missing('users', 'is_active', 'BOOLEAN NOT NULL DEFAULT 1'):
-                added_count += 1
-            if add_column_if_missing('users', 'disabled_at', 'TIMESTAMP NULL'):
-                added_count += 1
-            if add_column_if_missing('users', 'disabled_reason', 'VARCHAR(255) NULL'):
-                added_count += 1
-            
-            # Invoices table - Soft delete columns
-            print("\n📋 Migrating invoices table...")
-            if add_column_if_missing('invoices', 'deleted_at', 'TIMESTAMP NULL'):
-                added_count += 1
-            if add_column_if_missing('invoices', 'deleted_by', 'VARCHAR(64) NULL'):
-                added_count += 1
-            if add_column_if_missing('invoices', 'delete_reason', 'VARCHAR(255) NULL'):
-                added_count += 1
-            
-            # Shipments table - Soft delete columns
-            print("\n📋 Migrating shipments table...")
-            if add_column_if_missing('shipments', 'deleted_at', 'TIMESTAMP NULL'):
-                added_count += 1
-            if add_column_if_missing('shipments', 'deleted_by', 'VARCHAR(64) NULL'):
-                added_count += 1
-            if add_column_if_missing('shipments', 'delete_reason', 'VARCHAR(255) NULL'):
-                added_count += 1
-            
-            # RouteStop table - Soft delete columns
-            print("\n📋 Migrating route_stop table...")
-            if add_column_if_missing('route_stop', 'deleted_at', 'TIMESTAMP NULL'):
-                added_count += 1
-            if add_column_if_missing('route_stop', 'deleted_by', 'VARCHAR(64) NULL'):
-                added_count += 1
-            if add_column_if_missing('route_stop', 'delete_reason', 'VARCHAR(255) NULL'):
-                added_count += 1
-            
-            # BatchPickingSession table - Soft delete columns
-            print("\n📋 Migrating batch_picking_sessions table...")
-            if add_column_if_missing('batch_picking_sessions', 'deleted_at', 'TIMESTAMP NULL'):
-                added_count += 1
-            if add_column_if_missing('batch_picking_sessions', 'deleted_by', 'VARCHAR(64) NULL'):
-                added_count += 1
-            if add_column_if_missing('batch_picking_sessions', 'delete_reason', 'VARCHAR(255) NULL'):
-                added_count += 1
+            # Reflect every table once up front
+            inspector = db.inspect(db.engine)
+            schema = {
+                table_name: {col['name'] for col in inspector.get_columns(table_name)}
+                for table_name in MIGRATION_COLUMNS
+            }
             
-            # PSCustomer table - Soft delete + Activatable columns
-            print("\n📋 Migrating ps_customers table...")
-            if add_column_if_missing('ps_customers', 'deleted_at', 'TIMESTAMP NULL'):
-                added_count += 1
-            if add_column_if_missing('ps_customers', 'deleted_by', 'VARCHAR(64) NULL'):
-                added_count += 1
-            if add_column_if_missing('ps_customers', 'delete_reason', 'VARCHAR(255) NULL'):
-                added_count += 1
-            if add_column_if_missing('ps_customers', 'is_active', 'BOOLEAN NOT NULL DEFAULT 1'):
-                added_count += 1
-                # Sync is_active with existing active column
-                db.session.execute(text("UPDATE ps_customers SET is_active = active WHERE active IS NOT NULL"))
-                db.session.commit()
-            if add_column_if_missing('ps_customers', 'disabled_at', 'TIMESTAMP NULL'):
-                added_count += 1
-            if add_column_if_missing('ps_customers', 'disabled_reason', 'VARCHAR(255) NULL'):
-                added_count += 1
+            for table_name, columns in MIGRATION_COLUMNS.items():
+                print(f"\n📋 Migrating {table_name} table...")
+                added_count += len(add_missing_columns(table_name, columns, schema[table_name]))
             
-            # PurchaseOrder table - Soft delete columns
-            print("\n📋 Migrating purchase_orders table...")
-            if add_column_if_missing('purchase_orders', 'deleted_at', 'TIMESTAMP NULL'):
-                added_count += 1
-            if add_column_if_missing('purchase_orders', 'deleted_by', 'VARCHAR(64) NULL'):
-                added_count += 1
-            if add_column_if_missing('purchase_orders', 'delete_reason', 'VARCHAR(255) NULL'):
-                added_count += 1
+            print("\n📋 Creating partial indexes on live rows...")
+            create_alive_indexes()
             
             print(f"\n✅ Migration completed successfully!")
             print(f"   Added {added_count} columns")
@@ -1,7 +1,40 @@
 from sqlalchemy import Column, DateTime, String, Boolean
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 from datetime import datetime
+from flask import has_request_context
 from flask_login import current_user
 
+
+class utc_now(FunctionElement):
+    """Server-side UTC timestamp for naive DateTime columns.
+
+    Plain now() would follow the Postgres session TimeZone, while these
+    columns hold naive UTC values (as written by datetime.utcnow()).
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utc_now)
+def _utc_now_default(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is already UTC
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utc_now, 'postgresql')
+def _utc_now_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+def _resolve_actor():
+    """Username of the logged-in user, or 'system' outside a request
+    (CLI, tests, background jobs) or for anonymous users."""
+    if not has_request_context():
+        return 'system'
+    return getattr(current_user, 'username', None) or 'system'
+
+
 class SoftDeleteMixin:
     """
     Mixin for soft-delete functionality on critical entities.
@@ -27,22 +60,41 @@ class SoftDeleteMixin:
             return
         
         self.deleted_at = datetime.utcnow()
+        self.deleted_by = actor or _resolve_actor()
+        self.delete_reason = reason
+    
+    @classmethod
+    def soft_delete_many(cls, query, reason=None, actor=None):
+        """
+        Soft delete every not-yet-deleted row matched by ``query`` with a
+        single UPDATE; the actor is resolved once for the whole batch.
         
-        # Safely get actor - works in CLI, tests, background jobs, and request context
-        if actor:
-            self.deleted_by = actor
-        else:
-            try:
-                # Try to get current_user (only works in request context)
-                if hasattr(current_user, 'username'):
-                    self.deleted_by = current_user.username
-                else:
-                    self.deleted_by = 'system'
-            except RuntimeError:
-                # current_user accessed outside request context (CLI/tests/background jobs)
-                self.deleted_by = 'system'
+        Returns:
+            Number of rows marked as deleted
+        """
+        return query.filter(cls.deleted_at.is_(None)).update(
+            {
+                cls.deleted_at: utc_now(),
+                cls.deleted_by: actor or _resolve_actor(),
+                cls.delete_reason: reason,
+            },
+            synchronize_session='fetch',
+        )
+    
+    @classmethod
+    def soft_delete_bulk(cls, ids, reason=None, actor=None):
+        """
+        Soft delete the rows whose primary key is in ``ids`` without
+        loading them.
         
-        self.delete_reason = reason
+        Returns:
+            Number of rows marked as deleted
+        """
+        ids = list(ids)
+        if not ids:
+            return 0
+        pk = cls.__mapper__.primary_key[0]
+        return cls.soft_delete_many(cls.query.filter(pk.in_(ids)), reason=reason, actor=actor)
     
     def restore(self):
         """Restore a soft-deleted record"""
@@ -80,6 +132,28 @@ class ActivatableMixin:
         self.disabled_at = datetime.utcnow()
         self.disabled_reason = reason
     
+    @classmethod
+    def disable_bulk(cls, ids, reason=None):
+        """
+        Disable the active rows whose primary key is in ``ids`` with a
+        single UPDATE.
+        
+        Returns:
+            Number of rows disabled
+        """
+        ids = list(ids)
+        if not ids:
+            return 0
+        pk = cls.__mapper__.primary_key[0]
+        return cls.query.filter(pk.in_(ids), cls.is_active.is_(True)).update(
+            {
+                cls.is_active: False,
+                cls.disabled_at: utc_now(),
+                cls.disabled_reason: reason,
+            },
+            synchronize_session='fetch',
+        )
+    
     def enable(self):
         """Re-enable/reactivate this record"""
         self.is_active = True
@@ -4,11 +4,32 @@ Uses scikit-learn to build predictive models for optimization
 """
 import pandas as pd
 import numpy as np
+
+# scikit-learn-intelex swaps in oneDAL-backed RandomForest/scaler
+# implementations when installed; it has to patch before the sklearn
+# imports below. Models pickled while patched need it installed to load.
+try:
+    from sklearnex import patch_sklearn
+    patch_sklearn()
+    HAS_SKLEARNEX = True
+except ImportError:
+    HAS_SKLEARNEX = False
+
+# skl2onnx + onnxruntime run the fitted model as one compiled graph, which
+# is far quicker than sklearn's Python-level predict for small batches.
+try:
+    import onnxruntime
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    HAS_ONNX = True
+except ImportError:
+    HAS_ONNX = False
+
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.preprocessing import StandardScaler
 import joblib
 import os
 
@@ -20,8 +41,12 @@ class PickingTimePredictor:
     def __init__(self):
         self.model = None
         self.scaler = StandardScaler()
-        self.label_encoders = {}
+        self.category_maps = {}
         self.feature_columns = []
+        # Tree models work in float32 internally; feeding it avoids a copy
+        self.feature_dtype = np.float32
+        self.onnx_model = None
+        self.onnx_session = None
         self.is_trained = False
         
     def prepare_features(self, df):
@@ -53,10 +78,11 @@ class PickingTimePredictor:
         
         # Time-based features
         if 'start_time' in features_df.columns:
-            features_df['hour_of_day'] = pd.to_datetime(features_df['start_time']).dt.hour
-            features_df['day_of_week'] = pd.to_datetime(features_df['start_time']).dt.dayofweek
-            features_df['is_weekend'] = features_df['day_of_week'].isin([5, 6]).astype(int)
-            features_df['is_peak_hour'] = features_df['hour_of_day'].isin([8, 9, 13, 14]).astype(int)
+            start_time = pd.to_datetime(features_df['start_time'])
+            features_df['hour_of_day'] = start_time.dt.hour
+            features_df['day_of_week'] = start_time.dt.dayofweek
+            features_df['is_weekend'] = (features_df['day_of_week'] >= 5).astype(np.int8)
+            features_df['is_peak_hour'] = features_df['hour_of_day'].isin([8, 9, 13, 14]).astype(np.int8)
             
             numerical_features.extend(['hour_of_day', 'day_of_week', 'is_weekend', 'is_peak_hour'])
         
@@ -97,28 +123,25 @@ class PickingTimePredictor:
         # Encode categorical features
         for col in categorical_features:
             if col in features_df.columns:
-                if col not in self.label_encoders:
-                    self.label_encoders[col] = LabelEncoder()
-                    # Fit the encoder
+                if col not in self.category_maps:
+                    # Learn the categories (sorted, as LabelEncoder numbered them)
                     valid_values = features_df[col].dropna().astype(str)
                     if not valid_values.empty:
-                        self.label_encoders[col].fit(valid_values)
+                        categories = pd.Index(valid_values.unique()).sort_values()
+                        # Reserve a code for categories unseen at fit time
+                        if 'unknown' not in categories:
+                            categories = categories.append(pd.Index(['unknown']))
+                        self.category_maps[col] = categories
                 
                 # Transform values
-                if col in self.label_encoders:
-                    features_df[col + '_encoded'] = features_df[col].astype(str).fillna('unknown')
+                if col in self.category_maps:
+                    categories = self.category_maps[col]
+                    codes = categories.get_indexer(features_df[col].astype(str)).astype(np.int64)
                     
-                    # Handle unseen categories
-                    known_classes = set(self.label_encoders[col].classes_)
-                    features_df[col + '_encoded'] = features_df[col + '_encoded'].apply(
-                        lambda x: x if x in known_classes else 'unknown'
-                    )
+                    # Handle unseen categories (coded -1)
+                    codes[codes == -1] = categories.get_loc('unknown')
                     
-                    # Add 'unknown' to encoder if not present
-                    if 'unknown' not in self.label_encoders[col].classes_:
-                        self.label_encoders[col].classes_ = np.append(self.label_encoders[col].classes_, 'unknown')
-                    
-                    features_df[col + '_encoded'] = self.label_encoders[col].transform(features_df[col + '_encoded'])
+                    features_df[col + '_encoded'] = codes
                     final_features.append(col + '_encoded')
         
         self.feature_columns = final_features
@@ -148,6 +171,8 @@ class PickingTimePredictor:
         if len(X) < 10:
             raise ValueError("Insufficient data for training (minimum 10 samples required)")
         
+        X = X.astype(self.feature_dtype)
+        
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
         
@@ -188,6 +213,8 @@ class PickingTimePredictor:
         # Train the best model on full training set
         best_model.fit(X_train, y_train)
         self.model = best_model
+        self.onnx_model = self._export_onnx(best_model, X.shape[1])
+        self.onnx_session = self._onnx_session(self.onnx_model)
         
         # Calculate performance metrics
         y_pred = best_model.predict(X_test)
@@ -228,16 +255,45 @@ class PickingTimePredictor:
                 X[col] = 0
         
         # Reorder columns to match training
-        X = X[self.feature_columns]
+        X = X[self.feature_columns].astype(self.feature_dtype)
         
         # Scale features
         X_scaled = self.scaler.transform(X)
         
         # Make predictions
-        predictions = self.model.predict(X_scaled)
+        if self.onnx_session is not None:
+            predictions = self.onnx_session.run(None, {'X': X_scaled.astype(np.float32)})[0].ravel()
+        else:
+            predictions = self.model.predict(X_scaled)
         
         return predictions
     
+    def _export_onnx(self, model, n_features):
+        """
+        Serialize the fitted model to ONNX; returns None when skl2onnx is
+        missing or cannot convert it, and sklearn predict is used instead.
+        """
+        if not HAS_ONNX:
+            return None
+        try:
+            onnx_model = convert_sklearn(
+                model, initial_types=[('X', FloatTensorType([None, n_features]))]
+            )
+            return onnx_model.SerializeToString()
+        except Exception as e:
+            print(f"ONNX export failed for {type(model).__name__}: {e}")
+            return None
+    
+    def _onnx_session(self, onnx_model):
+        """Create an inference session for serialized ONNX bytes, if any."""
+        if onnx_model is None or not HAS_ONNX:
+            return None
+        try:
+            return onnxruntime.InferenceSession(onnx_model, providers=['CPUExecutionProvider'])
+        except Exception as e:
+            print(f"ONNX session could not be created: {e}")
+            return None
+    
     def get_feature_importance(self):
         """
         Get feature importance from the trained model
@@ -262,8 +318,10 @@ class PickingTimePredictor:
         model_data = {
             'model': self.model,
             'scaler': self.scaler,
-            'label_encoders': self.label_encoders,
+            'category_maps': self.category_maps,
             'feature_columns': self.feature_columns,
+            'feature_dtype': np.dtype(self.feature_dtype).name,
+            'onnx_model': self.onnx_model,
             'is_trained': self.is_trained
         }
         
@@ -280,8 +338,22 @@ class PickingTimePredictor:
         
         self.model = model_data['model']
         self.scaler = model_data['scaler']
-        self.label_encoders = model_data['label_encoders']
+        if 'category_maps' in model_data:
+            self.category_maps = model_data['category_maps']
+        else:
+            # Models saved before category_maps stored fitted LabelEncoders
+            self.category_maps = {}
+            for col, encoder in model_data['label_encoders'].items():
+                if hasattr(encoder, 'classes_'):
+                    categories = pd.Index(encoder.classes_)
+                    if 'unknown' not in categories:
+                        categories = categories.append(pd.Index(['unknown']))
+                    self.category_maps[col] = categories
         self.feature_columns = model_data['feature_columns']
+        # Models saved before feature_dtype was stored were fitted on float64
+        self.feature_dtype = np.dtype(model_data.get('feature_dtype', 'float64')).type
+        self.onnx_model = model_data.get('onnx_model')
+        self.onnx_session = self._onnx_session(self.onnx_model)
         self.is_trained = model_data['is_trained']
 
 def train_and_evaluate_model(df):
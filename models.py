@@ -100,6 +100,14 @@ class User(UserMixin, db.Model):
 # Invoices Table
 class Invoice(db.Model, SoftDeleteMixin):
     __tablename__ = 'invoices'
+    __table_args__ = (
+        # Partial index over live rows only (see SoftDeleteMixin)
+        db.Index(
+            'ix_invoices_alive_status', 'status',
+            postgresql_where=db.text('deleted_at IS NULL'),
+            sqlite_where=db.text('deleted_at IS NULL'),
+        ),
+    )
     invoice_no = db.Column(db.String(50), primary_key=True)
     routing = db.Column(db.String(100), nullable=True)
     customer_name = db.Column(db.String(200), nullable=True)
@@ -237,6 +245,13 @@ class PickingException(db.Model):
 # Batch Picking Session Table
 class BatchPickingSession(db.Model, SoftDeleteMixin):
     __tablename__ = 'batch_picking_sessions'
+    __table_args__ = (
+        db.Index(
+            'ix_batch_sessions_alive_status', 'status',
+            postgresql_where=db.text('deleted_at IS NULL'),
+            sqlite_where=db.text('deleted_at IS NULL'),
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     batch_number = db.Column(db.String(20), nullable=True, unique=True)  # Human-readable batch number (BATCH-YYYYMMDD-###)
@@ -1041,44 +1056,50 @@ class ItemTimeTracking(db.Model):
     
     def to_ai_dict(self):
         """Convert to dictionary format for AI analysis"""
+        return ItemTimeTracking.ai_dict_from_row(self)
+    
+    @staticmethod
+    def ai_dict_from_row(row):
+        """Build the AI analysis dict from anything exposing the column
+        attributes: an ItemTimeTracking instance or a Core result row."""
         return {
-            'item_code': self.item_code,
+            'item_code': row.item_code,
             'location_data': {
-                'zone': self.zone,
-                'corridor': self.corridor,
-                'shelf': self.shelf,
-                'level': self.level,
-                'bin': self.bin_location,
-                'full_location': self.location,
-                'previous_location': self.previous_location
+                'zone': row.zone,
+                'corridor': row.corridor,
+                'shelf': row.shelf,
+                'level': row.level,
+                'bin': row.bin_location,
+                'full_location': row.location,
+                'previous_location': row.previous_location
             },
             'timing_data': {
-                'walking_time': self.walking_time,
-                'picking_time': self.picking_time,
-                'confirmation_time': self.confirmation_time,
-                'total_time': self.total_item_time,
-                'expected_time': self.expected_time,
-                'efficiency_ratio': self.efficiency_ratio
+                'walking_time': row.walking_time,
+                'picking_time': row.picking_time,
+                'confirmation_time': row.confirmation_time,
+                'total_time': row.total_item_time,
+                'expected_time': row.expected_time,
+                'efficiency_ratio': row.efficiency_ratio
             },
             'item_data': {
-                'weight': self.item_weight,
-                'quantity_expected': self.quantity_expected,
-                'quantity_picked': self.quantity_picked,
-                'unit_type': self.unit_type,
-                'name': self.item_name
+                'weight': row.item_weight,
+                'quantity_expected': row.quantity_expected,
+                'quantity_picked': row.quantity_picked,
+                'unit_type': row.unit_type,
+                'name': row.item_name
             },
             'context_data': {
-                'sequence': self.order_sequence,
-                'time_of_day': self.time_of_day,
-                'day_of_week': self.day_of_week,
-                'picker': self.picker_username,
-                'peak_hours': self.peak_hours,
-                'concurrent_pickers': self.concurrent_pickers
+                'sequence': row.order_sequence,
+                'time_of_day': row.time_of_day,
+                'day_of_week': row.day_of_week,
+                'picker': row.picker_username,
+                'peak_hours': row.peak_hours,
+                'concurrent_pickers': row.concurrent_pickers
             },
             'quality_data': {
-                'picked_correctly': self.picked_correctly,
-                'was_skipped': self.was_skipped,
-                'skip_reason': self.skip_reason
+                'picked_correctly': row.picked_correctly,
+                'was_skipped': row.was_skipped,
+                'skip_reason': row.skip_reason
             }
         }
 
@@ -1107,6 +1128,13 @@ class TimeTrackingAlert(db.Model):
 # Shipment Management Models
 class Shipment(db.Model, SoftDeleteMixin):
     __tablename__ = 'shipments'
+    __table_args__ = (
+        db.Index(
+            'ix_shipments_alive_driver', 'driver_name',
+            postgresql_where=db.text('deleted_at IS NULL'),
+            sqlite_where=db.text('deleted_at IS NULL'),
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     driver_name = db.Column(db.String(100), nullable=False)
@@ -1168,6 +1196,13 @@ class ShipmentOrder(db.Model):
 # Route Stop (delivery route stops)
 class RouteStop(db.Model, SoftDeleteMixin):
     __tablename__ = 'route_stop'
+    __table_args__ = (
+        db.Index(
+            'ix_route_stop_alive_shipment', 'shipment_id',
+            postgresql_where=db.text('deleted_at IS NULL'),
+            sqlite_where=db.text('deleted_at IS NULL'),
+        ),
+    )
     
     route_stop_id = db.Column(db.Integer, primary_key=True)
     shipment_id = db.Column(db.Integer, db.ForeignKey('shipments.id', ondelete='CASCADE'), nullable=False)
@@ -1407,6 +1442,13 @@ class StockResolution(db.Model):
 # PS365 Customer Data Model
 class PSCustomer(db.Model, SoftDeleteMixin, ActivatableMixin):
     __tablename__ = 'ps_customers'
+    __table_args__ = (
+        db.Index(
+            'ix_ps_customers_alive_active', 'is_active',
+            postgresql_where=db.text('deleted_at IS NULL'),
+            sqlite_where=db.text('deleted_at IS NULL'),
+        ),
+    )
     
     customer_code_365 = db.Column(db.String(50), primary_key=True)
     customer_code_secondary = db.Column(db.Text, nullable=True)
@@ -17,6 +17,7 @@ from utils import create_user
 from utils.invoice_utils import recalculate_invoice_totals
 from services.permissions import require_permission
 from services.picking_utils import get_picking_eligible_users
+from settings_cache import get_bool
 from utils.shift_tracking import (
     check_in_picker, check_out_picker, start_break, end_break, 
     record_activity, check_for_idle_pickers, check_for_missed_checkouts,
@@ -143,14 +144,9 @@ def inject_context():
     # (e.g. Neon cold-start, pool exhaustion) the error page itself can still
     # render instead of producing a second traceback ("error.html also failed").
     try:
-        use_shipments_raw = Setting.get(db.session, 'use_shipments', 'false')
-        use_shipments = str(use_shipments_raw).strip().lower() in ('true', '1', 'yes', 'on')
-
-        legacy_repl_raw = Setting.get(db.session, 'legacy_replenishment_enabled', 'false')
-        legacy_replenishment_enabled = str(legacy_repl_raw).strip().lower() in ('true', '1', 'yes', 'on')
-
-        cooler_raw = Setting.get(db.session, 'cooler_picking_enabled', 'false')
-        cooler_picking_enabled = str(cooler_raw).strip().lower() in ('true', '1', 'yes', 'on')
+        use_shipments = get_bool('use_shipments')
+        legacy_replenishment_enabled = get_bool('legacy_replenishment_enabled')
+        cooler_picking_enabled = get_bool('cooler_picking_enabled')
     except Exception:
         use_shipments = False
         legacy_replenishment_enabled = False
@@ -208,11 +204,8 @@ def handle_shipment_urls():
     
     # Check if shipments feature is enabled
     try:
-        use_shipments_raw = Setting.get(db.session, 'use_shipments', 'false')
-        use_shipments = str(use_shipments_raw).strip().lower() in ('true', '1', 'yes', 'on')
-        
         # If shipments are enabled, proceed normally
-        if use_shipments:
+        if get_bool('use_shipments'):
             return None
         
         # Shipments are disabled - redirect to appropriate page
@@ -763,8 +756,7 @@ def admin_dashboard():
                 remaining_time = (invoice.total_exp_time or 0) * remaining_percentage
                 total_remaining_time += remaining_time
     
-    use_shipments_raw = Setting.get(db.session, 'use_shipments', 'false')
-    use_shipments = str(use_shipments_raw).strip().lower() in ('true', '1', 'yes', 'on')
+    use_shipments = get_bool('use_shipments')
     
     unresolved_issues_count = 0
     if current_user.role == 'warehouse_manager':
@@ -1877,6 +1869,9 @@ def edit_user(username):
         
         db.session.commit()
         
+        from item_tracking import invalidate_picker_count
+        invalidate_picker_count()
+        
         if new_username != username:
             flash(f'User renamed from "{username}" to "{new_username}" and updated successfully', 'success')
         else:
@@ -2721,7 +2716,7 @@ def admin_settings():
 def admin_clear_image_cache():
     """Delete all locally cached product images so they are re-fetched from Azure."""
     import glob as _glob
-    from image_handler import LOCAL_IMAGE_DIR
+    from image_handler import LOCAL_IMAGE_DIR, clear_missing_cache
     try:
         files = _glob.glob(os.path.join(LOCAL_IMAGE_DIR, '*'))
         count = len(files)
@@ -2730,6 +2725,7 @@ def admin_clear_image_cache():
                 os.remove(f)
             except Exception:
                 pass
+        clear_missing_cache()
         flash(f"Image cache cleared — {count} file(s) deleted. Images will be re-fetched from Azure on next request.", "success")
     except Exception as e:
         flash(f"Error clearing image cache: {e}", "danger")
@@ -3732,7 +3728,8 @@ def api_confirm_pick(invoice_no):
                 tracking_id=int(tracking_id),
                 picked_qty=picked_qty,
                 picked_correctly=(expected_qty is not None and picked_qty == expected_qty),
-                was_skipped=False
+                was_skipped=False,
+                commit=False  # committed with the pick below
             )
         except Exception as e:
             current_app.logger.warning(f"Failed to complete item tracking: {e}")
@@ -4056,7 +4053,8 @@ def pick_item(invoice_no):
                             tracking_id=int(tracking_id),
                             picked_qty=picked_qty,
                             picked_correctly=(picked_qty == expected_qty),
-                            was_skipped=False
+                            was_skipped=False,
+                            commit=False  # committed with the pick below
                         )
                     except Exception as e:
                         current_app.logger.warning(f"Failed to complete item tracking: {e}")
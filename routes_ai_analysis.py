@@ -6,11 +6,13 @@ from datetime import datetime, timedelta
 from app import app, db
 from models import User
 from flask_login import login_required, current_user
-from run_analysis import run_comprehensive_analysis, generate_insights_report, quick_analysis, picker_comparison_analysis, zone_deep_dive
 import json
 import numpy as np
 import pandas as pd
 
+# run_analysis pulls in scikit-learn/joblib via model_trainer (about a second of
+# import time), so it is imported inside the views instead of at worker boot.
+
 def sanitize_for_json(obj):
     """Convert numpy/pandas types and NaN values to JSON-serializable types"""
     if isinstance(obj, dict):
@@ -58,6 +60,7 @@ def ai_analysis_dashboard():
 def run_ai_analysis():
     """Run AI analysis with specified parameters"""
     try:
+        from run_analysis import run_comprehensive_analysis
         data = request.get_json()
         
         # Parse date inputs
@@ -97,6 +100,7 @@ def run_ai_analysis():
 def quick_ai_analysis(days):
     """Quick analysis for last N days"""
     try:
+        from run_analysis import quick_analysis
         results = quick_analysis(days_back=days)
         clean_results = sanitize_for_json(results)
         return jsonify(clean_results)
@@ -111,6 +115,7 @@ def quick_ai_analysis(days):
 def ai_picker_comparison():
     """Compare performance between two pickers"""
     try:
+        from run_analysis import picker_comparison_analysis
         data = request.get_json()
         picker1 = data.get('picker1')
         picker2 = data.get('picker2')
@@ -137,6 +142,7 @@ def ai_picker_comparison():
 def ai_zone_analysis(zone_name):
     """Deep dive analysis for a specific zone"""
     try:
+        from run_analysis import zone_deep_dive
         days_back = request.args.get('days', 30, type=int)
         results = zone_deep_dive(zone_name, days_back=days_back)
         return jsonify(results)
@@ -151,6 +157,7 @@ def ai_zone_analysis(zone_name):
 def generate_ai_report():
     """Generate a text report from analysis results"""
     try:
+        from run_analysis import generate_insights_report
         data = request.get_json()
         analysis_results = data.get('analysis_results')
         
@@ -178,6 +185,7 @@ def generate_ai_report():
 def ai_recommendations():
     """Get AI recommendations for the last 7 days"""
     try:
+        from run_analysis import quick_analysis
         results = quick_analysis(days_back=7)
         
         if results.get('success'):
@@ -198,6 +206,7 @@ def ai_recommendations():
 def ai_performance_trends():
     """Show performance trends over time"""
     try:
+        from run_analysis import quick_analysis
         days_back = request.args.get('days', 30, type=int)
         results = quick_analysis(days_back=days_back)
         
@@ -218,6 +227,7 @@ def ai_performance_trends():
 def export_ai_data():
     """Export analysis data in various formats"""
     try:
+        from run_analysis import generate_insights_report
         data = request.get_json()
         analysis_results = data.get('analysis_results')
         export_format = data.get('format', 'json')
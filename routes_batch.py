@@ -2753,20 +2753,17 @@ def batch_picking_item(batch_id):
     # We create tracking records now but don't set item_started until picker clicks "Proceed to Pick"
     tracking_ids = []
     try:
-        from item_tracking import start_item_tracking
+        from item_tracking import start_item_tracking_bulk
         source_items = current_item.get('source_items', [])
         
-        for source_item in source_items:
-            tracking = start_item_tracking(
-                invoice_no=source_item.get('invoice_no'),
-                item_code=current_item.get('item_code'),
-                picker_username=current_user.username,
-                previous_location=None,  # Could track this for walking time
-                start_immediately=False,
-                batch_id=batch_id
-            )
-            if tracking:
-                tracking_ids.append(tracking.id)
+        tracking_ids = start_item_tracking_bulk(
+            [(source_item.get('invoice_no'), current_item.get('item_code'))
+             for source_item in source_items],
+            picker_username=current_user.username,
+            previous_location=None,  # Could track this for walking time
+            start_immediately=False,
+            batch_id=batch_id
+        )
     except Exception as e:
         current_app.logger.warning(f"Error starting batch item tracking: {e}")
     
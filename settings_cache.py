@@ -0,0 +1,58 @@
+"""Process-local cache for boolean feature-flag settings.
+
+Flags such as ``use_shipments`` are read by the template context processor
+and by request hooks on every request. ``get_bool`` memoises the parsed value
+so each flag costs one SELECT per TTL window instead of one per read.
+
+Writes through the ORM clear the cache immediately in the writing process;
+other gunicorn workers pick up the change within ``SETTINGS_CACHE_TTL_SECONDS``.
+"""
+import threading
+import time
+from functools import lru_cache
+
+from sqlalchemy import event
+
+from app import db
+from models import Setting
+
+SETTINGS_CACHE_TTL_SECONDS = 30
+_TRUE_VALUES = ('true', '1', 'yes', 'on')
+
+_lock = threading.Lock()
+_loaded_at = time.monotonic()
+
+
+@lru_cache(maxsize=None)
+def _get_bool(key, default):
+    raw = Setting.get(db.session, key, None)
+    if raw is None:
+        return default
+    return str(raw).strip().lower() in _TRUE_VALUES
+
+
+def get_bool(key, default=False):
+    """Return the boolean value of setting ``key`` (cached)."""
+    global _loaded_at
+    now = time.monotonic()
+    if now - _loaded_at > SETTINGS_CACHE_TTL_SECONDS:
+        with _lock:
+            if now - _loaded_at > SETTINGS_CACHE_TTL_SECONDS:
+                _get_bool.cache_clear()
+                _loaded_at = now
+    return _get_bool(key, default)
+
+
+def clear():
+    """Drop every cached flag (called automatically on Setting writes)."""
+    global _loaded_at
+    with _lock:
+        _get_bool.cache_clear()
+        _loaded_at = time.monotonic()
+
+
+@event.listens_for(Setting, 'after_insert')
+@event.listens_for(Setting, 'after_update')
+@event.listens_for(Setting, 'after_delete')
+def _invalidate_on_write(mapper, connection, target):
+    clear()
@@ -47,6 +47,10 @@ def app():
     except Exception:
         pass
     
+    # Feature flags are cached per process; start every test cold.
+    import settings_cache
+    settings_cache.clear()
+
     # Create the database and tables
     with app.app_context():
         db.create_all()
@@ -0,0 +1,79 @@
+"""Tests for the after_flush listener in main.py that gives every new
+PaymentCustomer its default open credit terms."""
+import os
+import sys
+import uuid
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(THIS_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+from sqlalchemy import text
+
+
+@pytest.fixture
+def app_ctx():
+    assert os.environ.get("DATABASE_URL"), "DATABASE_URL required"
+    import main  # noqa: F401  -- registers the after_flush listener
+    from app import app, db
+    with app.app_context():
+        db.session.remove()
+        yield app, db
+        db.session.remove()
+
+
+@pytest.fixture
+def code_prefix(app_ctx):
+    _, db = app_ctx
+    prefix = f"t168_{uuid.uuid4().hex[:6]}_"
+    yield prefix
+    db.session.rollback()
+    db.session.execute(text("DELETE FROM credit_terms WHERE customer_code LIKE :p"), {"p": prefix + "%"})
+    db.session.execute(text("DELETE FROM payment_customers WHERE code LIKE :p"), {"p": prefix + "%"})
+    db.session.commit()
+
+
+def _open_terms(code):
+    from models import CreditTerms
+    return CreditTerms.query.filter_by(customer_code=code, valid_to=None).all()
+
+
+def test_customers_flushed_together_each_get_default_terms(app_ctx, code_prefix):
+    _, db = app_ctx
+    from main import _DEFAULT_TERMS_BASE
+    from models import PaymentCustomer
+    codes = [f"{code_prefix}1", f"{code_prefix}2"]
+
+    db.session.add_all([PaymentCustomer(code=code, name=code) for code in codes])
+    db.session.commit()
+
+    for code in codes:
+        terms = _open_terms(code)
+        assert len(terms) == 1
+        term = terms[0]
+        for field in ("terms_code", "due_days", "is_credit", "allow_cash",
+                      "allow_card_pos", "allow_bank_transfer", "allow_cheque",
+                      "cheque_days_allowed"):
+            assert getattr(term, field) == _DEFAULT_TERMS_BASE[field], field
+        assert term.valid_from is not None
+
+    # A second flush (an update plus another new customer) adds no duplicates
+    PaymentCustomer.query.filter_by(code=codes[0]).one().name = "Renamed"
+    db.session.add(PaymentCustomer(code=f"{code_prefix}3", name="Third"))
+    db.session.commit()
+    assert [len(_open_terms(code)) for code in codes + [f"{code_prefix}3"]] == [1, 1, 1]
+
+
+def test_customer_with_open_terms_keeps_a_single_row(app_ctx, code_prefix):
+    _, db = app_ctx
+    from models import CreditTerms, PaymentCustomer
+    code = f"{code_prefix}x"
+
+    # Open terms already on file when the customer row is created
+    db.session.add(PaymentCustomer(code=code, name=code))
+    db.session.add(CreditTerms(customer_code=code, terms_code="NET30", due_days=30))
+    db.session.commit()
+
+    assert [t.terms_code for t in _open_terms(code)] == ["NET30"]
@@ -0,0 +1,145 @@
+"""Tests for image_handler.get_product_image remote lookups.
+
+Items without a remote image used to trigger two full GETs on every call.
+Misses are now probed with HEAD and remembered via a ``.missing`` marker,
+so repeat lookups never leave the process.
+"""
+import io
+
+import pytest
+from PIL import Image
+
+import image_handler
+
+
+class _FakeRaw(io.BytesIO):
+    decode_content = False
+
+
+class _FakeResponse:
+    def __init__(self, status_code, body=b""):
+        self.status_code = status_code
+        self.content = body
+        self.raw = _FakeRaw(body)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    def __init__(self, head_status=404, body=b""):
+        self.head_status = head_status
+        self.body = body
+        self.calls = []
+
+    def head(self, url, timeout=None):
+        self.calls.append(("HEAD", url))
+        return _FakeResponse(self.head_status)
+
+    def get(self, url, timeout=None, **kwargs):
+        self.calls.append(("GET", url))
+        return _FakeResponse(self.head_status, self.body)
+
+
+@pytest.fixture
+def image_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_handler, "LOCAL_IMAGE_DIR", str(tmp_path))
+    image_handler.clear_missing_cache()
+    yield tmp_path
+    image_handler.clear_missing_cache()
+
+
+def test_missing_image_is_probed_with_head_only(image_dir, monkeypatch):
+    session = _FakeSession(head_status=404)
+    monkeypatch.setattr(image_handler, "_SESSION", session)
+
+    result = image_handler.get_product_image("NOIMG1")
+
+    assert result == image_handler.PLACEHOLDER_IMAGE
+    assert [method for method, _ in session.calls] == ["HEAD", "HEAD"]
+    assert (image_dir / "NOIMG1.missing").exists()
+
+
+def test_known_missing_image_skips_remote_lookup(image_dir, monkeypatch):
+    session = _FakeSession(head_status=404)
+    monkeypatch.setattr(image_handler, "_SESSION", session)
+
+    image_handler.get_product_image("NOIMG2")
+    session.calls.clear()
+    image_handler.clear_missing_cache()  # force the on-disk marker path
+
+    assert image_handler.get_product_image("NOIMG2") == image_handler.PLACEHOLDER_IMAGE
+    assert session.calls == []
+
+
+def test_server_error_is_not_cached_as_missing(image_dir, monkeypatch):
+    session = _FakeSession(head_status=503)
+    monkeypatch.setattr(image_handler, "_SESSION", session)
+
+    assert image_handler.get_product_image("FLAKY1") == image_handler.PLACEHOLDER_IMAGE
+    assert not (image_dir / "FLAKY1.missing").exists()
+
+
+@pytest.mark.parametrize("use_vips", [False, True])
+def test_found_image_is_downscaled_to_webp(image_dir, monkeypatch, use_vips):
+    if use_vips and not image_handler.HAS_PYVIPS:
+        pytest.skip("pyvips not installed")
+    monkeypatch.setattr(image_handler, "HAS_PYVIPS", use_vips)
+    buf = io.BytesIO()
+    Image.new("RGBA", (800, 600), (255, 0, 0, 128)).save(buf, "PNG")
+    session = _FakeSession(head_status=200, body=buf.getvalue())
+    monkeypatch.setattr(image_handler, "_SESSION", session)
+
+    assert image_handler.get_product_image("HASIMG1") == "images/HASIMG1.webp"
+    assert [p.name for p in image_dir.iterdir()] == ["HASIMG1.webp"]
+    with Image.open(image_dir / "HASIMG1.webp") as saved:
+        assert saved.size == (400, 300)
+        assert saved.mode == "RGB"
+
+
+def test_cached_item_codes_lists_images_and_miss_markers(image_dir):
+    (image_dir / "A1.webp").write_bytes(b"")
+    (image_dir / "B2.missing").write_bytes(b"")
+    (image_dir / "image-not-found.svg").write_bytes(b"")
+
+    assert image_handler._cached_item_codes() == {"A1", "B2"}
+
+
+def test_prefetch_skips_cached_and_inflight_codes(image_dir, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    fetched = []
+    monkeypatch.setattr(image_handler, "get_product_image", fetched.append)
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(image_handler, "_PREFETCH_POOL", pool)
+    (image_dir / "CACHED.webp").write_bytes(b"")
+    image_handler._INFLIGHT.add("BUSY")
+    try:
+        image_handler._schedule_prefetch(["CACHED", "NEW1", "BUSY", "NEW2"])
+        pool.shutdown(wait=True)
+    finally:
+        image_handler._INFLIGHT.discard("BUSY")
+
+    assert sorted(fetched) == ["NEW1", "NEW2"]
+    assert image_handler._INFLIGHT == set()
+
+
+def test_prefetch_treats_int_and_str_codes_as_one(image_dir, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    fetched = []
+    monkeypatch.setattr(image_handler, "get_product_image", fetched.append)
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(image_handler, "_PREFETCH_POOL", pool)
+    image_handler._INFLIGHT.add("77")
+    try:
+        image_handler._schedule_prefetch([77, 123, "123"])
+        pool.shutdown(wait=True)
+    finally:
+        image_handler._INFLIGHT.discard("77")
+
+    assert fetched == ["123"]
+    assert image_handler._INFLIGHT == set()
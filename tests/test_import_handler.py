@@ -0,0 +1,176 @@
+"""Tests for the Excel invoice importers in import_handler.
+
+Both importers group rows by invoice, skip invoices that already exist and
+derive per-line weight and invoice totals from the sheet.
+"""
+import uuid
+
+import pandas as pd
+import pytest
+
+
+def _write_sheet(tmp_path, rows):
+    path = tmp_path / f"import_{uuid.uuid4().hex[:8]}.xlsx"
+    pd.DataFrame(rows).to_excel(path, index=False, engine="openpyxl")
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_excel_cache(tmp_path, monkeypatch):
+    import import_handler
+    monkeypatch.setattr(import_handler, "EXCEL_CACHE_DIR", str(tmp_path / "excel_cache"))
+
+
+@pytest.fixture
+def invoice_prefix():
+    return f"IMP{uuid.uuid4().hex[:6].upper()}-"
+
+
+def _rows(prefix):
+    return [
+        {"INVOICE NO": f"{prefix}1", "ROUTING": "R1", "CUSTOMER NAME": "Acme",
+         "LOCATION": "9-01-A01", "ITEM CODE": "A-1", "BARCODE": "111",
+         "ZONE": "MAIN", "Items.Weight": 1.5, "ITEM NAME": "Apple",
+         "UNIT TYPE": "box", "Pack": "6 X", "QTY": 2, "EXP TIME": 1.0},
+        {"INVOICE NO": f"{prefix}1", "ROUTING": "R1", "CUSTOMER NAME": "Acme",
+         "LOCATION": "10-02-B01", "ITEM CODE": "B-2", "BARCODE": "222",
+         "ZONE": "MAIN", "Items.Weight": 0.5, "ITEM NAME": "Banana",
+         "UNIT TYPE": "piece", "Pack": "", "QTY": 4, "EXP TIME": 2.0},
+        {"INVOICE NO": f"{prefix}2", "ROUTING": "R2", "CUSTOMER NAME": "Other",
+         "LOCATION": "12-03-C02", "ITEM CODE": "C-3", "BARCODE": "333",
+         "ZONE": "SECONDARY", "Items.Weight": 2.0, "ITEM NAME": "Cherry",
+         "UNIT TYPE": "box", "Pack": "12", "QTY": 1, "EXP TIME": 0.5},
+    ]
+
+
+def test_extract_corridors_matches_scalar_helper():
+    from import_handler import extract_corridor_from_location, extract_corridors
+
+    locations = ["9-01-A01", " 10-02-B01 ", "COOLER", "  ", "", None]
+    expected = [extract_corridor_from_location(loc) for loc in locations]
+
+    assert extract_corridors(pd.Series(locations)).tolist() == expected
+
+
+def test_process_excel_file_imports_invoices_and_items(app, tmp_path, invoice_prefix):
+    from app import db
+    from import_handler import process_excel_file
+    from models import Invoice, InvoiceItem
+
+    path = _write_sheet(tmp_path, _rows(invoice_prefix))
+    with app.app_context():
+        success, message = process_excel_file(path, db.session)
+        assert success, message
+
+        invoice = db.session.get(Invoice, f"{invoice_prefix}1")
+        assert invoice.customer_name == "Acme"
+        assert invoice.total_lines == 2
+        assert invoice.total_items == 6
+        assert invoice.total_weight == pytest.approx(5.0)
+
+        item = db.session.get(InvoiceItem, (f"{invoice_prefix}1", "A-1"))
+        assert item.corridor == "09"
+        assert item.line_weight == pytest.approx(3.0)
+        assert item.pack == "6 X"
+
+        # A second import of the same file skips every invoice.
+        success, message = process_excel_file(path, db.session)
+        assert "Skipped 2 duplicate invoices" in message
+        assert InvoiceItem.query.filter(
+            InvoiceItem.invoice_no.like(f"{invoice_prefix}%")
+        ).count() == 3
+
+
+def test_process_excel_file_skips_repeated_item_rows(app, tmp_path, invoice_prefix):
+    from app import db
+    from import_handler import process_excel_file
+    from models import InvoiceItem
+
+    rows = _rows(invoice_prefix)
+    rows.append(dict(rows[0]))
+    path = _write_sheet(tmp_path, rows)
+    with app.app_context():
+        success, message = process_excel_file(path, db.session)
+        assert success, message
+        assert "1 duplicate items" in message
+        assert InvoiceItem.query.filter_by(invoice_no=f"{invoice_prefix}1").count() == 2
+
+
+def test_process_excel_file_safely_imports_totals(app, tmp_path, invoice_prefix):
+    from app import db
+    from import_handler import process_excel_file_safely
+    from models import Invoice, InvoiceItem
+
+    path = _write_sheet(tmp_path, _rows(invoice_prefix))
+    with app.app_context():
+        success, message = process_excel_file_safely(path)
+        assert success, message
+        assert message.startswith("Imported 2 of 2 invoices with 3 items")
+
+        invoice = db.session.get(Invoice, f"{invoice_prefix}1")
+        assert invoice.total_items == 6
+        assert invoice.total_weight == pytest.approx(5.0)
+        assert invoice.total_exp_time == pytest.approx(3.0)
+
+        item = db.session.get(InvoiceItem, (f"{invoice_prefix}2", "C-3"))
+        assert item.qty == 1
+        assert item.line_weight == pytest.approx(2.0)
+        assert item.zone == "SECONDARY"
+
+        success, message = process_excel_file_safely(path)
+        assert message.startswith("Imported 0 of 2 invoices")
+
+
+def test_customer_code_is_resolved_from_ps_customers(app, tmp_path, invoice_prefix):
+    from app import db
+    from import_handler import process_excel_file
+    from models import Invoice, PSCustomer
+
+    rows = _rows(invoice_prefix)
+    customer = f"Customer {invoice_prefix}"
+    for row in rows:
+        row["CUSTOMER NAME"] = customer
+    path = _write_sheet(tmp_path, rows)
+    with app.app_context():
+        db.session.add(PSCustomer(customer_code_365=f"C{invoice_prefix}", company_name=customer))
+        db.session.commit()
+
+        success, message = process_excel_file(path, db.session)
+        assert success, message
+        assert db.session.get(Invoice, f"{invoice_prefix}2").customer_code_365 == f"C{invoice_prefix}"
+
+
+def test_read_excel_fast_reuses_parquet_cache(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    import import_handler
+
+    monkeypatch.setattr(import_handler, "HAS_PARQUET", True)
+    path = _write_sheet(tmp_path, _rows("CACHE-"))
+
+    first = import_handler.read_excel_fast(path)
+    assert len(list((tmp_path / "excel_cache").glob("*.parquet"))) == 1
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("workbook should not be parsed again")
+
+    monkeypatch.setattr(import_handler.pd, "read_excel", _fail)
+    second = import_handler.read_excel_fast(path)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_process_excel_file_tolerates_missing_optional_columns(app, tmp_path, invoice_prefix):
+    from app import db
+    from import_handler import process_excel_file
+    from models import InvoiceItem
+
+    rows = [{"invoice number": f"{invoice_prefix}1", "item_code": "Z-9", "quantity": 3}]
+    path = _write_sheet(tmp_path, rows)
+    with app.app_context():
+        success, message = process_excel_file(path, db.session)
+        assert success, message
+
+        item = db.session.get(InvoiceItem, (f"{invoice_prefix}1", "Z-9"))
+        assert item.qty == 3
+        assert item.barcode is None
+        assert item.corridor is None
+        assert item.exp_time is None
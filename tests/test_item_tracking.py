@@ -0,0 +1,251 @@
+"""Tests for the per-item pick tracking helpers in item_tracking."""
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def invoice_no(app):
+    from app import db
+    from models import Invoice, InvoiceItem
+
+    number = f"TRK{uuid.uuid4().hex[:8].upper()}"
+    with app.app_context():
+        db.session.add(Invoice(invoice_no=number, customer_name="Tracking Test",
+                               upload_date="2025-01-15"))
+        db.session.add_all([
+            InvoiceItem(invoice_no=number, item_code="TRK-A", location="30-07-C02",
+                        zone="MAIN", qty=2, item_weight=1.5, item_name="Alpha",
+                        unit_type="box", exp_time=1.5),
+            InvoiceItem(invoice_no=number, item_code="TRK-B", location="C01-S02-L03-B04",
+                        zone="COLD", qty=1, item_name="Beta", unit_type="piece"),
+        ])
+        db.session.commit()
+    return number
+
+
+def test_start_item_tracking_copies_item_details(app, invoice_no):
+    from item_tracking import start_item_tracking
+
+    with app.app_context():
+        tracking = start_item_tracking(invoice_no, "TRK-A", "test_picker_user")
+
+        assert tracking is not None
+        assert tracking.item_started is not None
+        assert (tracking.corridor, tracking.shelf, tracking.level, tracking.bin_location) == ("30", "07", "C", "02")
+        assert tracking.expected_time == 90
+        assert tracking.quantity_expected == 2
+        assert tracking.order_sequence == 1
+
+
+def test_start_item_tracking_unknown_item_returns_none(app, invoice_no):
+    from item_tracking import start_item_tracking
+
+    with app.app_context():
+        assert start_item_tracking(invoice_no, "NOPE", "test_picker_user") is None
+
+
+def test_picker_count_is_cached_until_invalidated(app, invoice_no, monkeypatch):
+    import item_tracking
+
+    item_tracking.invalidate_picker_count()
+    with app.app_context():
+        first = item_tracking.start_item_tracking(invoice_no, "TRK-A", "test_picker_user")
+        assert first.concurrent_pickers >= 1
+
+        def _no_query(*args, **kwargs):
+            raise AssertionError("picker count should come from the cache")
+
+        monkeypatch.setattr(item_tracking.db.session, "query", _no_query)
+        assert item_tracking._concurrent_picker_count() == first.concurrent_pickers
+    item_tracking.invalidate_picker_count()
+
+
+def test_order_sequence_follows_previous_tracked_picks(app, invoice_no):
+    from item_tracking import start_item_tracking
+
+    with app.app_context():
+        first = start_item_tracking(invoice_no, "TRK-A", "test_picker_user")
+        second = start_item_tracking(invoice_no, "TRK-B", "test_picker_user")
+
+        assert (first.order_sequence, second.order_sequence) == (1, 2)
+
+
+def test_start_item_tracking_bulk_inserts_rows_in_pick_order(app, invoice_no):
+    from app import db
+    from item_tracking import start_item_tracking, start_item_tracking_bulk
+    from models import ItemTimeTracking
+
+    with app.app_context():
+        start_item_tracking(invoice_no, "TRK-A", "test_picker_user")
+        ids = start_item_tracking_bulk(
+            [(invoice_no, "TRK-B"), (invoice_no, "MISSING"), (invoice_no, "TRK-A")],
+            "test_picker_user",
+            start_immediately=False,
+        )
+
+        assert len(ids) == 2
+        rows = [db.session.get(ItemTimeTracking, tracking_id) for tracking_id in ids]
+        assert [row.item_code for row in rows] == ["TRK-B", "TRK-A"]
+        assert [row.order_sequence for row in rows] == [2, 3]
+        assert rows[0].item_started is None
+        assert rows[0].created_at is not None
+        assert (rows[0].corridor, rows[0].bin_location) == ("C01", "B04")
+        assert rows[1].expected_time == 90
+
+
+def test_start_item_tracking_bulk_with_no_matches(app, invoice_no):
+    from item_tracking import start_item_tracking_bulk
+
+    with app.app_context():
+        assert start_item_tracking_bulk([], "test_picker_user") == []
+        assert start_item_tracking_bulk([(invoice_no, "NOPE")], "test_picker_user") == []
+
+
+def test_ai_data_matches_to_ai_dict(app, invoice_no):
+    from app import db
+    from item_tracking import (complete_item_tracking, get_item_tracking_data_for_ai,
+                               start_item_tracking)
+    from models import ItemTimeTracking
+
+    picker = f"ai_{invoice_no.lower()}"
+    with app.app_context():
+        from models import User
+        db.session.add(User(username=picker, password="x", role="picker"))
+        db.session.commit()
+
+        done = start_item_tracking(invoice_no, "TRK-A", picker)
+        complete_item_tracking(done.id, picked_qty=2)
+        start_item_tracking(invoice_no, "TRK-B", picker)  # still open
+
+        data = get_item_tracking_data_for_ai(picker_username=picker)
+
+        assert data == [db.session.get(ItemTimeTracking, done.id).to_ai_dict()]
+        assert get_item_tracking_data_for_ai(picker_username=picker, zone="COLD") == []
+
+
+def _add_completed_rows(invoice_no, picker, rows):
+    from app import db
+    from models import ItemTimeTracking, User
+    from timezone_utils import get_utc_now
+
+    db.session.add(User(username=picker, password="x", role="picker"))
+    now = get_utc_now()
+    for zone, total, ratio, period, skipped, reason in rows:
+        db.session.add(ItemTimeTracking(
+            invoice_no=invoice_no, item_code="TRK-A", picker_username=picker,
+            item_completed=now, zone=zone, total_item_time=total,
+            efficiency_ratio=ratio, time_of_day=period,
+            was_skipped=skipped, skip_reason=reason,
+        ))
+    db.session.commit()
+
+
+def test_performance_insights_aggregates(app, invoice_no):
+    from item_tracking import get_performance_insights
+
+    picker = f"pi_{invoice_no.lower()}"
+    with app.app_context():
+        _add_completed_rows(invoice_no, picker, [
+            ("MAIN", 60.0, 0.5, "morning", False, None),
+            ("MAIN", 120.0, 2.0, "afternoon", True, "Damaged"),
+            ("COLD", 30.0, 1.0, "afternoon", False, None),
+            (None, 10.0, 0.0, None, True, "Damaged"),
+        ])
+
+        insights = get_performance_insights(picker_username=picker)
+
+        summary = insights["summary"]
+        assert summary["total_items_picked"] == 4
+        assert summary["total_time_seconds"] == pytest.approx(220.0)
+        assert summary["average_time_per_item"] == pytest.approx(55.0)
+        assert summary["efficiency_rate_percent"] == pytest.approx(50.0)
+        assert insights["zone_performance"] == {
+            "MAIN": {"count": 2, "total_time": 180.0, "avg_efficiency": 0, "avg_time": 90.0},
+            "COLD": {"count": 1, "total_time": 30.0, "avg_efficiency": 0, "avg_time": 30.0},
+        }
+        assert insights["time_of_day_efficiency"] == {
+            "morning": pytest.approx(0.5), "afternoon": pytest.approx(1.5), "evening": 0,
+        }
+        by_type = {rec["type"]: rec for rec in insights["recommendations"]}
+        assert by_type["zone_optimization"]["data"] == {"MAIN": 1}
+        assert by_type["scheduling"]["data"]["morning_efficiency"] == pytest.approx(0.5)
+        assert by_type["quality_improvement"]["data"] == {"Damaged": 2}
+
+
+def test_performance_insights_without_data(app):
+    from item_tracking import get_performance_insights
+
+    with app.app_context():
+        assert get_performance_insights(picker_username="nobody-here") == {
+            "message": "No data available for analysis"
+        }
+
+
+def test_iter_ai_data_streams_in_chunks(app, invoice_no):
+    from item_tracking import get_item_tracking_data_for_ai, iter_item_tracking_data_for_ai
+
+    picker = f"it_{invoice_no.lower()}"
+    with app.app_context():
+        _add_completed_rows(invoice_no, picker, [
+            ("MAIN", 10.0 * n, 1.0, "morning", False, None) for n in range(5)
+        ])
+
+        streamed = iter_item_tracking_data_for_ai(picker_username=picker, chunk_size=2)
+
+        assert not isinstance(streamed, list)
+        rows = list(streamed)
+        assert len(rows) == 5
+        assert rows == get_item_tracking_data_for_ai(picker_username=picker)
+
+
+def test_complete_and_phase_timing_defer_commit(app, invoice_no):
+    from app import db
+    from item_tracking import (complete_item_tracking, start_item_tracking,
+                               update_picking_phase_timing)
+    from models import ItemTimeTracking
+
+    with app.app_context():
+        tracking_id = start_item_tracking(invoice_no, "TRK-A", "test_picker_user").id
+
+        assert update_picking_phase_timing(tracking_id, walking_time=12.0, commit=False)
+        assert complete_item_tracking(tracking_id, picked_qty=2, commit=False)
+        db.session.rollback()
+
+        row = db.session.get(ItemTimeTracking, tracking_id)
+        assert row.item_completed is None
+        assert row.walking_time == 0.0
+
+        assert update_picking_phase_timing(tracking_id, walking_time=12.0, commit=False)
+        assert complete_item_tracking(tracking_id, picked_qty=2, commit=False)
+        db.session.commit()
+        db.session.expire_all()
+
+        row = db.session.get(ItemTimeTracking, tracking_id)
+        assert row.item_completed is not None
+        assert row.walking_time == 12.0
+        assert row.quantity_picked == 2
+
+
+def test_generate_ai_recommendations_accepts_rows_or_dataframe():
+    from types import SimpleNamespace
+
+    import pandas as pd
+    from item_tracking import generate_ai_recommendations
+
+    rows = [
+        SimpleNamespace(zone="B", efficiency_ratio=2.0, time_of_day="morning", was_skipped=False, skip_reason=None),
+        SimpleNamespace(zone="A", efficiency_ratio=1.6, time_of_day="afternoon", was_skipped=True, skip_reason="Empty"),
+        SimpleNamespace(zone="A", efficiency_ratio=0.4, time_of_day="afternoon", was_skipped=True, skip_reason=""),
+        SimpleNamespace(zone="B", efficiency_ratio=1.7, time_of_day="evening", was_skipped=None, skip_reason=None),
+    ]
+
+    from_rows = generate_ai_recommendations(rows)
+    from_frame = generate_ai_recommendations(pd.DataFrame([vars(row) for row in rows]))
+
+    assert from_rows == from_frame
+    assert [rec["type"] for rec in from_rows] == ["zone_optimization", "quality_improvement"]
+    assert from_rows[0]["data"] == {"B": 2, "A": 1}
+    assert from_rows[1]["data"] == {"Empty": 1}
+    assert "High skip rate (2 items)" in from_rows[1]["message"]
+    assert generate_ai_recommendations([]) == []
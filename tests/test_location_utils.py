@@ -0,0 +1,77 @@
+"""Tests for the shift check-in location checks in location_utils."""
+import pytest
+
+from location_utils import (
+    ALLOWED_RADIUS_METERS,
+    REFERENCE_LATITUDE,
+    REFERENCE_LONGITUDE,
+    calculate_distance,
+    haversine_batch,
+    validate_location,
+    validate_locations,
+)
+
+
+def test_at_facility_is_valid():
+    result = validate_location(f"{REFERENCE_LATITUDE},{REFERENCE_LONGITUDE}")
+    assert result["valid"] is True
+    assert result["distance"] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_distance_boundary():
+    # ~150m north, ~240m north-east (inside the bounding box but outside the
+    # circle) and ~250m north (outside the bounding box)
+    near = validate_location(f"{REFERENCE_LATITUDE + 0.00135},{REFERENCE_LONGITUDE}")
+    corner = validate_location(f"{REFERENCE_LATITUDE + 0.0015},{REFERENCE_LONGITUDE + 0.0018}")
+    far = validate_location(f"{REFERENCE_LATITUDE + 0.00225},{REFERENCE_LONGITUDE}")
+    assert near["valid"] is True
+    assert corner["valid"] is False
+    assert corner["distance"] > ALLOWED_RADIUS_METERS
+    assert "must be within" in corner["message"]
+    assert far["valid"] is False
+    assert far["distance"] is None
+    assert far["message"].startswith("You are outside the facility area")
+
+
+@pytest.mark.parametrize("value, message", [
+    ("", "Location data not captured"),
+    (None, "Location data not captured"),
+    ("35.0", "Invalid location format."),
+    ("1,2,3", "Invalid location format."),
+    ("abc,33.3", "Error validating location"),
+])
+def test_invalid_input(value, message):
+    result = validate_location(value)
+    assert result["valid"] is False
+    assert result["distance"] is None
+    assert result["message"].startswith(message)
+
+
+def test_haversine_batch_matches_scalar():
+    lats = [REFERENCE_LATITUDE, 35.1, 34.9, 40.0]
+    lons = [REFERENCE_LONGITUDE, 33.4, 33.2, -3.7]
+    expected = [calculate_distance(REFERENCE_LATITUDE, REFERENCE_LONGITUDE, lat, lon)
+                for lat, lon in zip(lats, lons)]
+    assert haversine_batch(lats, lons).tolist() == pytest.approx(expected)
+    assert haversine_batch([0.0], [1.0], ref_lat=0.0, ref_lon=0.0)[0] == pytest.approx(111195, rel=1e-4)
+
+
+def test_validate_locations_matches_single_calls():
+    values = [f"{REFERENCE_LATITUDE},{REFERENCE_LONGITUDE}", "", "35.1,33.4", "x,y",
+              f"{REFERENCE_LATITUDE + 0.001},{REFERENCE_LONGITUDE}"]
+    batch = validate_locations(values)
+    single = [validate_location(value) for value in values]
+    assert [r["valid"] for r in batch] == [r["valid"] for r in single]
+    assert [r["message"][:20] for r in batch] == [r["message"][:20] for r in single]
+    assert validate_locations([]) == []
+
+
+@pytest.mark.parametrize("dlat, dlon", [
+    (0.0005, 0.0), (0.0, 0.002), (-0.0013, 0.0011), (0.0075, -0.0075), (0.05, -0.05), (5.0, 3.0),
+])
+def test_facility_distance_matches_haversine(dlat, dlon):
+    from location_utils import facility_distance
+
+    lat, lon = REFERENCE_LATITUDE + dlat, REFERENCE_LONGITUDE + dlon
+    expected = calculate_distance(REFERENCE_LATITUDE, REFERENCE_LONGITUDE, lat, lon)
+    assert facility_distance(lat, lon) == pytest.approx(expected, rel=1e-4)
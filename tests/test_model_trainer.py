@@ -0,0 +1,98 @@
+"""Tests for PickingTimePredictor categorical encoding and model persistence."""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+import joblib
+from sklearn.preprocessing import LabelEncoder
+
+from model_trainer import PickingTimePredictor
+
+
+def _training_frame(rows=40):
+    rng = np.random.default_rng(0)
+    zones = ['MAIN', 'COOLER', 'SECONDARY']
+    units = ['EACH', 'BOX', 'CASE']
+    pickers = ['anna', 'bob']
+    return pd.DataFrame({
+        'walking_time_seconds': rng.uniform(5, 30, rows),
+        'picking_time_seconds': rng.uniform(2, 20, rows),
+        'confirmation_time_seconds': rng.uniform(1, 5, rows),
+        'weight_per_unit': rng.uniform(0.1, 12, rows),
+        'requested_qty': rng.integers(1, 10, rows),
+        'picked_qty': rng.integers(1, 10, rows),
+        'zone': [zones[i % 3] for i in range(rows)],
+        'unit_type': [units[i % 3] for i in range(rows)],
+        'picker_username': [pickers[i % 2] for i in range(rows)],
+        'start_time': pd.date_range('2024-01-01 08:00', periods=rows, freq='h'),
+        'total_time_seconds': rng.uniform(10, 60, rows),
+    })
+
+
+def test_categories_are_sorted_with_unknown_code():
+    predictor = PickingTimePredictor()
+    predictor.prepare_features(_training_frame())
+
+    zones = predictor.category_maps['zone']
+    assert list(zones) == ['COOLER', 'MAIN', 'SECONDARY', 'unknown']
+
+    new = _training_frame(3)
+    new['zone'] = ['MAIN', 'ANNEX', None]
+    encoded = predictor.prepare_features(new)['zone_encoded'].tolist()
+    assert encoded == [1, 3, 3]
+
+
+def test_saved_model_reloads_with_same_predictions(tmp_path):
+    df = _training_frame()
+    predictor = PickingTimePredictor()
+    predictor.train_model(df)
+    path = tmp_path / 'model.joblib'
+    predictor.save_model(str(path))
+
+    loaded = PickingTimePredictor()
+    loaded.load_model(str(path))
+
+    assert loaded.feature_columns == predictor.feature_columns
+    for col, categories in predictor.category_maps.items():
+        assert list(loaded.category_maps[col]) == list(categories)
+    np.testing.assert_allclose(
+        loaded.predict_time(df.head(5)), predictor.predict_time(df.head(5)), rtol=1e-5
+    )
+
+
+def test_loads_model_saved_with_label_encoders(tmp_path):
+    df = _training_frame()
+    trained = PickingTimePredictor()
+    trained.train_model(df)
+
+    # Old format: fitted LabelEncoders with 'unknown' appended on first use
+    label_encoders = {}
+    for col in ('zone', 'unit_type', 'picker_username'):
+        encoder = LabelEncoder().fit(df[col].astype(str))
+        encoder.classes_ = np.append(encoder.classes_, 'unknown')
+        label_encoders[col] = encoder
+    # ...or, for an encoder never used to transform, without it
+    label_encoders['picker_username'].classes_ = label_encoders['picker_username'].classes_[:-1]
+    path = tmp_path / 'old_model.joblib'
+    joblib.dump({
+        'model': trained.model,
+        'scaler': trained.scaler,
+        'label_encoders': label_encoders,
+        'feature_columns': trained.feature_columns,
+        'is_trained': True,
+    }, str(path))
+
+    loaded = PickingTimePredictor()
+    loaded.load_model(str(path))
+
+    assert loaded.feature_dtype is np.float64
+    assert loaded.onnx_session is None
+    assert list(loaded.category_maps['zone']) == list(label_encoders['zone'].classes_)
+    assert list(loaded.category_maps['picker_username']) == ['anna', 'bob', 'unknown']
+
+    new = df.head(4).copy()
+    new['zone'] = ['MAIN', 'COOLER', 'ANNEX', 'SECONDARY']
+    encoded = loaded.prepare_features(new)['zone_encoded'].tolist()
+    assert encoded == list(label_encoders['zone'].transform(['MAIN', 'COOLER', 'unknown', 'SECONDARY']))
+    assert len(loaded.predict_time(new)) == 4
@@ -52,3 +52,22 @@ def test_lowercase_input_normalised():
     result = parse_location_components("30-07-c02")
     assert result["level"] == "C"
     assert result["corridor"] == "30"
+
+
+def test_prefixed_words_and_non_matching_parts():
+    result = parse_location_components("COR01-SHELF_2-LX-BIN7")
+    assert result == {
+        "corridor": "COR01",
+        "shelf": "SHELF_2",
+        "level": None,
+        "bin_location": "BIN7",
+    }
+
+
+def test_tuple_variant_is_cached():
+    from item_tracking import parse_location_components_tuple
+
+    parse_location_components_tuple.cache_clear()
+    assert parse_location_components_tuple("30-07-C02") == ("30", "07", "C", "02")
+    assert parse_location_components_tuple("30-07-C02") == ("30", "07", "C", "02")
+    assert parse_location_components_tuple.cache_info().hits == 1
@@ -0,0 +1,37 @@
+"""Tests for settings_cache.get_bool feature-flag memoisation."""
+import settings_cache
+
+
+def _set(db, key, value):
+    from models import Setting
+    Setting.set(db.session, key, value)
+    db.session.commit()
+
+
+def test_get_bool_parses_and_defaults(app):
+    from app import db
+    with app.app_context():
+        _set(db, 'flag_yes', ' Yes ')
+        _set(db, 'flag_off', 'off')
+        assert settings_cache.get_bool('flag_yes') is True
+        assert settings_cache.get_bool('flag_off') is False
+        assert settings_cache.get_bool('flag_missing') is False
+        assert settings_cache.get_bool('flag_missing', True) is True
+
+
+def test_get_bool_is_cached_and_cleared_on_write(app, monkeypatch):
+    from app import db
+    from models import Setting
+    with app.app_context():
+        _set(db, 'use_shipments', 'false')
+        assert settings_cache.get_bool('use_shipments') is False
+
+        calls = []
+        real_get = Setting.get
+        monkeypatch.setattr(Setting, 'get', classmethod(
+            lambda cls, *a: calls.append(a) or real_get(*a)))
+        assert settings_cache.get_bool('use_shipments') is False
+        assert calls == []
+
+        _set(db, 'use_shipments', 'true')
+        assert settings_cache.get_bool('use_shipments') is True
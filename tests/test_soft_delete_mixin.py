@@ -0,0 +1,91 @@
+"""Tests for the batch helpers on SoftDeleteMixin."""
+from datetime import datetime
+
+
+def test_soft_delete_many_marks_only_live_rows(app):
+    from app import db
+    from models import PurchaseOrder
+    with app.app_context():
+        orders = [PurchaseOrder(code_365=f'PO-{i}') for i in range(3)]
+        db.session.add_all(orders)
+        db.session.commit()
+        orders[0].soft_delete(reason='first', actor='alice')
+        db.session.commit()
+
+        query = PurchaseOrder.query.filter(PurchaseOrder.code_365.like('PO-%'))
+        assert PurchaseOrder.soft_delete_many(query, reason='bulk') == 2
+        db.session.commit()
+
+        rows = {po.code_365: po for po in PurchaseOrder.query.all()}
+        assert rows['PO-0'].deleted_by == 'alice'
+        assert rows['PO-0'].delete_reason == 'first'
+        for code in ('PO-1', 'PO-2'):
+            assert isinstance(rows[code].deleted_at, datetime)
+            assert rows[code].deleted_by == 'system'
+            assert rows[code].delete_reason == 'bulk'
+
+
+def test_soft_delete_bulk_by_primary_key(app):
+    from app import db
+    from models import PurchaseOrder
+    with app.app_context():
+        orders = [PurchaseOrder(code_365=f'PO-{i}') for i in range(3)]
+        db.session.add_all(orders)
+        db.session.commit()
+        ids = [orders[0].id, orders[1].id]
+
+        assert PurchaseOrder.soft_delete_bulk(ids, reason='cleanup', actor='bob') == 2
+        assert PurchaseOrder.soft_delete_bulk(ids) == 0
+        assert PurchaseOrder.soft_delete_bulk([]) == 0
+        db.session.commit()
+
+        assert [po.deleted_by for po in orders] == ['bob', 'bob', None]
+
+
+def test_disable_bulk_uses_customer_code_key(app):
+    from app import db
+    from models import PSCustomer
+    with app.app_context():
+        db.session.add_all([PSCustomer(customer_code_365=code) for code in ('C1', 'C2')])
+        db.session.commit()
+
+        assert PSCustomer.disable_bulk(['C1'], reason='closed') == 1
+        assert PSCustomer.disable_bulk(['C1']) == 0
+        db.session.commit()
+
+        c1, c2 = db.session.get(PSCustomer, 'C1'), db.session.get(PSCustomer, 'C2')
+        assert (c1.is_active, c1.disabled_reason) == (False, 'closed')
+        assert isinstance(c1.disabled_at, datetime)
+        assert c2.is_active is True
+
+
+def test_migration_adds_table_columns_in_one_transaction(app):
+    import pytest
+    from sqlalchemy import text
+    from app import db
+    from migration_soft_delete_sqlite import add_missing_columns
+    with app.app_context():
+        db.session.execute(text("CREATE TABLE sd_migration_probe (id INTEGER PRIMARY KEY)"))
+        db.session.execute(text("INSERT INTO sd_migration_probe (id) VALUES (1)"))
+        db.session.commit()
+
+        def probe_columns():
+            return {col['name'] for col in db.inspect(db.engine).get_columns('sd_migration_probe')}
+
+        existing = {'id'}
+        with pytest.raises(Exception):
+            # SQLite refuses a NOT NULL column without a default on a non-empty table
+            add_missing_columns('sd_migration_probe', [
+                ('deleted_at', 'TIMESTAMP NULL'),
+                ('must_fail', 'INTEGER NOT NULL'),
+            ], existing)
+        assert probe_columns() == {'id'}
+        assert existing == {'id'}
+
+        added = add_missing_columns('sd_migration_probe', [
+            ('id', 'INTEGER'),
+            ('deleted_at', 'TIMESTAMP NULL'),
+            ('deleted_by', 'VARCHAR(64) NULL'),
+        ], existing)
+        assert added == ['deleted_at', 'deleted_by']
+        assert probe_columns() == {'id', 'deleted_at', 'deleted_by'}